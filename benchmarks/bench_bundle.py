@@ -0,0 +1,68 @@
+"""
+bench_bundle.py
+- 기존 3종(joblib pkl + npz + ids json) vs 단일 번들(model_{style}.bundle) 로드 시간 비교.
+- 합성 코퍼스로 TF-IDF를 학습해 두 형식으로 저장하고, 로드 결과가 같은지 확인한 뒤 JSON 한 줄로 출력한다.
+
+Usage:
+  python -m benchmarks.bench_bundle --docs 100000 --repeat 3
+"""
+from __future__ import annotations
+import argparse, json, os, tempfile, time
+import numpy as np
+from joblib import dump
+from scipy import sparse
+from src.reco.embed import fit_tfidf
+from src.io_utils.bundle import bundle_path, write_bundle, read_bundle, load_legacy_files
+
+def _corpus(n_docs: int, n_words: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(n_words)])
+    # Zipf 분포 단어 → 실제 리뷰 텍스트처럼 긴 꼬리 어휘
+    ranks = np.minimum(rng.zipf(1.3, size=(n_docs, 12)), n_words) - 1
+    return [" ".join(words[r]) for r in ranks]
+
+def _best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=100_000)
+    ap.add_argument("--words", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    vec, X = fit_tfidf(_corpus(args.docs, args.words, args.seed), ngram=(1, 2), min_df=2)
+    ids = list(range(X.shape[0]))
+    with tempfile.TemporaryDirectory() as d:
+        dump(vec, f"{d}/tfidf_bench.pkl")
+        sparse.save_npz(f"{d}/X_bench.npz", X)
+        with open(f"{d}/ids_bench.json", "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+        write_bundle(bundle_path(d, "bench"), vec, X, ids, meta={"style": "bench"})
+
+        _, X1, ids1 = load_legacy_files(d, "bench", "ids")
+        b = read_bundle(bundle_path(d, "bench"))
+        assert (X1 != b.X).nnz == 0 and b.ids.tolist() == ids1
+
+        t_trio = _best(lambda: load_legacy_files(d, "bench", "ids"), args.repeat)
+        t_bundle = _best(lambda: read_bundle(bundle_path(d, "bench")), args.repeat)
+        t_bundle_vec = _best(lambda: read_bundle(bundle_path(d, "bench")).vectorizer(), args.repeat)
+        sizes = {
+            "trio_bytes": sum(os.path.getsize(f"{d}/{n}") for n in ("tfidf_bench.pkl", "X_bench.npz", "ids_bench.json")),
+            "bundle_bytes": os.path.getsize(bundle_path(d, "bench")),
+        }
+    print(json.dumps({
+        "docs": args.docs, "dims": int(X.shape[1]), "nnz": int(X.nnz), **sizes,
+        "trio_s": round(t_trio, 4), "bundle_s": round(t_bundle, 4),
+        "bundle_with_vectorizer_s": round(t_bundle_vec, 4),
+        "speedup": round(t_trio / max(t_bundle, 1e-9), 1),
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+bench_metrics.py
+- Scalar (per-list) vs batched NumPy NDCG@K / RegionMatch@K.
+- 결과가 같은지 확인한 뒤 소요 시간을 JSON 한 줄로 출력한다.
+
+Usage:
+  python -m benchmarks.bench_metrics --users 100000 --k 10
+"""
+from __future__ import annotations
+import argparse, json, time
+import numpy as np
+from src.reco.metrics import ndcg_at_k, region_match_at_k, ndcg_at_k_batch, region_match_at_k_batch
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    gains = rng.integers(0, 3, size=(args.users, args.k))
+    match = rng.random((args.users, args.k)) < 0.4
+    # 스칼라 버전 입력: 리스트 + 국가 문자열
+    gain_lists = gains.tolist()
+    countries = [["FR" if m else "XX" for m in row] for row in match.tolist()]
+
+    t0 = time.perf_counter()
+    ndcg_s = [ndcg_at_k(g, args.k) for g in gain_lists]
+    region_s = [region_match_at_k(c, {"FR"}, args.k) for c in countries]
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ndcg_b, _ = ndcg_at_k_batch(gains, args.k)
+    region_b, _ = region_match_at_k_batch(match, args.k)
+    t_batch = time.perf_counter() - t0
+
+    assert np.allclose(ndcg_b, ndcg_s, rtol=0, atol=1e-12)
+    assert np.array_equal(region_b, region_s)
+    print(json.dumps({
+        "users": args.users, "k": args.k,
+        "scalar_s": round(t_scalar, 4), "batch_s": round(t_batch, 4),
+        "speedup": round(t_scalar / max(t_batch, 1e-9), 1),
+        "max_abs_diff_ndcg": float(np.max(np.abs(ndcg_b - np.asarray(ndcg_s)))) if args.users else 0.0,
+    }))
+
+if __name__ == "__main__":
+    main()
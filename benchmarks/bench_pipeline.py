@@ -0,0 +1,164 @@
+"""
+bench_pipeline.py
+- 카탈로그 크기(예: 10k/100k/1M 행)별로 파이프라인/서빙 단계 시간을 잰다.
+  · generate    합성 카탈로그 생성 + 스냅샷 JSON 저장 (src.pipelines.catalog_generate)
+  · validate    스냅샷 로드 → pydantic 검증 → DataFrame (src.validate)
+  · build_corpus / fit_tfidf
+  · score_query 단일 질의 서빙 경로 (QueryEncoder + CSC 점수 + Top-K), 질의당 지연 분포
+  · reco_export 사용자 일괄 점수 → 게이트 → Top-K (recommend_all), 사용자당 ms
+  · eval_report 사용자 일괄 Top-K + 지표 (pick_topk_all + evaluate_picks), 사용자당 ms
+- 결과는 JSON 파일(크기 → 단계 → 초/지표)로 저장 → 빌드 간 diff.
+- --baseline 을 주면 tolerance 이상 느려진 (크기, 단계)가 있을 때 종료 코드 1.
+
+Usage:
+  python -m benchmarks.bench_pipeline --sizes 10k,100k,1m --out reports/bench_pipeline.json
+  python -m benchmarks.bench_pipeline --sizes 10k,100k --baseline reports/bench_pipeline.json --tolerance 0.25
+"""
+from __future__ import annotations
+import argparse, json, os, platform, sys, tempfile, time
+import numpy as np
+
+def _parse_size(s: str) -> int:
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def _users(df, n: int, seed: int) -> list:
+    from src.pipelines import users_generate as ug
+    sample = df.sample(n=min(len(df), 20_000), random_state=seed)
+    countries, _, words = ug.catalog_stats(sample)
+    prof = ug.build_profile(countries, words, ["reds"])
+    opts = {"p_pref_style": 0.7, "p_avoid_style": 0.3, "p_avoid_country": 0.2, "min_terms": 2, "minimal": True}
+    return [u for b in range((n + ug.BLOCK - 1) // ug.BLOCK) for u in ug.generate_block(b, n, seed, prof, opts)]
+
+def bench_size(rows: int, n_users: int, n_queries: int, k: int, seed: int) -> dict:
+    from src.pipelines.catalog_generate import write_snapshot
+    from src.validate import load_latest_frame_with_stats
+    from src.reco.corpus import build_corpus
+    from src.reco.embed import fit_tfidf
+    from src.reco.features import build_item_features
+    from src.reco.evaluation import evaluate_picks
+    from src.reco.query_encoder import QueryEncoder
+    from src.serving.model import ServingModel
+    from src.pipelines.reco_export import recommend_all, query_text
+    from src.pipelines.eval_report import pick_topk_all
+
+    res: dict = {"rows": rows}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as d:
+        os.chdir(d)   # validate 는 ./data/snapshots/* 의 최신 폴더를 읽는다
+        try:
+            _, t = _timed(lambda: write_snapshot("data/snapshots/20000101-000000", ["reds"], rows, seed))
+            res["generate"] = {"seconds": round(t, 3)}
+            (df, stats), t = _timed(lambda: load_latest_frame_with_stats("reds"))
+            res["validate"] = {"seconds": round(t, 3), "rows_per_s": round(stats["final_rows"] / t)}
+        finally:
+            os.chdir(cwd)
+
+    corpus, t = _timed(lambda: build_corpus(df))
+    res["build_corpus"] = {"seconds": round(t, 3)}
+    (vec, X), t = _timed(lambda: fit_tfidf(corpus, ngram=(1, 2), min_df=2))
+    res["fit_tfidf"] = {"seconds": round(t, 3), "dims": int(X.shape[1]), "nnz": int(X.nnz)}
+
+    users = _users(df, max(n_users, n_queries), seed)
+
+    # 단일 질의 서빙 경로 (app 과 같은 모델 객체)
+    model = ServingModel(style="reds", X=X, Xc=X.tocsc(), ids=np.arange(X.shape[0]),
+                         encoder=QueryEncoder.from_vectorizer(vec))
+    queries = [query_text(u.get("terms")) for u in users[:n_queries]]
+    lat = []
+    for q in queries:
+        _, t = _timed(lambda: model.recommend(q, k))
+        lat.append(t * 1000.0)
+    lat = np.array(lat)
+    res["score_query"] = {"queries": len(lat), "mean_ms": round(float(lat.mean()), 3),
+                          "p50_ms": round(float(np.percentile(lat, 50)), 3),
+                          "p95_ms": round(float(np.percentile(lat, 95)), 3),
+                          "p99_ms": round(float(np.percentile(lat, 99)), 3)}
+
+    # reco_export / eval_report: 사용자 일괄 경로
+    df["style"] = "reds"
+    df_idx = df.set_index(["style", "id"], drop=False)
+    keys = [{"style": "reds", "id": int(i)} for i in df["id"].tolist()]
+    us = users[:n_users]
+    feats, t_feats = _timed(lambda: build_item_features(df_idx, keys))
+    res["item_features"] = {"seconds": round(t_feats, 3)}
+    _, t = _timed(lambda: recommend_all(vec, X, feats, us, ["reds"], k))
+    res["reco_export"] = {"users": len(us), "seconds": round(t, 3), "per_user_ms": round(t * 1000 / len(us), 3)}
+
+    def _eval():
+        picked = pick_topk_all(vec, X, us, k)
+        return evaluate_picks(X, picked, feats, us)
+    _, t = _timed(_eval)
+    res["eval_report"] = {"users": len(us), "seconds": round(t, 3), "per_user_ms": round(t * 1000 / len(us), 3)}
+    return res
+
+# 회귀 비교 대상 지표 (단계 → 키)
+_COMPARE = {"generate": "seconds", "validate": "seconds", "build_corpus": "seconds", "fit_tfidf": "seconds",
+            "score_query": "mean_ms", "item_features": "seconds", "reco_export": "seconds",
+            "eval_report": "seconds"}
+
+def regressions(results: dict, base: dict, tolerance: float, min_delta_s: float = 0.05) -> list:
+    """상대(tolerance) + 절대(min_delta_s, 초 단위 지표만) 둘 다 넘어야 회귀 — 작은 단계의 타이머 잡음 무시"""
+    out = []
+    for size, stages in results.items():
+        for stage, key in _COMPARE.items():
+            old = base.get(size, {}).get(stage, {}).get(key)
+            new = stages.get(stage, {}).get(key)
+            floor = min_delta_s if key == "seconds" else 0.0
+            if old and new is not None and new > old * (1 + tolerance) and new - old > floor:
+                out.append((size, stage, key, old, new))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10k,100k,1m")
+    ap.add_argument("--users", type=int, default=1000, help="reco_export/eval_report 사용자 수")
+    ap.add_argument("--queries", type=int, default=500, help="score_query 질의 수")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="reports/bench_pipeline.json")
+    ap.add_argument("--baseline", default=None)
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--min-delta-s", type=float, default=0.05, help="이보다 작은 절대 증가는 무시")
+    args = ap.parse_args()
+
+    # 같은 파일을 --out 으로 덮어쓰기 전에 기준선을 먼저 읽는다
+    base = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)["results"]
+
+    results = {}
+    for s in [x for x in args.sizes.split(",") if x.strip()]:
+        rows = _parse_size(s)
+        r = bench_size(rows, args.users, args.queries, args.k, args.seed)
+        results[str(rows)] = r
+        print(f"[PIPELINE] rows={rows:<8} " + " ".join(
+            f"{st}={r[st][key]}" for st, key in _COMPARE.items()))
+
+    doc = {"meta": {"created": time.strftime("%Y%m%d-%H%M%S"), "python": platform.python_version(),
+                    "numpy": np.__version__, "sklearn": __import__("sklearn").__version__,
+                    "cpus": os.cpu_count(), "users": args.users, "queries": args.queries, "k": args.k,
+                    "seed": args.seed},
+           "results": results}
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"[PIPELINE] saved → {args.out}")
+
+    if base is not None:
+        failed = regressions(results, base, args.tolerance, args.min_delta_s)
+        for size, stage, key, old, new in failed:
+            print(f"[REGRESSION] rows={size} {stage}.{key}: {old} → {new}")
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
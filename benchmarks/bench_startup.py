@@ -0,0 +1,76 @@
+"""
+bench_startup.py
+- 엔트리포인트별 임포트 비용을 `python -X importtime`으로 측정한다(새 프로세스, 캐시된 .pyc 기준).
+- 무거운 모듈(wandb, matplotlib)이 임포트 시점에 끌려오는지 함께 기록한다.
+- --baseline 을 주면 이전 결과 대비 tolerance 이상 느려진 엔트리가 있을 때 종료 코드 1.
+
+Usage:
+  python -m benchmarks.bench_startup --out reports/bench_startup.json
+  python -m benchmarks.bench_startup --baseline reports/bench_startup.json --tolerance 0.25
+"""
+from __future__ import annotations
+import argparse, json, os, statistics, subprocess, sys
+
+ENTRY_POINTS = [
+    "src.app",
+    "src.pipelines.snapshot",
+    "src.pipelines.embed_fit",
+    "src.pipelines.eval_report",
+    "src.pipelines.reco_export",
+    "src.pipelines.select_best",
+    "src.pipelines.sweep",
+    "src.pipelines.users_generate",
+    "src.pipelines.users_materialize",
+    "src.pipelines.loadtest",
+    "src.pipelines.catalog_generate",
+    "src.pipelines.drift",
+    "src.pipelines.dag",
+]
+HEAVY = ("wandb", "matplotlib")
+
+def measure(module: str) -> dict:
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, env=env, check=True)
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        # "import time:      self [us] | cumulative | imported package"
+        parts = [p.strip() for p in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    return {"import_ms": cumulative_us / 1000.0, "heavy": [m for m in proc.stdout.strip().split(",") if m]}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modules", default=",".join(ENTRY_POINTS))
+    ap.add_argument("--repeat", type=int, default=3, help="엔트리당 반복 횟수(중앙값 사용)")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--baseline", default=None)
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args()
+
+    results = {}
+    for mod in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        runs = [measure(mod) for _ in range(max(1, args.repeat))]
+        results[mod] = {"import_ms": round(statistics.median(r["import_ms"] for r in runs), 1),
+                        "heavy": runs[-1]["heavy"]}
+        print(f"[STARTUP] {mod:<32} {results[mod]['import_ms']:>8.1f} ms  heavy={results[mod]['heavy']}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    failed = [m for m, r in results.items() if r["heavy"]]
+    if args.baseline and os.path.exists(args.baseline):
+        base = json.load(open(args.baseline, "r", encoding="utf-8"))
+        for mod, r in results.items():
+            if mod in base and r["import_ms"] > base[mod]["import_ms"] * (1 + args.tolerance):
+                print(f"[REGRESSION] {mod}: {base[mod]['import_ms']} ms → {r['import_ms']} ms")
+                failed.append(mod)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
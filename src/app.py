@@ -1,31 +1,158 @@
-from fastapi import FastAPI, Query
-import wandb, joblib, scipy.sparse as sp, json, os
+from fastapi import FastAPI, HTTPException, Query, Response
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import threading
 import numpy as np
-from sklearn.metrics.pairwise import linear_kernel
+from src.serving.model import load_serving_model
+from src.serving.coalesce import Coalescer
+from src.serving.cache import ModelCache
+from src.serving.federated import merge_topk
+from src.serving.metadata import ItemMetadata, parse_fields
+from src.serving.pagination import CursorCache, page_token, encode_cursor, decode_cursor
+from src.io_utils.kvstore import KVReader, current_path
+from src.io_utils.artifact_cache import ARTIFACT_CACHE, ArtifactCacheError, ArtifactResolver, WandbBackend
+from src.io_utils.users import load_users
+from src.reco.ranker import profile_from_user
 
 app = FastAPI()
 
 # ✅ 환경 변수 (팀원별 계정 가능)
 WANDB_ENTITY = os.getenv("WANDB_ENTITY", "hwanseok0629-")
 WANDB_PROJECT = "wine-reco"
+# 설정 시 W&B 대신 로컬 아티팩트 디렉터리에서 로드 (오프라인/부하 테스트용)
+LOCAL_ARTIFACTS = os.getenv("RECO_LOCAL_ARTIFACTS")
+# 요청 합치기(micro-batching): 창(ms) 동안 같은 style 요청을 모아 한 번의 행렬곱으로 점수 계산 (0 = 끔)
+COALESCE_WINDOW_MS = float(os.getenv("RECO_COALESCE_WINDOW_MS", "0"))
+COALESCE_MAX_BATCH = int(os.getenv("RECO_COALESCE_MAX_BATCH", "32"))
 
-# ✅ 캐시된 모델 보관
-_models = {}
+# 사전 계산된 사용자별 추천 KV 스토어 (users_materialize 출력)
+USER_RECO_DIR = os.getenv("RECO_USER_RECO_DIR", "artifacts/user_reco")
+
+# W&B 아티팩트 공유 캐시 (다이제스트 키, 워커 간 공유, 오프라인 시 별칭 맵으로 :latest 해석)
+ARTIFACT_CACHE_DIR = os.getenv("RECO_ARTIFACT_CACHE", ARTIFACT_CACHE)
+
+# 2단계 추천(개인화 재정렬): 코사인 상위 N 후보만 재정렬, 사용자 프로필 파일(user_id 조회)
+RERANK_CANDIDATES = int(os.getenv("RECO_RERANK_CANDIDATES", "200"))
+USERS_PATH = os.getenv("RECO_USERS", "configs/users.json")
+
+# 멀티 스타일 검색 (styles=reds,whites): 스타일별 모델을 스레드 풀에서 병렬 검색 → 힙 병합
+# (style=all 은 다른 엔드포인트와 같이 통합 "all" 모델 하나를 쓴다)
+_shard_pool = ThreadPoolExecutor(max_workers=int(os.getenv("RECO_SHARD_WORKERS", "8")), thread_name_prefix="shard")
+
+# 커서 페이지네이션: 한 번에 k × PAGE_AHEAD 개(페이지 수)까지 순위를 매겨 캐시 → 다음 페이지는 슬라이스
+# 같은 파라미터의 첫 페이지 요청도 캐시 항목을 공유한다 (TTL 동안)
+PAGE_AHEAD = int(os.getenv("RECO_PAGE_AHEAD", "4"))
+_pages = CursorCache(int(os.getenv("RECO_CURSOR_MAX", "1024")), float(os.getenv("RECO_CURSOR_TTL_S", "300")))
+
+# 로드된 모델 메모리 예산 (초과 시 LRU 제거)
+MODEL_BUDGET_MB = float(os.getenv("RECO_MODEL_BUDGET_MB", "1024"))
+
+# ✅ 캐시된 모델 보관 (메모리 예산 LRU)
+_models = ModelCache(int(MODEL_BUDGET_MB * 1024 * 1024))
+
+def _api_server_run():
+    import wandb  # 임포트 지연: 워커 부팅 시 wandb 로드 비용 제거
+    return wandb.init(project=WANDB_PROJECT, entity=WANDB_ENTITY, job_type="api_server", reinit=True)
+
+_resolver = None
+
+def artifact_resolver() -> ArtifactResolver:
+    global _resolver
+    if _resolver is None:
+        # run은 첫 해석 때 프로세스당 1번만 만든다 (use_artifact 계보 기록 유지)
+        _resolver = ArtifactResolver(ARTIFACT_CACHE_DIR, WandbBackend(run_factory=_api_server_run))
+    return _resolver
 
 def load_model(style: str = "reds"):
-    if style in _models:
-        return _models[style]
+    model = _models.get(style)
+    if model is not None:
+        return model
+
+    if LOCAL_ARTIFACTS:
+        artifact_dir = LOCAL_ARTIFACTS
+    else:
+        # 같은 다이제스트는 한 번만 다운로드 (다른 워커/프로세스와 공유)
+        artifact_dir = artifact_resolver().fetch(f"{WANDB_ENTITY}/{WANDB_PROJECT}/tfidf-{style}:latest", type="model")
+
+    # model_{style}.bundle이 있으면 번들(빠름), 없으면 기존 pkl/npz/json
+    model = load_serving_model(artifact_dir, style)
+    _attach_items(model)
+
+    _models.put(style, model)
+    return model
+
+def _attach_items(model) -> None:
+    """표시용 메타데이터/재정렬용 국가 코드. 번들에 item_* 배열이 있으면 로드 때 이미 붙어 있다.
+    이전 번들: 번들이 기록한 스냅샷(없으면 최신)을 검증해 (style, id)로 행 순서에 정렬.
+    스냅샷이 없거나 깨졌으면 경고만 남기고 국가 가중치 0, 응답은 id/score 만"""
+    if model.meta is not None:
+        return
+    import pandas as pd
+    from src.validate import load_frame_with_stats  # 임포트 지연 (pydantic/pandas)
+    styles = model.style_names or [model.style]
+    frames = []
+    for s in styles:
+        try:
+            df, _ = load_frame_with_stats(s, model.snapshot if len(styles) == 1 else None)
+        except (OSError, ValueError) as e:
+            print(f"[MODEL] style={s}: no item metadata ({e.__class__.__name__}: {e})")
+            continue
+        if "id" in df.columns:
+            frames.append(df.assign(style=s))
+    if not frames:
+        return
+    df = pd.concat(frames, ignore_index=True)
+    keys = pd.MultiIndex.from_arrays([df["style"].to_numpy(), df["id"].astype(np.int64).to_numpy()])
+    rows = keys.get_indexer(pd.MultiIndex.from_arrays([model.item_styles(np.arange(model.rows)), model.ids]))
+    model.attach_meta(ItemMetadata.from_frame(df, rows))
+
+def _describe(hits: list, style: str, federated: bool, fields: list) -> list:
+    """페이지 hits 에 표시 필드 추가 (연합 결과는 hit 의 샤드 모델 메타데이터 사용)"""
+    if not fields or not hits:
+        return hits
+    if not federated:
+        return load_model(style).describe(hits, fields)
+    out, by_style = list(hits), {}
+    for i, h in enumerate(hits):
+        by_style.setdefault(h["style"], []).append(i)
+    for s, idx in by_style.items():
+        for i, h in zip(idx, load_model(s).describe([hits[i] for i in idx], fields)):
+            out[i] = h
+    return out
+
+_profiles = None
 
-    run = wandb.init(project=WANDB_PROJECT, entity=WANDB_ENTITY, job_type="api_server", reinit=True)
-    artifact = run.use_artifact(f"{WANDB_ENTITY}/{WANDB_PROJECT}/tfidf-{style}:latest", type="model")
-    artifact_dir = artifact.download()
+def user_profile(user_id: str):
+    global _profiles
+    if _profiles is None:
+        _profiles = {str(u["user_id"]): u for u in load_users(USERS_PATH)} if os.path.exists(USERS_PATH) else {}
+    return _profiles.get(user_id)
 
-    vec = joblib.load(f"{artifact_dir}/tfidf_{style}.pkl")
-    X   = sp.load_npz(f"{artifact_dir}/X_{style}.npz")
-    ids = json.load(open(f"{artifact_dir}/ids_{style}.json","r",encoding="utf-8"))
+def _recommend_batch(style: str, items):
+    model = load_model(style)
+    return model.recommend_batch([q for q, _ in items], [k for _, k in items])
 
-    _models[style] = (vec, X, ids)
-    return vec, X, ids
+# 사용자 추천 스토어: 포인터({style}.current)가 바뀌거나 파일이 다시 쓰이면 새로 연다
+# (스레드풀 핸들러에서 호출 → 교체/조회는 잠금 안에서, 이전 mmap 은 닫는다)
+_user_stores = {}
+_user_stores_lock = threading.Lock()
+
+def user_record(style: str, user_id: str):
+    path = current_path(USER_RECO_DIR, style)
+    if path is None:
+        return None
+    with _user_stores_lock:
+        store = _user_stores.get(style)
+        if store is None or not store.is_current(path):
+            fresh = KVReader(path)
+            if store is not None:
+                store.close()
+            store = _user_stores[style] = fresh
+        return store.get(user_id)
+
+_coalescer = Coalescer(_recommend_batch, COALESCE_WINDOW_MS, COALESCE_MAX_BATCH) if COALESCE_WINDOW_MS > 0 else None
 
 
 @app.get("/")
@@ -34,22 +161,159 @@ def read_root():
 
 @app.get("/info")
 def get_info(style: str = "reds"):
-    vec, X, ids = load_model(style)
+    model = load_model(style)
     return {
         "style": style,
-        "rows": X.shape[0],
-        "dims": X.shape[1],
-        "num_ids": len(ids),
-        "artifact_cached": True
+        "rows": model.rows,
+        "dims": model.dims,
+        "num_ids": len(model.ids),
+        "artifact_cached": True,
+        "model_bytes": model.nbytes(),
+        "cache": {
+            "budget_bytes": _models.budget_bytes,
+            "resident_bytes": _models.resident_bytes,
+            "evictions": _models.evictions,
+            "entries": [{"style": s, "bytes": b} for s, b in _models.sizes().items()],
+        },
+        "cursors": {"entries": len(_pages), "page_ahead": PAGE_AHEAD, **_pages.stats},
     }
 
+def _split(csv):
+    return [x.strip() for x in csv.split(",") if x.strip()] if csv else []
+
+def _request_profile(user_id, pref_styles, pref_countries, adventurousness):
+    """개인화 파라미터 → 랭커 프로필 (없으면 None = 코사인만)"""
+    if user_id is None and not pref_styles and not pref_countries and adventurousness is None:
+        return None
+    u = {}
+    if user_id is not None:
+        u = user_profile(user_id)
+        if u is None:
+            raise HTTPException(status_code=404, detail=f"unknown user_id={user_id}")
+    u = {**u,
+         **({"preferred_styles": _split(pref_styles)} if pref_styles else {}),
+         **({"prefer_countries": _split(pref_countries)} if pref_countries else {}),
+         **({"adventurousness": adventurousness} if adventurousness is not None else {})}
+    return profile_from_user(u)
+
+async def _federated(query: str, k: int, styles: list, profile, candidates: int) -> dict:
+    loop = asyncio.get_running_loop()
+
+    def search(s):
+        model = load_model(s)
+        hits = model.rerank(query, k, profile, candidates) if profile is not None else model.recommend(query, k)
+        return model.version, hits
+
+    # scatter: 샤드별 상위 k → gather: 점수 기준 힙 병합
+    # 모델이 없는 샤드만 missing 으로 보고, 그 밖의 오류(손상된 번들, 재정렬 버그 등)는 그대로 올린다
+    results = await asyncio.gather(*(loop.run_in_executor(_shard_pool, search, s) for s in styles),
+                                   return_exceptions=True)
+    shards, missing, versions = [], [], {}
+    for s, r in zip(styles, results):
+        if isinstance(r, (FileNotFoundError, ArtifactCacheError)):
+            print(f"[FEDERATED] style={s} unavailable: {r.__class__.__name__}: {r}")
+            missing.append(s)
+        elif isinstance(r, BaseException):
+            raise r
+        else:
+            versions[s] = r[0]
+            shards.append((s, r[1]))
+    if not shards:
+        raise HTTPException(status_code=404, detail=f"no loadable style among {styles}")
+    out = {"query": query, "styles": [s for s, _ in shards], "top_k": merge_topk(shards, k), "versions": versions}
+    if missing:
+        out["missing"] = missing
+    if profile is not None:
+        out["reranked"] = True
+    return out
+
+async def _ranked(p: dict, depth: int) -> dict:
+    """요청 파라미터 → 상위 depth 개 응답 (top_k 외 style/styles/reranked 등 포함).
+    versions = 순위에 쓴 모델의 {스타일: 아티팩트 버전} (캐시 항목 검증용, 응답에서는 뺀다)"""
+    query, style, candidates = p["query"], p["style"], p.get("candidates", RERANK_CANDIDATES)
+    profile = _request_profile(p.get("user_id"), p.get("pref_styles"), p.get("pref_countries"),
+                               p.get("adventurousness"))
+    if profile is not None:
+        # 재정렬은 후보 풀(max(candidates, k)) 안에서만 → 풀 전체를 한 번에 순위 매긴다
+        # (페이지마다 depth 로 풀을 키우면 순위가 바뀌어 페이지 사이에 중복/누락이 생긴다)
+        depth = max(int(candidates), int(p["k"]))
+
+    # 멀티 스타일: styles=reds,whites (style=all 은 통합 모델 경로)
+    targets = _split(p.get("styles"))
+    if targets:
+        return await _federated(query, depth, targets, profile, candidates)
+
+    model = await run_in_threadpool(load_model, style)
+
+    # 개인화 요청이면 2단계: 코사인 상위 candidates개 → 선호/모험성 재정렬
+    if profile is not None:
+        results = await run_in_threadpool(model.rerank, query, depth, profile, candidates)
+        return {"query": query, "style": style, "top_k": results, "reranked": True,
+                "versions": {style: model.version}}
+
+    if _coalescer is not None:
+        results = await _coalescer.submit(style, (query, depth))
+    else:
+        # 질의 열만 순회하는 경량 인코더/스코어러 (sklearn transform 우회)
+        results = await run_in_threadpool(model.recommend, query, depth)
+    return {"query": query, "style": style, "top_k": results, "versions": {style: model.version}}
+
+def _same_models(versions: dict) -> bool:
+    """캐시 항목을 만든 모델들이 지금도 로드돼 있는가 (없으면 다시 로드될 모델이 다를 수 있다)"""
+    for s, v in versions.items():
+        model = _models.get(s)
+        if model is None or model.version != v:
+            return False
+    return True
+
 @app.get("/recommend")
-def recommend(style: str = "reds", query: str = Query(...), k: int = 5):
-    vec, X, ids = load_model(style)
+async def recommend(style: str = "reds", query: str = None, k: int = 5,
+                    user_id: str = None, pref_styles: str = None, pref_countries: str = None,
+                    adventurousness: float = None, candidates: int = RERANK_CANDIDATES,
+                    styles: str = None, cursor: str = None, fields: str = None):
+    # 표시 필드 투영: 생략하면 전부, fields= (빈 값)이면 id/score 만
+    try:
+        wanted = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cursor is not None:
+        # 다음 페이지: 커서에 담긴 파라미터/오프셋 사용 (쿼리 인자는 무시)
+        try:
+            token, offset, p = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid cursor")
+    else:
+        if not query:
+            raise HTTPException(status_code=422, detail="query is required")
+        p = {"query": query, "style": style, "k": k, "styles": styles, "user_id": user_id,
+             "pref_styles": pref_styles, "pref_countries": pref_countries,
+             "adventurousness": adventurousness, "candidates": candidates}
+        p = {key: v for key, v in p.items() if v is not None}
+        token, offset = page_token(p), 0
+    k = max(0, int(p["k"]))
+
+    entry = _pages.get(token)
+    if entry is not None and not _same_models(entry["versions"]):
+        entry = None   # 축출 후 다른 :latest 로 다시 로드됨 → 이전 모델의 id 를 내보내지 않는다
+    if entry is None or (offset + k > len(entry["top_k"]) and not entry["complete"]):
+        # 캐시에 없음(첫 요청/만료·축출) 또는 캐시 깊이를 넘는 페이지 → 다음 PAGE_AHEAD 페이지까지 순위 계산
+        depth = offset + k * max(1, PAGE_AHEAD)
+        out = await _ranked(p, depth)
+        entry = {**out, "complete": bool(out.get("reranked")) or len(out["top_k"]) < depth}
+        _pages.put(token, entry)
 
-    qv = vec.transform([query])
-    scores = linear_kernel(X, qv).ravel()
-    order = np.argsort(-scores)[:k]
+    hits = entry["top_k"]
+    more = offset + k < len(hits) or not entry["complete"]
+    page = {key: v for key, v in entry.items() if key not in ("complete", "versions")}
+    page["top_k"] = await run_in_threadpool(_describe, hits[offset:offset + k], p["style"],
+                                            "styles" in entry, wanted)
+    page["next_cursor"] = encode_cursor(token, offset + k, p) if more and k > 0 else None
+    return page
 
-    results = [{"id": int(ids[i]), "score": float(scores[i])} for i in order]
-    return {"query": query, "style": style, "top_k": results}
+@app.get("/users/{user_id}/recommendations")
+def user_recommendations(user_id: str, style: str = "all"):
+    raw = user_record(style, user_id)
+    if raw is None:
+        raise HTTPException(status_code=404, detail=f"no materialized recommendations for user={user_id} style={style}")
+    # 저장된 JSON 그대로 반환 (점수 계산/재직렬화 없음)
+    return Response(content=raw, media_type="application/json")
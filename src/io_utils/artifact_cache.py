@@ -0,0 +1,227 @@
+"""
+artifact_cache.py
+- Shared on-disk cache for W&B artifact downloads, keyed by artifact digest.
+  Layout: {root}/objects/{digest}/ (published files) · {root}/locks/{digest}.lock ·
+  {root}/aliases.json (ref → digest, e.g. "entity/project/tfidf-reds:latest").
+- fetch(ref): resolve ref → digest (backend metadata call only), then reuse
+  objects/{digest} if present. Otherwise download into a private tmp dir and
+  publish it with one atomic rename. A per-digest file lock makes concurrent
+  workers wait for the first download instead of downloading again.
+- Offline (offline=True, WANDB_MODE=offline|disabled, or resolve fails with a
+  connection/timeout error): the ref is resolved from aliases.json, so
+  `tfidf-{style}:latest` keeps working from the last digest seen online. Any other
+  resolve error (auth, deleted/renamed artifact, bugs) propagates.
+- Backends implement resolve(ref, type) → Resolved and download(resolved, dest).
+  WandbBackend is the real one; tests use a fake.
+"""
+from __future__ import annotations
+import json, os, re, shutil, socket, time, uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+ARTIFACT_CACHE = ".cache/artifacts"
+
+class ArtifactCacheError(RuntimeError):
+    pass
+
+@dataclass
+class Resolved:
+    digest: str
+    name: str                      # 버전이 확정된 이름 (예: entity/project/tfidf-reds:v3)
+    handle: object = field(default=None, repr=False)
+
+# 1. 파일 잠금 (POSIX flock, Windows msvcrt)
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+
+@contextmanager
+def file_lock(path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            import msvcrt
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:   # LK_LOCK은 ~10초 후 포기 → 다시 시도
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# 1-1. 네트워크 오류 판별 (오프라인 폴백 대상)
+def is_connection_error(e: BaseException) -> bool:
+    """연결 실패/타임아웃만 True. wandb CommError 처럼 감싼 예외는 원인(.exc/__cause__)까지 본다"""
+    types = [ConnectionError, TimeoutError, socket.timeout]
+    try:
+        import requests  # 임포트 지연 (실패 경로에서만)
+        types += [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    except ImportError:
+        pass
+    seen = set()
+    while isinstance(e, BaseException) and id(e) not in seen:
+        seen.add(id(e))
+        if isinstance(e, tuple(types)):
+            return True
+        e = getattr(e, "exc", None) or e.__cause__ or e.__context__
+    return False
+
+def _safe(digest: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", digest)
+
+# 2. 리졸버
+class ArtifactResolver:
+    def __init__(self, root: str = ARTIFACT_CACHE, backend=None, offline: Optional[bool] = None):
+        self.root = root
+        self.backend = backend
+        if offline is None:
+            offline = os.getenv("WANDB_MODE", "").lower() in ("offline", "disabled")
+        self.offline = offline
+        self.downloads = 0
+
+    # 2.1 경로
+    def object_dir(self, digest: str) -> str:
+        return f"{self.root}/objects/{_safe(digest)}"
+
+    def _lock_path(self, digest: str) -> str:
+        return f"{self.root}/locks/{_safe(digest)}.lock"
+
+    @property
+    def aliases_path(self) -> str:
+        return f"{self.root}/aliases.json"
+
+    # 2.2 별칭 맵
+    def aliases(self) -> Dict[str, Dict]:
+        try:
+            with open(self.aliases_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _record_alias(self, ref: str, resolved: Resolved) -> None:
+        entry = {"digest": resolved.digest, "name": resolved.name, "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with file_lock(f"{self.root}/locks/aliases.lock"):
+            data = self.aliases()
+            data[ref] = entry
+            if resolved.name:
+                data[resolved.name] = entry   # 확정 버전 이름으로도 오프라인 조회 가능
+            tmp = f"{self.aliases_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.aliases_path)
+
+    def lookup(self, ref: str) -> Optional[str]:
+        """별칭 맵으로 ref → 캐시 경로 (없거나 객체가 지워졌으면 None)"""
+        entry = self.aliases().get(ref)
+        if entry and os.path.isdir(self.object_dir(entry["digest"])):
+            return self.object_dir(entry["digest"])
+        return None
+
+    # 2.3 다이제스트 단위 확보: 있으면 재사용, 없으면 잠금 → 재확인 → tmp 다운로드 → rename
+    def ensure(self, resolved: Resolved, download: Optional[Callable[[str], None]] = None) -> str:
+        target = self.object_dir(resolved.digest)
+        if os.path.isdir(target):
+            return target
+        with file_lock(self._lock_path(resolved.digest)):
+            if os.path.isdir(target):        # 잠금 대기 중 다른 워커가 게시
+                return target
+            tmp = f"{self.root}/tmp/{_safe(resolved.digest)}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+            os.makedirs(tmp)
+            try:
+                (download or (lambda dest: self.backend.download(resolved, dest)))(tmp)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.rename(tmp, target)
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            self.downloads += 1
+        return target
+
+    # 2.4 ref → 로컬 디렉터리
+    def fetch(self, ref: str, type: Optional[str] = None) -> str:
+        if not self.offline and self.backend is not None:
+            try:
+                resolved = self.backend.resolve(ref, type)
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                cached = self.lookup(ref)
+                if cached is None:
+                    raise ArtifactCacheError(f"cannot resolve {ref} and no cached alias: {e}") from e
+                print(f"[ARTIFACT] resolve failed ({e.__class__.__name__}); using cached alias for {ref}")
+                return cached
+            path = self.ensure(resolved)
+            self._record_alias(ref, resolved)
+            return path
+        cached = self.lookup(ref)
+        if cached is None:
+            raise ArtifactCacheError(f"offline and {ref} is not in {self.aliases_path}")
+        return cached
+
+# 3. W&B 백엔드
+class WandbBackend:
+    """run_factory 가 있으면 run.use_artifact (계보 기록), 없으면 wandb.Api().artifact (run 생성 없음)"""
+    def __init__(self, run_factory: Optional[Callable[[], object]] = None):
+        self._run_factory = run_factory
+        self._run = None
+        self._api = None
+
+    @staticmethod
+    def from_artifact(art) -> Resolved:
+        name = getattr(art, "qualified_name", None) or f"{art.entity}/{art.project}/{art.name}"
+        return Resolved(digest=art.digest, name=name, handle=art)
+
+    def resolve(self, ref: str, type: Optional[str] = None) -> Resolved:
+        if self._run_factory is not None:
+            if self._run is None:
+                self._run = self._run_factory()
+            art = self._run.use_artifact(ref, type=type)
+        else:
+            if self._api is None:
+                import wandb  # 임포트 지연
+                self._api = wandb.Api()
+            art = self._api.artifact(ref, type=type)
+        return self.from_artifact(art)
+
+    def download(self, resolved: Resolved, dest: str) -> None:
+        resolved.handle.download(root=dest)
+
+# 4. 캐시 디렉터리를 기존 위치에 노출 (심볼릭 링크, 안 되면 복사)
+LINK_MARKER = ".artifact_cache_copy"
+
+def link_into(src: str, dest: str, force: bool = False) -> str:
+    """dest 를 src 링크(또는 복사본)로 교체한다.
+    dest 가 이 함수가 만들지 않은 실제 디렉터리/파일이면 force 없이는 건드리지 않는다."""
+    if os.path.lexists(dest) and not os.path.islink(dest) and not force:
+        if not (os.path.isdir(dest) and os.path.exists(os.path.join(dest, LINK_MARKER))):
+            raise ArtifactCacheError(f"{dest} already exists and was not created by link_into "
+                                     "(remove it or pass force)")
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    try:
+        os.symlink(os.path.abspath(src), tmp, target_is_directory=True)
+        if os.path.isdir(dest) and not os.path.islink(dest):
+            shutil.rmtree(dest)
+        os.replace(tmp, dest)
+    except OSError:
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        if os.path.islink(dest) or os.path.isfile(dest):
+            os.remove(dest)
+        elif os.path.isdir(dest):
+            shutil.rmtree(dest)
+        shutil.copytree(src, dest)
+        open(os.path.join(dest, LINK_MARKER), "w").close()
+    return dest
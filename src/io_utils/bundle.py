@@ -0,0 +1,215 @@
+"""
+bundle.py
+- Serving-optimized single-file model bundle (TF-IDF vocabulary + IDF + CSR matrix + ids).
+- Layout: MAGIC | u32 version | u64 header length | header JSON | 64B-aligned arrays.
+  Header holds metadata, the array table (dtype/shape/offset) and a sha256 of the payload.
+- Vocabulary is stored as a byte-sorted fixed-width UTF-8 array + column index, so it
+  can be binary-searched (np.searchsorted) without building a Python dict.
+- Optional "item_*" arrays carry per-row item metadata (src.serving.metadata) built
+  from the same frame as X.
+"""
+from __future__ import annotations
+import hashlib, json, os, struct
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+
+MAGIC = b"WRECOBND"
+VERSION = 1
+_ALIGN = 64
+_PREFIX = struct.Struct("<8sIQ")   # magic, version, header_len
+
+# 벡터라이저 재구성에 필요한 파라미터 (analyzer 기본값 기준)
+_VEC_PARAMS = ("lowercase", "token_pattern", "ngram_range", "analyzer", "min_df", "max_df",
+               "norm", "use_idf", "smooth_idf", "sublinear_tf", "binary", "strip_accents", "stop_words")
+
+class BundleError(ValueError):
+    pass
+
+def bundle_path(dirpath: str, style: str) -> str:
+    return f"{dirpath}/model_{style}.bundle"
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+def sorted_vocabulary(vocabulary: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    enc = sorted((t.encode("utf-8"), c) for t, c in vocabulary.items())
+    width = max((len(t) for t, _ in enc), default=1)
+    terms = np.array([t for t, _ in enc], dtype=f"S{width}")
+    cols = np.array([c for _, c in enc], dtype=np.int32)
+    return terms, cols
+
+def write_bundle(path: str, vec, X, ids, meta: Optional[Dict] = None,
+                 key_styles: Optional[np.ndarray] = None,
+                 item_arrays: Optional[Dict[str, np.ndarray]] = None) -> Dict:
+    params = vec.get_params()
+    if callable(params.get("analyzer")) or params.get("preprocessor") or params.get("tokenizer"):
+        raise BundleError("custom analyzer/preprocessor/tokenizer cannot be stored in a bundle")
+    if not params.get("use_idf", True):
+        raise BundleError("use_idf=False vectorizers cannot be stored in a bundle")
+    X = sparse.csr_matrix(X)
+    terms, cols = sorted_vocabulary(vec.vocabulary_)
+    arrays = {
+        "vocab_terms": terms,
+        "vocab_cols": cols,
+        "idf": np.asarray(vec.idf_, dtype=np.float64),
+        "X_data": X.data.astype(np.float64, copy=False),
+        "X_indices": X.indices.astype(np.int32, copy=False),
+        "X_indptr": X.indptr.astype(np.int64, copy=False),
+        "ids": np.asarray(ids, dtype=np.int64),
+    }
+    if key_styles is not None:
+        arrays["key_styles"] = np.asarray(key_styles, dtype=np.uint8)
+    for name, a in (item_arrays or {}).items():
+        if not name.startswith("item_"):
+            raise BundleError(f"item array names must start with 'item_': {name}")
+        arrays[name] = np.asarray(a)
+    table, chunks, offset = {}, [], 0
+    h = hashlib.sha256()
+    for name, arr in arrays.items():
+        raw = np.ascontiguousarray(arr).tobytes()
+        table[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset, "nbytes": len(raw)}
+        blob = raw + b"\0" * _pad(len(raw))
+        chunks.append(blob)
+        h.update(blob)
+        offset += len(blob)
+    header = {
+        "version": VERSION,
+        "meta": {**(meta or {}), "rows": int(X.shape[0]), "dims": int(X.shape[1]),
+                 "vectorizer": {k: params[k] for k in _VEC_PARAMS if k in params}},
+        "arrays": table,
+        "sha256": h.hexdigest(),
+    }
+    hjson = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    hjson += b" " * _pad(_PREFIX.size + len(hjson))
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(hjson)))
+        f.write(hjson)
+        for blob in chunks:
+            f.write(blob)
+    os.replace(tmp, path)
+    return header
+
+@dataclass
+class Bundle:
+    meta: Dict
+    X: "sparse.csr_matrix"
+    ids: np.ndarray
+    vocab_terms: np.ndarray
+    vocab_cols: np.ndarray
+    idf: np.ndarray
+    key_styles: Optional[np.ndarray] = None
+    item_arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+    checksum: str = ""
+    _vec: object = field(default=None, repr=False)
+
+    def vectorizer(self):
+        """sklearn TfidfVectorizer를 필요할 때만 재구성(vocabulary dict 생성)하고 캐시"""
+        if self._vec is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            params = dict(self.meta.get("vectorizer") or {})
+            if "ngram_range" in params:
+                params["ngram_range"] = tuple(params["ngram_range"])
+            vec = TfidfVectorizer(**params)
+            vec.vocabulary_ = {t.decode("utf-8"): int(c) for t, c in zip(self.vocab_terms.tolist(), self.vocab_cols.tolist())}
+            vec.idf_ = self.idf
+            self._vec = vec
+        return self._vec
+
+def read_bundle(path: str, verify: bool = True) -> Bundle:
+    with open(path, "rb") as f:
+        buf = f.read()
+    if len(buf) < _PREFIX.size:
+        raise BundleError(f"{path}: truncated bundle")
+    magic, version, hlen = _PREFIX.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise BundleError(f"{path}: not a model bundle")
+    if version != VERSION:
+        raise BundleError(f"{path}: unsupported bundle version {version}")
+    header = json.loads(buf[_PREFIX.size:_PREFIX.size + hlen])
+    payload = memoryview(buf)[_PREFIX.size + hlen:]
+    if verify and hashlib.sha256(payload).hexdigest() != header["sha256"]:
+        raise BundleError(f"{path}: checksum mismatch")
+    arr = {}
+    for name, t in header["arrays"].items():
+        a = np.frombuffer(payload, dtype=np.dtype(t["dtype"]), count=int(np.prod(t["shape"])),
+                          offset=t["offset"])
+        arr[name] = a.reshape(t["shape"])
+    meta = header["meta"]
+    X = sparse.csr_matrix((arr["X_data"], arr["X_indices"], arr["X_indptr"]),
+                          shape=(meta["rows"], meta["dims"]), copy=False)
+    return Bundle(meta=meta, X=X, ids=arr["ids"], vocab_terms=arr["vocab_terms"],
+                  vocab_cols=arr["vocab_cols"], idf=arr["idf"], key_styles=arr.get("key_styles"),
+                  item_arrays={k: v for k, v in arr.items() if k.startswith("item_")},
+                  checksum=header["sha256"])
+
+def artifact_digest(dirpath: str, style: str) -> str:
+    """아티팩트 버전 식별자(12 hex): 번들은 헤더의 payload sha256, 없으면 기존 파일들의 sha256"""
+    bpath = bundle_path(dirpath, style)
+    if os.path.exists(bpath):
+        with open(bpath, "rb") as f:
+            magic, _, hlen = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise BundleError(f"{bpath}: not a model bundle")
+            return json.loads(f.read(hlen))["sha256"][:12]
+    h = hashlib.sha256()
+    names = ["tfidf", "X", "keys" if style == "all" else "ids"]
+    for name, ext in zip(names, ("pkl", "npz", "json")):
+        with open(f"{dirpath}/{name}_{style}.{ext}", "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:12]
+
+def load_legacy_files(dirpath: str, style: str, ids_name: str = "ids"):
+    from joblib import load
+    vec = load(f"{dirpath}/tfidf_{style}.pkl")
+    X = sparse.load_npz(f"{dirpath}/X_{style}.npz")
+    with open(f"{dirpath}/{ids_name}_{style}.json", "r", encoding="utf-8") as f:
+        ids = json.load(f)
+    return vec, X, ids
+
+def load_style_model(dirpath: str, style: str) -> Tuple[object, "sparse.csr_matrix", List[int]]:
+    """번들이 있으면 번들, 없으면 기존 3종(pkl/npz/json)에서 (vec, X, ids) 로드"""
+    bpath = bundle_path(dirpath, style)
+    if os.path.exists(bpath):
+        b = read_bundle(bpath)
+        return b.vectorizer(), b.X, b.ids.tolist()
+    return load_legacy_files(dirpath, style, "ids")
+
+def load_all_model(dirpath: str) -> Tuple[object, "sparse.csr_matrix", List[Dict], List[str]]:
+    """all 모드: (vec, X, keys[{style,id}], styles) — 번들은 key_styles(스타일 코드)로 keys 복원"""
+    bpath = bundle_path(dirpath, "all")
+    if os.path.exists(bpath):
+        b = read_bundle(bpath)
+        styles = list(b.meta["styles"])
+        keys = [{"style": styles[c], "id": i} for c, i in zip(b.key_styles.tolist(), b.ids.tolist())]
+        return b.vectorizer(), b.X, keys, styles
+    vec, X, keys = load_legacy_files(dirpath, "all", "keys")
+    with open(f"{dirpath}/meta_all.json", "r", encoding="utf-8") as f:
+        styles = json.load(f)["styles"]
+    return vec, X, keys, styles
+
+def bundle_from_files(dirpath: str, style: str) -> str:
+    """기존 3종 아티팩트를 번들로 변환 (style='all'이면 keys_all/meta_all 사용)"""
+    if style == "all":
+        vec, X, keys, styles = load_all_model(dirpath)
+        code = {s: i for i, s in enumerate(styles)}
+        meta = {"style": "all", "styles": styles}
+        ids, key_styles = [k["id"] for k in keys], [code[k["style"]] for k in keys]
+    else:
+        vec, X, ids = load_legacy_files(dirpath, style, "ids")
+        meta, key_styles = {"style": style}, None
+    path = bundle_path(dirpath, style)
+    write_bundle(path, vec, X, ids, meta=meta, key_styles=key_styles)
+    return path
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Convert pkl/npz/json artifacts into a model bundle")
+    ap.add_argument("--dir", default="artifacts")
+    ap.add_argument("--styles", default="reds")
+    args = ap.parse_args()
+    for s in [x.strip() for x in args.styles.split(",") if x.strip()]:
+        print(f"[BUNDLE] {bundle_from_files(args.dir, s)}")
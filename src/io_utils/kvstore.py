@@ -0,0 +1,144 @@
+"""
+kvstore.py
+- Compact read-only on-disk key-value store (string key → bytes value), read through mmap.
+- Layout: MAGIC | u64 header length | header JSON | slot table | records.
+  Slot table = open addressing (linear probing, load ≤ 0.7) of (u64 key hash,
+  u64 record offset + 1, u32 record length); record = u32 key length | key | value.
+  A lookup hashes the key, probes a few slots and slices the mmap: O(1), no parsing
+  of other entries.
+- Versioned publishing: {dir}/{name}-{version}.kv + {dir}/{name}.current (file name
+  of the live store, replaced atomically), so readers never see a half-written store.
+  A reader remembers the (inode, size, mtime) it opened; is_current() also catches a
+  store rewritten in place under the same version.
+"""
+from __future__ import annotations
+import hashlib, json, mmap, os, struct
+from typing import Dict, Iterable, Optional, Tuple
+
+MAGIC = b"WRECOKV1"
+_PREFIX = struct.Struct("<8sQ")    # magic, header_len
+_SLOT = struct.Struct("<QQI4x")    # key hash, offset + 1 (0 = 빈 슬롯), record length
+_KLEN = struct.Struct("<I")
+_MAX_LOAD = 0.7
+
+def key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _n_slots(n: int) -> int:
+    size = 8
+    while size * _MAX_LOAD < n:
+        size *= 2
+    return size
+
+def write_kv(path: str, items: Iterable[Tuple[str, bytes]], meta: Optional[Dict] = None) -> Dict:
+    """items를 한 번에 써서 원자적으로 교체. 같은 키가 반복되면 마지막 값이 남는다."""
+    records: Dict[str, bytes] = {}
+    for key, value in items:
+        records[key] = value
+    n_slots = _n_slots(len(records))
+    slots = bytearray(n_slots * _SLOT.size)
+    blob = bytearray()
+    for key, value in records.items():
+        kb = key.encode("utf-8")
+        h = key_hash(key)
+        i = h & (n_slots - 1)
+        while _SLOT.unpack_from(slots, i * _SLOT.size)[1]:
+            i = (i + 1) & (n_slots - 1)
+        rec = _KLEN.pack(len(kb)) + kb + value
+        _SLOT.pack_into(slots, i * _SLOT.size, h, len(blob) + 1, len(rec))
+        blob += rec
+    header = {"count": len(records), "slots": n_slots, "meta": meta or {}}
+    hjson = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(hjson)))
+        f.write(hjson)
+        f.write(slots)
+        f.write(blob)
+    os.replace(tmp, path)
+    return header
+
+class KVReader:
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        st = os.fstat(self._f.fileno())
+        self.stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, hlen = _PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a kv store")
+        header = json.loads(self._mm[_PREFIX.size:_PREFIX.size + hlen])
+        self.meta: Dict = header["meta"]
+        self.count: int = header["count"]
+        self._n_slots: int = header["slots"]
+        self._slots_at = _PREFIX.size + hlen
+        self._blob_at = self._slots_at + self._n_slots * _SLOT.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, key: str) -> Optional[bytes]:
+        kb = key.encode("utf-8")
+        h = key_hash(key)
+        i = h & (self._n_slots - 1)
+        while True:
+            sh, off, length = _SLOT.unpack_from(self._mm, self._slots_at + i * _SLOT.size)
+            if not off:
+                return None
+            if sh == h:
+                start = self._blob_at + off - 1
+                (klen,) = _KLEN.unpack_from(self._mm, start)
+                if self._mm[start + 4:start + 4 + klen] == kb:
+                    return self._mm[start + 4 + klen:start + length]
+            i = (i + 1) & (self._n_slots - 1)
+
+    def is_current(self, path: str) -> bool:
+        """path 가 지금 열린 그 파일인지 (포인터 변경 / 같은 이름으로 다시 쓴 경우 False)"""
+        if path != self.path:
+            return False
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return (st.st_ino, st.st_size, st.st_mtime_ns) == self.stamp
+
+    def close(self) -> None:
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+    def __enter__(self) -> "KVReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+# ---------------------------------------------------------------------------
+# Versioned publishing
+# ---------------------------------------------------------------------------
+def store_path(dirpath: str, name: str, version: str) -> str:
+    return f"{dirpath}/{name}-{version}.kv"
+
+def pointer_path(dirpath: str, name: str) -> str:
+    return f"{dirpath}/{name}.current"
+
+def publish(dirpath: str, name: str, version: str, items: Iterable[Tuple[str, bytes]],
+            meta: Optional[Dict] = None) -> str:
+    os.makedirs(dirpath, exist_ok=True)
+    path = store_path(dirpath, name, version)
+    write_kv(path, items, meta={**(meta or {}), "name": name, "version": version})
+    tmp = f"{pointer_path(dirpath, name)}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(path))
+    os.replace(tmp, pointer_path(dirpath, name))
+    return path
+
+def current_path(dirpath: str, name: str) -> Optional[str]:
+    try:
+        with open(pointer_path(dirpath, name), "r", encoding="utf-8") as f:
+            return f"{dirpath}/{f.read().strip()}"
+    except FileNotFoundError:
+        return None
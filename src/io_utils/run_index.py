@@ -0,0 +1,209 @@
+"""
+run_index.py
+- Local W&B run-metadata index (JSON) so best-run selection does not walk the API.
+- sync_api(): incremental — only runs created since the last sync (plus runs that were
+  still running then) are fetched; each run's numeric summary is cached.
+- fill_history(): runs whose summary lacks a metric fall back to scan_history in a
+  bounded thread pool; the result (even "not found") is cached per metric.
+- sync_offline(): builds entries from on-disk wandb/run-*/files/wandb-summary.json
+  (no network).
+"""
+from __future__ import annotations
+import glob, json, os
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RUN_INDEX = ".cache/run_index.json"
+INDEX_VERSION = 1
+
+def _is_num(x) -> bool:
+    if isinstance(x, bool):
+        return False
+    try:
+        float(x)
+        return True
+    except Exception:
+        return False
+
+# 1. summary 파싱 (dict/HTTPSummary/str(JSON) 등 어떤 형태든 매핑으로)
+def summary_dict(run) -> Dict:
+    try:
+        s = run.summary
+        if isinstance(s, Mapping):
+            raw = getattr(s, "_json_dict", None)
+            if isinstance(raw, str):
+                try:
+                    raw = json.loads(raw)
+                except Exception:
+                    raw = None
+            if isinstance(raw, Mapping):
+                return dict(raw)
+            return dict(s)
+        raw = getattr(s, "_json_dict", None)
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        if isinstance(raw, Mapping):
+            return dict(raw)
+        if isinstance(s, str):
+            parsed = json.loads(s)
+            if isinstance(parsed, Mapping):
+                return dict(parsed)
+    except Exception:
+        pass
+    return {}
+
+def numeric_metrics(summary: Mapping) -> Dict[str, float]:
+    """숫자 값만 (이미지/테이블 등 중첩 객체, 내부 키 '_*' 제외)"""
+    return {k: float(v) for k, v in summary.items() if not k.startswith("_") and _is_num(v)}
+
+def last_history_value(run, metric: str) -> Optional[float]:
+    """history 스캔해서 해당 metric의 '마지막 값'을 반환"""
+    try:
+        last_val = None
+        for row in run.scan_history(keys=[metric]):
+            v = row.get(metric)
+            if _is_num(v):
+                last_val = float(v)
+        return last_val
+    except Exception:
+        return None
+
+# 2. 인덱스 입출력
+def empty_index() -> Dict:
+    return {"version": INDEX_VERSION, "synced_at": {}, "runs": {}}
+
+def load_index(path: str = RUN_INDEX, refresh: bool = False) -> Dict:
+    """refresh=True 면 파일을 읽지 않고 빈 인덱스 (전체 재동기화)"""
+    if refresh:
+        return empty_index()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return empty_index()
+
+def save_index(index: Dict, path: str = RUN_INDEX) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def _entry(run, project: str, source: str) -> Dict:
+    return {
+        "id": run.id,
+        "name": getattr(run, "name", run.id),
+        "state": getattr(run, "state", None),
+        "created_at": str(getattr(run, "created_at", "") or ""),
+        "url": getattr(run, "url", ""),
+        "project": project,
+        "source": source,
+        "metrics": numeric_metrics(summary_dict(run)),
+        "history": {},
+    }
+
+# 3. API 증분 동기화
+def sync_api(index: Dict, api, path: str) -> List[Tuple[str, object]]:
+    """path='entity/project'. 새로/다시 가져온 (key, run) 목록을 돌려준다(히스토리 폴백용)."""
+    since = index["synced_at"].get(path)
+    filters = {"created_at": {"$gte": since}} if since else None
+    fetched: List[Tuple[str, object]] = []
+    latest = since or ""
+    runs = api.runs(path, filters=filters, order="+created_at") if filters else api.runs(path, order="+created_at")
+    for run in runs:
+        key = f"{path}/{run.id}"
+        prev = index["runs"].get(key)
+        index["runs"][key] = _entry(run, path, "api")
+        # 경계($gte)에서 다시 받은 종료된 run은 history 캐시를 유지
+        if prev and prev.get("state") != "running":
+            index["runs"][key]["history"] = prev["history"]
+        fetched.append((key, run))
+        latest = max(latest, index["runs"][key]["created_at"])
+    # 지난 동기화 때 실행 중이던 run은 상태/summary가 바뀌었을 수 있으므로 다시 가져온다
+    seen = {k for k, _ in fetched}
+    for key, e in list(index["runs"].items()):
+        if e["source"] == "api" and e["project"] == path and e["state"] == "running" and key not in seen:
+            try:
+                run = api.run(key)
+            except Exception:
+                continue
+            index["runs"][key] = _entry(run, path, "api")
+            fetched.append((key, run))
+    if latest:
+        index["synced_at"][path] = latest
+    return fetched
+
+def fill_history(index: Dict, metric: str, runs: Iterable[Tuple[str, object]], workers: int = 8) -> int:
+    """summary에 metric이 없고 아직 스캔하지 않은 run만 스레드 풀에서 history 스캔. 스캔한 run 수 반환."""
+    todo = [(k, r) for k, r in runs
+            if k in index["runs"] and metric not in index["runs"][k]["metrics"]
+            and metric not in index["runs"][k]["history"]]
+    if not todo:
+        return 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        values = list(ex.map(lambda kr: last_history_value(kr[1], metric), todo))
+    for (key, _), v in zip(todo, values):
+        index["runs"][key]["history"][metric] = v
+    return len(todo)
+
+# 4. 오프라인 디렉터리(wandb/run-*, wandb/offline-run-*)에서 구축
+def sync_offline(index: Dict, wandb_dir: str = "wandb") -> int:
+    added = 0
+    for summary_path in sorted(glob.glob(f"{wandb_dir}/*run-*/files/wandb-summary.json")):
+        run_dir = os.path.dirname(os.path.dirname(summary_path))
+        run_id = os.path.basename(run_dir).rsplit("-", 1)[-1]
+        key = f"offline/{run_id}"
+        mtime = os.path.getmtime(summary_path)
+        if index["runs"].get(key, {}).get("mtime") == mtime:
+            continue
+        try:
+            with open(summary_path, "r", encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        meta = {}
+        meta_path = f"{run_dir}/files/wandb-metadata.json"
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        index["runs"][key] = {
+            "id": run_id,
+            "name": os.path.basename(run_dir),
+            # 요약 파일은 run 종료 시 기록된다 → 있으면 finished 로 본다
+            "state": "finished",
+            "created_at": meta.get("startedAt", ""),
+            "url": os.path.abspath(run_dir),
+            "project": "offline",
+            "source": "offline",
+            "program": meta.get("program", ""),
+            "metrics": numeric_metrics(summary),
+            "history": {},
+            "mtime": mtime,
+        }
+        added += 1
+    return added
+
+# 5. 최적 run 선택
+def metric_value(entry: Dict, metric: str) -> Optional[float]:
+    v = entry["metrics"].get(metric)
+    return v if v is not None else entry["history"].get(metric)
+
+def best_run(index: Dict, metric: str, maximize: bool = False, state: str = "finished",
+             projects: Optional[Iterable[str]] = None) -> Tuple[Optional[Dict], Optional[float]]:
+    projects = set(projects) if projects is not None else None
+    best, best_val = None, None
+    for e in index["runs"].values():
+        if projects is not None and e["project"] not in projects:
+            continue
+        if state != "all" and e.get("state") != state:
+            continue
+        v = metric_value(e, metric)
+        if v is None:
+            continue
+        if best_val is None or (maximize and v > best_val) or (not maximize and v < best_val):
+            best, best_val = e, v
+    return best, best_val
@@ -0,0 +1,77 @@
+"""
+shm.py
+- Share numpy arrays / string lists between processes (multiprocessing.shared_memory).
+- Parent: SharedArrays.create({...}) → .spec (small, picklable) → child: attach(spec).
+- Strings travel as one UTF-8 byte buffer + int64 offsets, so a worker pays one
+  decode instead of unpickling the corpus for every task.
+"""
+from __future__ import annotations
+from multiprocessing import shared_memory
+from typing import Dict, List, Union
+import numpy as np
+
+Payload = Union[np.ndarray, List[str]]
+_ATTACHED: List[shared_memory.SharedMemory] = []   # 워커에서 뷰가 살아있는 동안 유지
+
+def _new_block(arr: np.ndarray) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm
+
+def _attach_block(name: str) -> shared_memory.SharedMemory:
+    # 풀 워커는 부모의 resource_tracker를 공유하므로 unlink는 생성한 쪽(close)만 한다
+    shm = shared_memory.SharedMemory(name=name)
+    _ATTACHED.append(shm)
+    return shm
+
+class SharedArrays:
+    def __init__(self):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.spec: Dict[str, dict] = {}
+
+    def _put(self, arr: np.ndarray) -> dict:
+        arr = np.ascontiguousarray(arr)
+        shm = _new_block(arr)
+        self._blocks.append(shm)
+        return {"name": shm.name, "shape": arr.shape, "dtype": arr.dtype.str}
+
+    @classmethod
+    def create(cls, payload: Dict[str, Payload]) -> "SharedArrays":
+        self = cls()
+        for key, value in payload.items():
+            if isinstance(value, np.ndarray):
+                self.spec[key] = {"kind": "array", **self._put(value)}
+            else:
+                encoded = [s.encode("utf-8") for s in value]
+                offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                np.cumsum([len(b) for b in encoded], out=offsets[1:])
+                data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+                self.spec[key] = {"kind": "str", "data": self._put(data), "offsets": self._put(offsets)}
+        return self
+
+    def close(self) -> None:
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _view(entry: dict) -> np.ndarray:
+    shm = _attach_block(entry["name"])
+    return np.ndarray(tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]), buffer=shm.buf)
+
+def attach(spec: Dict[str, dict]) -> Dict[str, Payload]:
+    out: Dict[str, Payload] = {}
+    for key, entry in spec.items():
+        if entry["kind"] == "array":
+            out[key] = _view(entry)
+        else:
+            data, offsets = _view(entry["data"]), _view(entry["offsets"])
+            raw = data.tobytes()
+            out[key] = [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+    return out
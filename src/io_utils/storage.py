@@ -2,12 +2,21 @@
 storage.py
 - Snapshot utilities: timestamped folder, JSON+CSV dump.
 - Snapshot = "data git tag" for reproducibility/audit/drift.
+- Stream mode: JsonArrayCounter counts top-level array records while bytes
+  are written, so a style list never has to be parsed in memory.
+- Delta mode: records are content-addressed (sha256) under data/objects and a
+  snapshot only keeps added/changed/removed ids relative to its parent. When the
+  fetched list is not the id index order (reordered, duplicate ids), the manifest also
+  keeps "order" (record hashes in fetch order), so reconstruct() returns exactly what
+  was fetched and validate's raw_total/duplicates_removed match a full snapshot.
 """
 from __future__ import annotations
-import datetime as dt, json, os
-from typing import List, Dict
+import datetime as dt, glob, hashlib, json, os, re, shutil
+from typing import List, Dict, Optional
 import pandas as pd
 
+OBJECTS_DIR = "data/objects"   # snapshots/* 밖에 둬야 validate._latest()가 잘못 집지 않는다
+
 def timestamp_dir(base: str = "data/snapshots") -> str:
     ts = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
     out = f"{base}/{ts}"
@@ -20,3 +29,222 @@ def save_snapshot(items: List[Dict], style: str, out_dir: str) -> None:
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(items, f, ensure_ascii=False, indent=2)
     pd.json_normalize(items).to_csv(csv_path, index=False)
+
+
+# ---------------------------------------------------------------------------
+# Streaming (bytes → file) helpers
+# ---------------------------------------------------------------------------
+_STRUCT = re.compile(rb'[\\"\[\]{},]')
+
+class JsonArrayCounter:
+    """최상위 JSON 배열의 원소 수를 청크 단위로 센다(파싱/리스트 생성 없음)."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False        # 직전 청크가 '\'로 끝난 경우
+        self.first_pending = False # '[' 직후 첫 원소 존재 여부 확인 대기
+        self.commas = 0
+        self.nonempty = False
+
+    @property
+    def count(self) -> int:
+        return self.commas + 1 if self.nonempty else 0
+
+    def _check_first(self, chunk: bytes, pos: int) -> None:
+        rest = chunk[pos:].lstrip()
+        if rest:
+            self.first_pending = False
+            self.nonempty = rest[:1] != b"]"
+
+    def feed(self, chunk: bytes) -> None:
+        skip = 0 if self.escape else -1
+        self.escape = False
+        if self.first_pending and not self.in_string:
+            self._check_first(chunk, 0)
+        for m in _STRUCT.finditer(chunk):
+            pos, c = m.start(), chunk[m.start()]
+            if pos == skip:
+                continue
+            if self.in_string:
+                if c == 0x5C:                      # '\\' → 다음 바이트 건너뜀
+                    if pos + 1 == len(chunk):
+                        self.escape = True
+                    skip = pos + 1
+                elif c == 0x22:                    # '"'
+                    self.in_string = False
+                continue
+            if c == 0x22:
+                self.in_string = True
+            elif c in (0x5B, 0x7B):                # '[' '{'
+                self.depth += 1
+                if self.depth == 1 and c == 0x5B:
+                    self.first_pending = True
+                    self._check_first(chunk, pos + 1)
+            elif c in (0x5D, 0x7D):                # ']' '}'
+                self.depth -= 1
+            elif c == 0x2C and self.depth == 1:    # ','
+                self.commas += 1
+
+def stream_to_file(chunks, path: str) -> Dict[str, int | str]:
+    """바이트 청크를 path로 원자적으로 쓰면서 sha256/바이트 수/레코드 수를 계산한다."""
+    h, counter, size = hashlib.sha256(), JsonArrayCounter(), 0
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            f.write(chunk)
+            h.update(chunk)
+            counter.feed(chunk)
+            size += len(chunk)
+    os.replace(tmp, path)
+    return {"sha256": h.hexdigest(), "bytes": size, "count": counter.count}
+
+# ---------------------------------------------------------------------------
+# Delta (content-addressed) snapshots
+# ---------------------------------------------------------------------------
+def record_hash(rec: Dict) -> str:
+    blob = json.dumps(rec, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _object_path(h: str, objects_dir: str) -> str:
+    return f"{objects_dir}/{h[:2]}/{h}.json"
+
+def put_object(rec: Dict, objects_dir: str = OBJECTS_DIR) -> str:
+    h = record_hash(rec)
+    path = _object_path(h, objects_dir)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(rec, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    return h
+
+def get_object(h: str, objects_dir: str = OBJECTS_DIR) -> Dict:
+    with open(_object_path(h, objects_dir), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def delta_path(out_dir: str, style: str) -> str:
+    return f"{out_dir}/wines_{style}.delta.json"
+
+def has_style(snap_dir: str, style: str) -> bool:
+    return os.path.exists(delta_path(snap_dir, style)) or os.path.exists(f"{snap_dir}/wines_{style}.json")
+
+def previous_snapshot(style: str, before: Optional[str] = None, base: str = "data/snapshots") -> Optional[str]:
+    dirs = sorted(d for d in glob.glob(f"{base}/*") if os.path.isdir(d))
+    if before is not None:
+        dirs = [d for d in dirs if os.path.normpath(d) < os.path.normpath(before)]
+    for d in reversed(dirs):
+        if has_style(d, style):
+            return d
+    return None
+
+def _ids_in_order(items: List[Dict]) -> Dict[int, Dict]:
+    # id 중복 시 마지막 레코드가 이긴다 (validate.drop_duplicates(keep="last")와 동일)
+    out: Dict[int, Dict] = {}
+    for rec in items:
+        out[int(rec["id"])] = rec
+    return out
+
+def load_index(snap_dir: str, style: str) -> Dict[int, str]:
+    """id → record hash (순서 = reconstruct 순서)"""
+    dpath = delta_path(snap_dir, style)
+    if not os.path.exists(dpath):
+        with open(f"{snap_dir}/wines_{style}.json", "r", encoding="utf-8") as f:
+            return {i: record_hash(r) for i, r in _ids_in_order(json.load(f)).items()}
+    with open(dpath, "r", encoding="utf-8") as f:
+        delta = json.load(f)
+    index = load_index(delta["parent"], style) if delta.get("parent") else {}
+    for i in delta["removed"]:
+        index.pop(int(i), None)
+    for i, h in delta["changed"].items():
+        index[int(i)] = h
+    for i, h in delta["added"].items():
+        index[int(i)] = h
+    return index
+
+def diff_index(old: Dict[int, str], new: Dict[int, str]) -> Dict[str, List[int]]:
+    """두 id → hash 인덱스 비교: added / changed / removed id 목록"""
+    return {
+        "added":   [i for i in new if i not in old],
+        "changed": [i for i, h in new.items() if i in old and old[i] != h],
+        "removed": [i for i in old if i not in new],
+    }
+
+def save_delta_snapshot(items: List[Dict], style: str, out_dir: str,
+                        parent: Optional[str] = None, objects_dir: str = OBJECTS_DIR) -> Dict:
+    parent_index = load_index(parent, style) if parent else {}
+    added, changed = {}, {}
+    current = _ids_in_order(items)
+    for i, rec in current.items():
+        h = put_object(rec, objects_dir)
+        if i not in parent_index:
+            added[str(i)] = h
+        elif parent_index[i] != h:
+            changed[str(i)] = h
+    removed = [i for i in parent_index if i not in current]
+    delta = {
+        "style": style,
+        "parent": parent,
+        "count": len(current),
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+    }
+    # 수집 순서/중복이 id 인덱스 순서와 다르면 원래 순서를 그대로 남긴다 (앞선 중복 레코드도 저장)
+    index = {i: h for i, h in parent_index.items() if i in current}
+    index.update({int(i): h for i, h in changed.items()})
+    index.update({int(i): h for i, h in added.items()})
+    fetched = [record_hash(r) for r in items]
+    if fetched != list(index.values()):
+        for r in items:
+            put_object(r, objects_dir)
+        delta["order"] = fetched
+    with open(delta_path(out_dir, style), "w", encoding="utf-8") as f:
+        json.dump(delta, f, ensure_ascii=False, indent=2)
+    return delta
+
+def load_delta(snap_dir: str, style: str) -> Optional[Dict]:
+    """delta 모드 스냅샷이면 매니페스트(added/changed/removed), 아니면 None → 증분 임베딩용 변경 행 집합"""
+    dpath = delta_path(snap_dir, style)
+    if not os.path.exists(dpath):
+        return None
+    with open(dpath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def reconstruct(snap_dir: str, style: str, objects_dir: str = OBJECTS_DIR) -> List[Dict]:
+    if not os.path.exists(delta_path(snap_dir, style)):
+        with open(f"{snap_dir}/wines_{style}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    order = load_delta(snap_dir, style).get("order")
+    if order is None:
+        order = load_index(snap_dir, style).values()
+    return [get_object(h, objects_dir) for h in order]
+
+def carry_forward(style: str, out_dir: str, parent: str, delta: bool = False) -> int:
+    """변경 없는(HTTP 304) 스타일을 새 스냅샷 폴더로 이어 붙인다. 반환값은 레코드 수."""
+    if delta:
+        if not os.path.exists(delta_path(parent, style)):
+            # 전체 스냅샷 부모: 수집 순서/중복까지 그대로 이어지도록 일반 delta 경로 사용
+            with open(f"{parent}/wines_{style}.json", "r", encoding="utf-8") as f:
+                return save_delta_snapshot(json.load(f), style, out_dir, parent=parent)["count"]
+        manifest = {"style": style, "parent": parent, "count": len(load_index(parent, style)),
+                    "added": {}, "changed": {}, "removed": []}
+        order = load_delta(parent, style).get("order")
+        if order is not None:
+            manifest["order"] = order
+        with open(delta_path(out_dir, style), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest["count"]
+    src = f"{parent}/wines_{style}.json"
+    if not os.path.exists(src):
+        items = reconstruct(parent, style)
+        save_snapshot(items, style, out_dir)
+        return len(items)
+    shutil.copyfile(src, f"{out_dir}/wines_{style}.json")
+    if os.path.exists(f"{parent}/wines_{style}.csv"):
+        shutil.copyfile(f"{parent}/wines_{style}.csv", f"{out_dir}/wines_{style}.csv")
+    with open(src, "r", encoding="utf-8") as f:
+        return len(json.load(f))
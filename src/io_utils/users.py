@@ -0,0 +1,19 @@
+"""
+users.py
+- User profile loading: JSON array (configs/users.json) or JSON Lines (*.jsonl, one profile per line).
+"""
+from __future__ import annotations
+import json
+from typing import Dict, Iterator, List
+
+def iter_users(path: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+def load_users(path: str) -> List[Dict]:
+    return list(iter_users(path))
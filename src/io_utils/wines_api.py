@@ -2,16 +2,124 @@
 wines_api.py
 - HTTP client for SampleAPIs (Wines).
 - Responsibility: external I/O only (no ML logic).
+- StyleFetcher: one pooled session, bounded parallel fetch, exponential-backoff
+  retry, conditional requests (ETag / Last-Modified) so unchanged styles are skipped.
+- fetch_to_file: streams the body to disk in chunks (hash/count computed on the fly).
 """
 from __future__ import annotations
-from typing import List, Dict
+import json, os, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from src.io_utils.storage import stream_to_file
 
 API_BASE = "https://api.sampleapis.com/wines"
 HEADERS  = {"User-Agent": "mlops-cloud-project-mlops-6/0.1 (+team)"}
+RETRY_STATUS = {429, 500, 502, 503, 504}
 
 def fetch_style(style: str, timeout: int = 20) -> List[Dict]:
     url = f"{API_BASE}/{style}"
     resp = requests.get(url, headers=HEADERS, timeout=timeout)
     resp.raise_for_status()
     return resp.json()
+
+
+class StyleFetcher:
+    """fetch(style)는 변경 없음(304)이면 None, 아니면 레코드 리스트를 반환한다."""
+
+    def __init__(self, base: str = API_BASE, max_workers: int = 4, retries: int = 3,
+                 backoff: float = 0.5, timeout: int = 20, cache_path: Optional[str] = None):
+        self.base = base.rstrip("/")
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # url → {"etag": ..., "last_modified": ...}
+        self.validators: Dict[str, Dict[str, str]] = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.validators = json.load(f)
+
+    def url(self, style: str) -> str:
+        return f"{self.base}/{style}"
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        v = self.validators.get(url) or {}
+        h = {}
+        if v.get("etag"):
+            h["If-None-Match"] = v["etag"]
+        if v.get("last_modified"):
+            h["If-Modified-Since"] = v["last_modified"]
+        return h
+
+    def _remember(self, url: str, resp: requests.Response) -> None:
+        etag, lm = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if etag or lm:
+            self.validators[url] = {k: v for k, v in (("etag", etag), ("last_modified", lm)) if v}
+
+    def request(self, url: str, headers: Optional[Dict[str, str]] = None, stream: bool = False) -> requests.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                resp = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUS or attempt == self.retries:
+                    resp.raise_for_status()
+                    return resp
+                resp.close()
+            time.sleep(self.backoff * (2 ** attempt))
+        raise RuntimeError("unreachable")
+
+    def fetch(self, style: str, conditional: bool = True) -> Optional[List[Dict]]:
+        url = self.url(style)
+        resp = self.request(url, self._conditional_headers(url) if conditional else None)
+        if resp.status_code == 304:
+            return None
+        self._remember(url, resp)
+        return resp.json()
+
+    def fetch_all(self, styles: List[str], conditional: bool = True) -> Dict[str, Optional[List[Dict]]]:
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(styles)))) as ex:
+            results = ex.map(lambda s: self.fetch(s, conditional=conditional), styles)
+            return dict(zip(styles, results))
+
+    def fetch_to_file(self, style: str, path: str, conditional: bool = True,
+                      chunk_size: int = 1 << 16) -> Optional[Dict]:
+        """본문을 청크 단위로 path에 기록. 304면 None, 아니면 {sha256, bytes, count}."""
+        url = self.url(style)
+        resp = self.request(url, self._conditional_headers(url) if conditional else None, stream=True)
+        with resp:
+            if resp.status_code == 304:
+                return None
+            info = stream_to_file(resp.iter_content(chunk_size=chunk_size), path)
+        self._remember(url, resp)
+        return info
+
+    def fetch_all_to_dir(self, styles: List[str], out_dir: str,
+                         conditional: bool = True) -> Dict[str, Optional[Dict]]:
+        def one(s: str) -> Optional[Dict]:
+            return self.fetch_to_file(s, f"{out_dir}/wines_{s}.json", conditional=conditional)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(styles)))) as ex:
+            return dict(zip(styles, ex.map(one, styles)))
+
+    def save_validators(self) -> None:
+        """스냅샷이 디스크에 남은 뒤에 호출해야 다음 실행의 304가 안전하다."""
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.validators, f, indent=2)
+        os.replace(tmp, self.cache_path)
+
+    def close(self) -> None:
+        self.session.close()
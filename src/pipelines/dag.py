@@ -0,0 +1,292 @@
+"""
+dag.py
+- Pipeline runner: snapshot → validate[style] → embed_fit[style] → eval_report[style] /
+  reco_export[style], with users_generate after validate. Each stage is an ordinary
+  `python -m ...` run in its own process; stages whose dependencies are done run in
+  parallel (up to --jobs).
+- Stages declare inputs and outputs. fingerprint = sha256(command + code files + input file
+  contents). Code files = the -m module plus every src.* module it imports, transitively
+  (found by parsing imports, lazy in-function imports included), and their package __init__s. A stage is skipped when its fingerprint matches the last successful run and
+  its outputs still have the recorded hashes. State: .cache/dag_state.json (file hashes are
+  memoized by size/mtime, so unchanged large snapshots are not re-hashed).
+- validate writes the validated-frame cache (src.validate --cache); downstream stages run
+  with RECO_VALIDATED_CACHE=1 (Stage.env) and read it instead of revalidating the snapshot.
+- Inputs are resolved when a stage becomes ready, after upstream stages have written them.
+  Stage logs: .cache/dag_logs/<stage>.log. Per-stage wall time is printed at the end.
+
+Usage:
+  python -m src.pipelines.dag --styles reds,whites,sparkling
+  python -m src.pipelines.dag --styles reds --snapshot --jobs 4
+  python -m src.pipelines.dag --styles reds,whites --dry-run
+"""
+from __future__ import annotations
+
+# 1. 표준/로컬 임포트
+import argparse, ast, hashlib, json, os, subprocess, sys, time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+DAG_STATE = ".cache/dag_state.json"
+LOG_DIR = ".cache/dag_logs"
+LOCAL_PKG = "src"   # 지문에 넣을 로컬 임포트의 최상위 패키지
+
+# 2. 스테이지 선언
+@dataclass
+class Stage:
+    name: str
+    argv: List[str]                                  # python 다음 인자 (예: ["-m", "src.pipelines.embed_fit", ...])
+    deps: List[str] = field(default_factory=list)
+    inputs: Callable[[], List[str]] = lambda: []     # 준비 시점에 평가 (상류 출력 생성 후)
+    outputs: Callable[[], List[str]] = lambda: []
+    code: List[str] = field(default_factory=list)    # 지문에 추가할 모듈 (-m 모듈과 그 로컬 임포트는 자동)
+    volatile: bool = False                           # 항상 실행 (외부 API)
+    env: Dict[str, str] = field(default_factory=dict)  # 추가 환경 변수 (지문에 포함)
+
+    def modules(self) -> List[str]:
+        mods = list(self.code)
+        if "-m" in self.argv:
+            mods.insert(0, self.argv[self.argv.index("-m") + 1])
+        return mods
+
+def module_file(mod: str) -> Optional[str]:
+    base = mod.replace(".", "/")
+    for path in (base + ".py", base + "/__init__.py"):
+        if os.path.exists(path):
+            return path
+    return None
+
+# 3. 파일 해시 (크기/mtime 같으면 메모 재사용)
+def file_hash(path: str, memo: Dict[str, Dict]) -> str:
+    st = os.stat(path)
+    m = memo.get(path)
+    if m and m["size"] == st.st_size and m["mtime_ns"] == st.st_mtime_ns:
+        return m["sha256"]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    memo[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+    return memo[path]["sha256"]
+
+# 3.1 로컬 임포트 폐포 (파일 해시별로 파싱 결과 재사용)
+_IMPORTS: Dict[str, List[str]] = {}
+
+def local_imports(path: str, memo: Dict[str, Dict]) -> List[str]:
+    """파일이 임포트하는 LOCAL_PKG.* 모듈 이름 (함수 안의 지연 임포트 포함)"""
+    key = file_hash(path, memo)
+    if key not in _IMPORTS:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+        names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names += [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                # from pkg import name — name 이 하위 모듈일 수도 있다 (파일이 없으면 버려짐)
+                names += [node.module] + [f"{node.module}.{a.name}" for a in node.names]
+        _IMPORTS[key] = sorted({n for n in names if n.split(".")[0] == LOCAL_PKG})
+    return _IMPORTS[key]
+
+def code_closure(mods: List[str], memo: Dict[str, Dict]) -> Dict[str, str]:
+    """{모듈: 파일} — mods 와 그 전이적 로컬 임포트, 상위 패키지 __init__ 포함 (파일 있는 것만)"""
+    files: Dict[str, str] = {}
+    todo = list(mods)
+    while todo:
+        parts = todo.pop().split(".")
+        for i in range(1, len(parts) + 1):
+            mod = ".".join(parts[:i])
+            if mod in files or not (path := module_file(mod)):
+                continue
+            files[mod] = path
+            todo += local_imports(path, memo)
+    return files
+
+def fingerprint(stage: Stage, memo: Dict[str, Dict]) -> str:
+    code = {m: file_hash(p, memo) for m, p in code_closure(stage.modules(), memo).items()}
+    inputs = {p: file_hash(p, memo) for p in sorted(set(stage.inputs()))}   # 없으면 FileNotFoundError
+    blob = json.dumps({"argv": stage.argv, "code": code, "inputs": inputs, **({"env": stage.env} if stage.env else {})},
+                      sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def output_hashes(stage: Stage, memo: Dict[str, Dict]) -> Dict[str, str]:
+    return {p: file_hash(p, memo) for p in stage.outputs() if os.path.exists(p)}
+
+def load_state(path: str = DAG_STATE) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"stages": {}, "files": {}}
+
+def save_state(state: Dict, path: str = DAG_STATE) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def up_to_date(stage: Stage, fp: str, state: Dict) -> bool:
+    prev = state["stages"].get(stage.name)
+    if stage.volatile or not prev or prev.get("fingerprint") != fp:
+        return False
+    outs = output_hashes(stage, state["files"])
+    return len(outs) == len(stage.outputs()) and outs == prev.get("outputs", {})
+
+# 4. 실행기: 준비된 스테이지를 프로세스로 병렬 실행
+def run_dag(stages: List[Stage], jobs: int = 4, state_path: str = DAG_STATE, log_dir: str = LOG_DIR,
+            force: bool = False, dry_run: bool = False, poll_s: float = 0.05) -> List[Dict]:
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        missing = [d for d in s.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"{s.name}: unknown deps {missing}")
+    state = load_state(state_path)
+    os.makedirs(log_dir, exist_ok=True)
+    status: Dict[str, Dict] = {}
+    running: Dict[str, tuple] = {}
+    pending = [s.name for s in stages]
+    t_start = time.perf_counter()
+
+    def finish(name: str, st: str, seconds: float = 0.0, note: str = "") -> None:
+        status[name] = {"stage": name, "status": st, "seconds": round(seconds, 3), "note": note}
+        print(f"[DAG] {st:<8} {name:<24} {seconds:7.2f}s {note}".rstrip())
+
+    while pending or running:
+        before = (len(pending), len(running))
+        # 4.1 상류 실패 → 차단, 상류 완료 → 시작 (또는 건너뜀)
+        for name in list(pending):
+            stage = by_name[name]
+            dep_st = [status.get(d, {}).get("status") for d in stage.deps]
+            if any(x in ("failed", "blocked") for x in dep_st):
+                pending.remove(name)
+                finish(name, "blocked", note="upstream failed")
+                continue
+            if not all(x in ("ok", "skipped", "planned") for x in dep_st) or len(running) >= jobs:
+                continue
+            pending.remove(name)
+            if dry_run and "planned" in dep_st:
+                finish(name, "planned", note="after upstream")
+                continue
+            try:
+                fp = fingerprint(stage, state["files"])
+            except FileNotFoundError as e:
+                if dry_run:
+                    finish(name, "planned", note="inputs not built yet")
+                else:
+                    finish(name, "failed", note=f"missing input: {e.filename}")
+                continue
+            if not force and up_to_date(stage, fp, state):
+                finish(name, "skipped", note="inputs unchanged")
+                continue
+            if dry_run:
+                finish(name, "planned")
+                continue
+            log = open(f"{log_dir}/{name.replace(':', '_')}.log", "w", encoding="utf-8")
+            proc = subprocess.Popen([sys.executable, *stage.argv], stdout=log, stderr=subprocess.STDOUT,
+                                    env={**os.environ, **stage.env} if stage.env else None)
+            running[name] = (proc, time.perf_counter(), log, fp)
+
+        # 4.2 종료된 프로세스 수거
+        for name, (proc, t0, log, fp) in list(running.items()):
+            if proc.poll() is None:
+                continue
+            log.close()
+            del running[name]
+            dt = time.perf_counter() - t0
+            if proc.returncode == 0:
+                stage = by_name[name]
+                state["stages"][name] = {"fingerprint": fp, "outputs": output_hashes(stage, state["files"]),
+                                         "seconds": round(dt, 3), "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                save_state(state, state_path)
+                finish(name, "ok", dt)
+            else:
+                finish(name, "failed", dt, f"exit={proc.returncode} (log: {log.name})")
+        if running:
+            time.sleep(poll_s)
+        elif pending and before == (len(pending), 0):
+            raise ValueError(f"dependency cycle among {pending}")
+
+    wall = time.perf_counter() - t_start
+    results = [status[s.name] for s in stages]
+    busy = sum(r["seconds"] for r in results if r["status"] in ("ok", "failed"))
+    print(f"[DAG] wall={wall:.2f}s stage_sum={busy:.2f}s "
+          + " ".join(f"{k}={sum(r['status'] == k for r in results)}"
+                     for k in ("ok", "skipped", "failed", "blocked", "planned")))
+    return results
+
+# 5. 와인 파이프라인 그래프
+def pipeline_stages(styles: List[str], users: str = "configs/users.json", k: int = 5,
+                    users_n: int = 30, snapshot: bool = False, incremental: bool = False,
+                    outdir: str = "artifacts") -> List[Stage]:
+    from src.validate import CACHE_ENV, cache_path, source_file, _latest   # 임포트 지연 (pydantic/pandas)
+    from src.io_utils.bundle import bundle_path
+
+    def raw(s):
+        return lambda: [source_file(_latest(s), s)]
+
+    def validated(s):
+        return lambda: [p for p in [cache_path(s)] if p]
+
+    def reads_cache():
+        return {CACHE_ENV: "1"}   # 하류 단계: validate 가 쓴 검증 캐시를 읽는다
+
+    stages = []
+    snap_deps = []
+    if snapshot:
+        stages.append(Stage("snapshot", ["-m", "src.pipelines.snapshot", "--styles", ",".join(styles)],
+                            volatile=True))
+        snap_deps = ["snapshot"]
+    for s in styles:
+        stages.append(Stage(f"validate:{s}", ["-m", "src.validate", "--styles", s, "--cache"],
+                            deps=snap_deps, inputs=raw(s), outputs=validated(s)))
+        embed = ["-m", "src.pipelines.embed_fit", "--style", s, "--outdir", outdir]
+        stages.append(Stage(f"embed_fit:{s}", embed + (["--if-needed"] if incremental else []),
+                            deps=[f"validate:{s}"], inputs=raw(s), outputs=lambda s=s: [bundle_path(outdir, s)],
+                            env=reads_cache()))
+    stages.append(Stage("users_generate",
+                        ["-m", "src.pipelines.users_generate", "--n", str(users_n),
+                         "--styles", ",".join(styles), "--out", users],
+                        deps=[f"validate:{s}" for s in styles],
+                        inputs=lambda: [p for s in styles for p in raw(s)()], outputs=lambda: [users],
+                        env=reads_cache()))
+    for s in styles:
+        model = lambda s=s: [bundle_path(outdir, s), users, *raw(s)()]
+        deps = [f"embed_fit:{s}", "users_generate"]
+        stages.append(Stage(f"eval_report:{s}",
+                            ["-m", "src.pipelines.eval_report", "--style", s, "--users", users, "--k", str(k),
+                             "--artifacts", outdir],
+                            deps=deps, inputs=model, env=reads_cache()))
+        html = f"reports/reco_{s}.html"
+        stages.append(Stage(f"reco_export:{s}",
+                            ["-m", "src.pipelines.reco_export", "--style", s, "--users", users,
+                             "--k", str(k), "--out", html, "--artifacts", outdir],
+                            deps=deps, inputs=model, outputs=lambda html=html: [html], env=reads_cache()))
+    return stages
+
+# 6. 메인
+def main():
+    ap = argparse.ArgumentParser(description="Run the wine pipeline as a cached, parallel DAG")
+    ap.add_argument("--styles", default="reds,whites,sparkling,rose,port")
+    ap.add_argument("--users", default="configs/users.json")
+    ap.add_argument("--users-n", type=int, default=30)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--outdir", default="artifacts")
+    ap.add_argument("--snapshot", action="store_true", help="snapshot(외부 API) 단계 포함 — 항상 실행")
+    ap.add_argument("--incremental", action="store_true", help="embed_fit --if-needed (드리프트 판정)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="동시 실행 프로세스 수")
+    ap.add_argument("--force", action="store_true", help="지문과 무관하게 전부 실행")
+    ap.add_argument("--dry-run", action="store_true", help="실행/건너뜀 계획만 출력")
+    ap.add_argument("--state", default=DAG_STATE)
+    args = ap.parse_args()
+
+    styles = [s.strip() for s in args.styles.split(",") if s.strip()]
+    stages = pipeline_stages(styles, args.users, args.k, args.users_n, args.snapshot, args.incremental,
+                             args.outdir)
+    results = run_dag(stages, jobs=max(1, args.jobs), state_path=args.state, force=args.force,
+                      dry_run=args.dry_run)
+    if any(r["status"] in ("failed", "blocked") for r in results):
+        raise SystemExit(1)
+
+# 7. 엔트리
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+drift.py
+- Snapshot drift detector, run between snapshot and embed_fit. It compares the latest
+  snapshot with the one the stored model's vocabulary/IDF were fitted on and writes a
+  decision to {outdir}/drift_{style}.json, which `embed_fit --if-needed` honors:
+    skip        — no record changed since the model's rows were built
+    incremental — vocabulary/IDF still representative → re-embed changed rows only
+    refit       — fit TF-IDF from scratch
+- Cost ∝ changed records (plus one id/hash pass over the snapshot); nothing is re-tokenized
+  for unchanged rows:
+  · id churn: added/changed/removed ids vs the fit snapshot (record hashes)
+  · distinct terms: unigram HyperLogLog of changed rows merged with the sketch saved at fit
+    time → new distinct terms ≈ |A ∪ B| - |A|
+  · DF shift: DF recovered from the stored IDF, updated with changed rows → DF-weighted
+    mean |Δidf|
+  · country distribution: counts saved at fit time, updated with changed rows → JS divergence
+- Bundles written before this stage have no lineage (meta "fit_snapshot") → refit once.
+
+Usage:
+  python -m src.pipelines.drift --style reds
+  python -m src.pipelines.drift --style reds --max-churn 0.1 --max-idf-shift 0.02
+"""
+from __future__ import annotations
+
+# 1. 표준/로컬 임포트
+import argparse, json, os, re, time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.io_utils.bundle import bundle_path, read_bundle
+from src.io_utils.storage import (
+    delta_path, diff_index, get_object, load_index, previous_snapshot, record_hash, _ids_in_order,
+)
+from src.reco.corpus import item_text
+from src.reco.sketch import HyperLogLog
+
+THRESHOLDS = {"churn": 0.20, "new_terms": 0.05, "idf_shift": 0.05, "country_js": 0.01}
+SKETCH_P = 12
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+def decision_path(outdir: str, style: str) -> str:
+    return f"{outdir}/drift_{style}.json"
+
+# 2. 스냅샷 접근: id → hash 인덱스 + 필요한 id 의 레코드만 꺼내기
+def open_snapshot(snap_dir: str, style: str) -> Tuple[Dict[int, str], Callable[[Iterable[int]], List[Dict]]]:
+    if os.path.exists(delta_path(snap_dir, style)):
+        index = load_index(snap_dir, style)
+        return index, lambda ids: [get_object(index[i]) for i in ids]
+    with open(f"{snap_dir}/wines_{style}.json", "r", encoding="utf-8") as f:
+        items = _ids_in_order(json.load(f))
+    return {i: record_hash(r) for i, r in items.items()}, lambda ids: [items[i] for i in ids]
+
+def valid_rows(records: Iterable[Dict], style: str) -> List[Dict]:
+    """validate 와 같은 스키마 검사 (변경 행에만 적용) → country 포함 행"""
+    from src.validate import Wine, _country_from_location  # 임포트 지연 (pydantic)
+    from pydantic import ValidationError
+    out = []
+    for d in records:
+        try:
+            row = Wine(**{**d, "style": style}).model_dump()
+        except ValidationError:
+            continue
+        row["country"] = _country_from_location(row.get("location"))
+        out.append(row)
+    return out
+
+# 3. 통계 헬퍼
+def unigrams(texts: Iterable[str], token_pattern: str = DEFAULT_TOKEN_PATTERN) -> Iterable[str]:
+    pat = re.compile(token_pattern)
+    for t in texts:
+        yield from set(pat.findall(t))
+
+def term_sketch(texts: Iterable[str], token_pattern: str = DEFAULT_TOKEN_PATTERN) -> HyperLogLog:
+    hll = HyperLogLog(SKETCH_P)
+    hll.add(unigrams(texts, token_pattern))
+    return hll
+
+def country_counts(countries: Iterable[Optional[str]]) -> Dict[str, int]:
+    return dict(Counter(c or "" for c in countries))
+
+def fit_lineage(snap_dir: str, rows: int, countries: Iterable[Optional[str]], texts: Iterable[str],
+                token_pattern: str = DEFAULT_TOKEN_PATTERN) -> Dict:
+    """embed_fit(재학습) 때 번들 meta 에 남길 기준값 → 다음 드리프트 비교의 출발점"""
+    return {"snapshot": snap_dir, "fit_snapshot": snap_dir, "idf_rows": int(rows),
+            "countries": country_counts(countries),
+            "term_sketch": {"p": SKETCH_P, "registers": term_sketch(texts, token_pattern).to_b64()}}
+
+def js_divergence(p: Dict[str, float], q: Dict[str, float]) -> float:
+    keys = sorted(set(p) | set(q))
+    a = np.array([max(p.get(k, 0), 0) for k in keys], dtype=np.float64)
+    b = np.array([max(q.get(k, 0), 0) for k in keys], dtype=np.float64)
+    if a.sum() == 0 or b.sum() == 0:
+        return 0.0 if a.sum() == b.sum() else 1.0
+    a, b = a / a.sum(), b / b.sum()
+    m = (a + b) / 2
+    def kl(x):
+        nz = x > 0
+        return float(np.sum(x[nz] * np.log2(x[nz] / m[nz])))
+    return 0.5 * kl(a) + 0.5 * kl(b)
+
+def _idf(df: np.ndarray, n: int, smooth: bool) -> np.ndarray:
+    s = 1.0 if smooth else 0.0
+    return np.log((n + s) / (np.maximum(df, 0) + s)) + 1.0
+
+def df_from_idf(idf: np.ndarray, n: int, smooth: bool = True) -> np.ndarray:
+    s = 1.0 if smooth else 0.0
+    return np.rint((n + s) / np.exp(np.asarray(idf, dtype=np.float64) - 1.0) - s)
+
+# 4. 판정
+def compute(style: str = "reds", outdir: str = "artifacts", snap_dir: Optional[str] = None,
+            thresholds: Optional[Dict[str, float]] = None) -> Dict:
+    t0 = time.perf_counter()
+    th = {**THRESHOLDS, **(thresholds or {})}
+    snap_dir = snap_dir or previous_snapshot(style)
+    if snap_dir is None:
+        raise SystemExit(f"no snapshot for style={style}")
+    out = {"style": style, "snapshot": snap_dir, "thresholds": th, "stats": {}}
+
+    def decide(decision: str, reasons: List[str], baseline: Optional[str] = None) -> Dict:
+        out.update(decision=decision, reasons=reasons, baseline=baseline,
+                   seconds=round(time.perf_counter() - t0, 3),
+                   computed_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        return out
+
+    # 4.1 기준(모델 계보) 확인
+    bpath = bundle_path(outdir, style)
+    if not os.path.exists(bpath):
+        return decide("refit", [f"no model bundle at {bpath}"])
+    b = read_bundle(bpath)
+    meta = b.meta
+    out["model"] = b.checksum[:12]
+    fit_dir, rows_dir = meta.get("fit_snapshot"), meta.get("snapshot")
+    if not fit_dir or "idf_rows" not in meta:
+        return decide("refit", ["model has no snapshot lineage"])
+    if not os.path.isdir(fit_dir) or not (rows_dir and os.path.isdir(rows_dir)):
+        return decide("refit", [f"baseline snapshot missing ({fit_dir})"], fit_dir)
+    if os.path.normpath(rows_dir) == os.path.normpath(snap_dir):
+        return decide("skip", ["model already built from this snapshot"], fit_dir)
+
+    # 4.2 id 변동: 적합 기준 대비 (누적), 행 기준 대비 (skip 판정)
+    cur_index, cur_get = open_snapshot(snap_dir, style)
+    fit_index, fit_get = open_snapshot(fit_dir, style)
+    diff = diff_index(fit_index, cur_index)
+    if os.path.normpath(rows_dir) == os.path.normpath(fit_dir):
+        rows_diff = diff
+    else:
+        rows_diff = diff_index(open_snapshot(rows_dir, style)[0], cur_index)
+    n_changed = sum(len(v) for v in diff.values())
+    churn = n_changed / max(1, len(fit_index))
+    out["stats"]["ids"] = {"base": len(fit_index), "current": len(cur_index), "churn": round(churn, 4),
+                           **{k: len(v) for k, v in diff.items()}}
+    if not any(rows_diff.values()):
+        return decide("skip", ["no record changed since the model was built"], fit_dir)
+
+    # 4.3 변경 행만 검증/토큰화 (old = 적합 기준의 이전 버전, new = 현재 버전)
+    old = valid_rows(fit_get(diff["changed"] + diff["removed"]), style)
+    new = valid_rows(cur_get(diff["added"] + diff["changed"]), style)
+    old_text, new_text = [item_text(r) for r in old], [item_text(r) for r in new]
+
+    # 4.4 고유 어휘 (HLL): 적합 시점 스케치 ∪ 새 행 스케치
+    params = meta.get("vectorizer") or {}
+    pattern = params.get("token_pattern") or DEFAULT_TOKEN_PATTERN
+    sk = meta.get("term_sketch") or {}
+    base = HyperLogLog.from_b64(sk["registers"], sk.get("p", SKETCH_P)) if sk else HyperLogLog(SKETCH_P)
+    union = base.merge(term_sketch(new_text, pattern))
+    base_terms, union_terms = base.count(), union.count()
+    new_terms = max(0.0, union_terms - base_terms) / max(1.0, base_terms)
+    out["stats"]["terms"] = {"base_distinct_est": round(base_terms), "distinct_est": round(union_terms),
+                             "new_rate": round(new_terms, 4), "vocab": int(len(b.idf))}
+
+    # 4.5 DF 변화: 저장 IDF → DF, 변경 행으로 갱신 → DF 가중 평균 |Δidf|
+    smooth = bool(params.get("smooth_idf", True))
+    n0 = int(meta["idf_rows"])
+    base_df = df_from_idf(b.idf, n0, smooth)
+    vec = b.vectorizer()
+    V = len(b.idf)
+    delta = np.zeros(V)
+    for texts, sign in ((new_text, 1.0), (old_text, -1.0)):
+        if texts:
+            delta += sign * np.bincount(vec.transform(texts).indices, minlength=V)
+    n1 = n0 + len(new) - len(old)
+    new_idf = _idf(base_df + delta, max(n1, 1), smooth)
+    w = base_df.sum()
+    idf_shift = float(np.sum(base_df * np.abs(new_idf - b.idf)) / w) if w > 0 else 0.0
+    out["stats"]["df"] = {"rows": n1, "idf_shift": round(idf_shift, 5),
+                          "terms_changed": int(np.count_nonzero(delta))}
+
+    # 4.6 국가 분포
+    base_c = meta.get("countries") or {}
+    cur_c = Counter(base_c)
+    cur_c.update(country_counts(r["country"] for r in new))
+    cur_c.subtract(country_counts(r["country"] for r in old))
+    cur_c = {k: v for k, v in cur_c.items() if v > 0}
+    js = js_divergence(base_c, cur_c) if base_c else 0.0
+    out["stats"]["countries"] = {"js": round(js, 5),
+                                 "top": dict(sorted(cur_c.items(), key=lambda kv: -kv[1])[:10])}
+
+    # 4.7 판정
+    checks = [("churn", churn), ("new_terms", new_terms), ("idf_shift", idf_shift), ("country_js", js)]
+    reasons = [f"{k} {v:.4f} > {th[k]}" for k, v in checks if v > th[k]]
+    if reasons:
+        return decide("refit", reasons, fit_dir)
+    return decide("incremental", [f"{sum(len(v) for v in rows_diff.values())} rows changed, "
+                                  f"vocabulary/IDF within thresholds"], fit_dir)
+
+def write_decision(decision: Dict, outdir: str) -> str:
+    os.makedirs(outdir, exist_ok=True)
+    path = decision_path(outdir, decision["style"])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(decision, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+def run(style: str = "reds", outdir: str = "artifacts", thresholds: Optional[Dict[str, float]] = None) -> Dict:
+    d = compute(style, outdir, thresholds=thresholds)
+    path = write_decision(d, outdir)
+    print(f"[DRIFT] {style:<10} {d['decision']:<11} ({'; '.join(d['reasons'])}) "
+          f"{d['seconds']:.2f}s -> {path}")
+    return d
+
+# 5. 메인
+def main():
+    ap = argparse.ArgumentParser(description="Decide whether a new snapshot needs a TF-IDF refit")
+    ap.add_argument("--style", default="reds", help="콤마로 여러 개 가능")
+    ap.add_argument("--outdir", default="artifacts")
+    ap.add_argument("--max-churn", type=float, default=THRESHOLDS["churn"])
+    ap.add_argument("--max-new-terms", type=float, default=THRESHOLDS["new_terms"])
+    ap.add_argument("--max-idf-shift", type=float, default=THRESHOLDS["idf_shift"])
+    ap.add_argument("--max-country-js", type=float, default=THRESHOLDS["country_js"])
+    args = ap.parse_args()
+    th = {"churn": args.max_churn, "new_terms": args.max_new_terms,
+          "idf_shift": args.max_idf_shift, "country_js": args.max_country_js}
+    for s in [x.strip() for x in args.style.split(",") if x.strip()]:
+        run(s, args.outdir, th)
+
+# 6. 엔트리
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,119 @@
 """
 embed_fit.py
 - Validate → build corpus → fit TF-IDF → save artifacts + log to WandB
+- --if-needed: honor the drift decision (src.pipelines.drift; computed here if missing
+  or stale): skip → nothing to do, incremental → keep vocabulary/IDF and re-embed only
+  added/changed rows, refit → full fit.
+- The bundle meta records the snapshot lineage the next drift check compares against.
+- The bundle also carries the display metadata (wine/winery/country/rating/reviews/image)
+  of the same frame, so the API never joins the vectors to a different snapshot.
 """
 from __future__ import annotations
 import argparse, json, os, time
+import numpy as np
 from scipy import sparse
 from joblib import dump
-from src.validate import load_latest_frame
+from src.validate import load_latest_frame_with_stats
 from src.reco.corpus import build_corpus
 from src.reco.embed  import fit_tfidf
-import wandb
+from src.io_utils.bundle import bundle_path, read_bundle, write_bundle
+from src.io_utils.storage import diff_index
+from src.pipelines import drift
+from src.serving.metadata import ItemMetadata
 
+_LINEAGE = ("fit_snapshot", "idf_rows", "countries", "term_sketch")
 
-def run(style: str = "reds", outdir: str = "artifacts") -> None:
+def _decision(style: str, outdir: str) -> dict:
+    """저장된 드리프트 판정 (최신 스냅샷·현재 번들 기준이 아니면 다시 계산)"""
+    path, bpath = drift.decision_path(outdir, style), bundle_path(outdir, style)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            d = json.load(f)
+        fresh = (d.get("snapshot") == drift.previous_snapshot(style)
+                 and (not os.path.exists(bpath) or os.path.getmtime(path) >= os.path.getmtime(bpath)))
+    except (FileNotFoundError, json.JSONDecodeError):
+        d, fresh = None, False
+    if not fresh:
+        d = drift.compute(style, outdir)
+        drift.write_decision(d, outdir)
+    return d
+
+def _incremental(style: str, outdir: str, df, snap_dir: str):
+    """어휘/IDF 유지: 이전 번들 행을 재사용하고 추가·변경 행만 transform"""
+    b = read_bundle(bundle_path(outdir, style))
+    vec = b.vectorizer()
+    cur_index = drift.open_snapshot(snap_dir, style)[0]
+    diff = diff_index(drift.open_snapshot(b.meta["snapshot"], style)[0], cur_index)
+    dirty = set(diff["added"]) | set(diff["changed"])
+    old_row = {i: r for r, i in enumerate(b.ids.tolist())}
+    ids = df["id"].astype(int).tolist()
+    embed = [j for j, i in enumerate(ids) if i in dirty or i not in old_row]
+    keep = [j for j, i in enumerate(ids) if not (i in dirty or i not in old_row)]
+    parts = [b.X[[old_row[ids[j]] for j in keep]]]
+    if embed:
+        parts.append(vec.transform(build_corpus(df.iloc[embed])))
+    # 재사용 행 + 새 행 → 프레임 순서로 복원
+    X = sparse.vstack(parts).tocsr()[np.argsort(np.array(keep + embed, dtype=np.int64), kind="stable")]
+    lineage = {k: b.meta[k] for k in _LINEAGE if k in b.meta}
+    print(f"[EMBED] incremental: reused={len(keep)} embedded={len(embed)} removed={len(diff['removed'])}")
+    return vec, X, lineage
+
+
+def run(style: str = "reds", outdir: str = "artifacts", if_needed: bool = False) -> None:
     os.makedirs(outdir, exist_ok=True)
 
+    # 0. 드리프트 판정 (--if-needed)
+    mode = "refit"
+    if if_needed:
+        d = _decision(style, outdir)
+        mode = d["decision"]
+        print(f"[EMBED] drift decision={mode} ({'; '.join(d['reasons'])})")
+        if mode == "skip":
+            return
+
     # 1. 데이터 불러오기
-    df = load_latest_frame(style)
+    df, stats = load_latest_frame_with_stats(style)
     if df.empty:
         raise SystemExit("Empty frame after validation.")
+    snap_dir = os.path.dirname(stats["snapshot_path"])
 
-    # 2. 코퍼스 생성 및 TF-IDF 학습
-    corpus = build_corpus(df)
-    vec, X = fit_tfidf(corpus, ngram=(1, 2), min_df=2)
+    # 2. 코퍼스 생성 및 TF-IDF 학습 (증분이면 기존 어휘/IDF로 변경 행만 임베딩)
+    if mode == "incremental":
+        vec, X, lineage = _incremental(style, outdir, df, snap_dir)
+    else:
+        corpus = build_corpus(df)
+        vec, X = fit_tfidf(corpus, ngram=(1, 2), min_df=2)
+        lineage = drift.fit_lineage(snap_dir, X.shape[0], df.get("country", []), corpus)
+    lineage["snapshot"] = snap_dir
 
-    # 3. 로컬 저장
+    # 3. 로컬 저장 (기존 3종 + 서빙용 단일 번들)
+    ids = df["id"].astype(int).tolist()
     dump(vec, f"{outdir}/tfidf_{style}.pkl")
     sparse.save_npz(f"{outdir}/X_{style}.npz", X)
     with open(f"{outdir}/ids_{style}.json", "w", encoding="utf-8") as f:
-        json.dump(df["id"].astype(int).tolist(), f)
+        json.dump(ids, f)
     with open(f"{outdir}/meta_{style}.json", "w", encoding="utf-8") as f:
         json.dump(
-            {"style": style, "rows": int(X.shape[0]), "dims": int(X.shape[1])},
+            {"style": style, "rows": int(X.shape[0]), "dims": int(X.shape[1]), "mode": mode,
+             "snapshot": snap_dir},
             f,
             indent=2,
         )
 
-    print(f"[EMBED] saved to {outdir}/ (rows={X.shape[0]}, dims={X.shape[1]})")
+    write_bundle(bundle_path(outdir, style), vec, X, ids,
+                 meta={"style": style, "ngram": [1, 2], "min_df": 2, "mode": mode, **lineage},
+                 item_arrays=ItemMetadata.from_frame(df).to_arrays())
+
+    print(f"[EMBED] saved to {outdir}/ (mode={mode}, rows={X.shape[0]}, dims={X.shape[1]})")
 
-    # 4. ✅ WandB 로깅 + Artifact 업로드
+    # 4. ✅ WandB 로깅 + Artifact 업로드 (임포트 지연)
+    import wandb
     wandb.init(
         project="wine-reco",
         job_type="embed_fit",
         name=f"embed_{style}_{time.strftime('%Y%m%d-%H%M%S')}",
     )
-    wandb.config.update({"style": style, "ngram": (1, 2), "min_df": 2})
+    wandb.config.update({"style": style, "ngram": (1, 2), "min_df": 2, "mode": mode})
     wandb.log({"rows": X.shape[0], "dims": X.shape[1]})
 
     artifact = wandb.Artifact(
@@ -56,6 +125,7 @@ def run(style: str = "reds", outdir: str = "artifacts") -> None:
     artifact.add_file(f"{outdir}/X_{style}.npz")
     artifact.add_file(f"{outdir}/ids_{style}.json")
     artifact.add_file(f"{outdir}/meta_{style}.json")
+    artifact.add_file(bundle_path(outdir, style))
 
     wandb.log_artifact(artifact)
     wandb.finish()
@@ -65,5 +135,7 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--style", default="reds")
     ap.add_argument("--outdir", default="artifacts")
+    ap.add_argument("--if-needed", action="store_true",
+                    help="드리프트 판정(skip/incremental/refit)에 따라 실행")
     args = ap.parse_args()
-    run(args.style, args.outdir)
+    run(args.style, args.outdir, args.if_needed)
@@ -0,0 +1,238 @@
+"""
+loadtest.py
+- API 부하 테스트: src/app.py 를 프로세스 내(httpx ASGITransport) 또는 --url(localhost 서버)로 호출한다.
+- 부하 모델
+  · closed-loop: --concurrency 명의 가상 사용자가 응답을 받으면 바로 다음 요청 (처리량 상한 측정)
+  · open-loop: --rate 요청/초 포아송 도착 (응답과 무관하게 예정 시각에 발사).
+    지연은 '예정 시각'부터 잰다 → 서버가 밀리면 대기 시간까지 포함(coordinated omission 방지).
+- 요청 소스
+  · --replay requests.jsonl: 한 줄 = {"path": "/recommend", "params": {...}} 또는 {"query": ..., "style": ..., "k": ...}
+  · 기본: 카탈로그 어휘(번들/pkl)에서 문서 빈도 가중으로 질의 합성, --users 가 있으면 일부를 사용자 조회로 섞는다.
+- 결과: 엔드포인트별 요청 수/오류율/처리량/p50·p95·p99 지연(ms)을 JSON으로 저장 → 빌드 간 비교용.
+
+Usage:
+  python -m src.pipelines.loadtest --artifacts artifacts --style reds --concurrency 16 --n 2000 --out reports/loadtest.json
+  python -m src.pipelines.loadtest --url http://127.0.0.1:8000 --rate 200 --duration 30 --replay requests.jsonl
+"""
+from __future__ import annotations
+
+# 1. 표준/외부 모듈
+import argparse, asyncio, json, os, time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# 2. 로컬 모듈
+from src.io_utils.bundle import bundle_path, read_bundle, load_legacy_files
+from src.io_utils.users import load_users
+
+USER_PATH = "/users/{user_id}/recommendations"
+
+# 3. 요청 소스
+def _endpoint(path: str) -> str:
+    """집계 키: /users/<id>/recommendations 는 하나의 엔드포인트로 묶는다"""
+    if path.startswith("/users/") and path.endswith("/recommendations"):
+        return USER_PATH
+    return path
+
+def load_requests(path: str, style: str = "reds", k: int = 5) -> List[Dict]:
+    """JSONL 재생 파일 → [{path, params}]. path/query 가 없는 줄은 건너뛴다."""
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if "path" in rec:
+                out.append({"path": rec["path"], "params": dict(rec.get("params") or {})})
+            elif "query" in rec:
+                out.append({"path": "/recommend", "params": {"style": rec.get("style", style),
+                                                             "query": rec["query"], "k": rec.get("k", k)}})
+    return out
+
+def vocabulary_terms(dirpath: str, style: str) -> Tuple[List[str], np.ndarray]:
+    """(단일어 용어, idf) — 번들이 있으면 번들(사전 생성 없음), 없으면 pkl 벡터라이저"""
+    bpath = bundle_path(dirpath, style)
+    if os.path.exists(bpath):
+        b = read_bundle(bpath)
+        terms = [t.decode("utf-8") for t in b.vocab_terms.tolist()]
+        idf = b.idf[b.vocab_cols]
+    else:
+        vec = load_legacy_files(dirpath, style)[0]
+        terms = vec.get_feature_names_out().tolist()
+        idf = vec.idf_
+    uni = [i for i, t in enumerate(terms) if " " not in t]
+    return [terms[i] for i in uni], np.asarray(idf, dtype=float)[uni]
+
+def synth_requests(terms: List[str], idf: np.ndarray, n: int, style: str = "reds", k: int = 5,
+                   max_terms: int = 3, user_ids: Optional[List[str]] = None, user_ratio: float = 0.0,
+                   seed: int = 0) -> List[Dict]:
+    """질의 = 용어 1~max_terms 개. smooth idf 기준 exp(-idf) ∝ (문서 빈도 + 1) → 흔한 용어가 자주 나온다."""
+    rng = np.random.default_rng(seed)
+    p = np.exp(-(idf - idf.min()))
+    p /= p.sum()
+    sizes = rng.integers(1, max_terms + 1, size=n)
+    picks = rng.choice(len(terms), size=int(sizes.sum()), p=p)
+    is_user = rng.random(n) < user_ratio if user_ids else np.zeros(n, dtype=bool)
+    users = rng.choice(len(user_ids), size=n) if user_ids else None
+    out, pos = [], 0
+    for i, s in enumerate(sizes.tolist()):
+        if is_user[i]:
+            out.append({"path": USER_PATH.format(user_id=user_ids[users[i]]), "params": {"style": "all"}})
+        else:
+            q = " ".join(terms[j] for j in picks[pos:pos + s].tolist())
+            out.append({"path": "/recommend", "params": {"style": style, "query": q, "k": k}})
+        pos += s
+    return out
+
+# 4. 전송: (endpoint, 지연 s, 성공 여부)
+async def _send(client, req: Dict, t_start: float) -> Tuple[str, float, bool]:
+    try:
+        r = await client.get(req["path"], params=req["params"])
+        ok = r.status_code < 400
+    except Exception:
+        ok = False
+    return _endpoint(req["path"]), time.perf_counter() - t_start, ok
+
+async def run_closed(client, reqs: List[Dict], concurrency: int, duration: Optional[float] = None):
+    """가상 사용자 concurrency 명이 reqs 를 순서대로 나눠 보낸다 (duration 이 있으면 시간 동안 반복)."""
+    records: List[Tuple[str, float, bool]] = []
+    deadline = time.perf_counter() + duration if duration else None
+    counter = iter(range(1 << 62)) if deadline else iter(range(len(reqs)))
+
+    async def worker():
+        for i in counter:
+            if deadline and time.perf_counter() >= deadline:
+                return
+            records.append(await _send(client, reqs[i % len(reqs)], time.perf_counter()))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return records
+
+async def run_open(client, reqs: List[Dict], rate: float, duration: Optional[float] = None, seed: int = 0):
+    """포아송 도착(평균 rate/s). duration 이 있으면 그 시간 동안, 없으면 len(reqs) 건."""
+    rng = np.random.default_rng(seed)
+    n = int(rate * duration * 1.2) + 16 if duration else len(reqs)
+    arrivals = np.cumsum(rng.exponential(1.0 / rate, size=n))
+    if duration:
+        arrivals = arrivals[arrivals < duration]
+    t0 = time.perf_counter()
+    tasks = []
+    for i, at in enumerate(arrivals.tolist()):
+        delay = t0 + at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_send(client, reqs[i % len(reqs)], t0 + at)))
+    return list(await asyncio.gather(*tasks))
+
+# 5. 집계
+def _stats(lat: np.ndarray, ok: np.ndarray, wall: float) -> Dict:
+    ms = lat * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (0.0, 0.0, 0.0)
+    return {
+        "requests": int(len(ms)),
+        "errors": int((~ok).sum()),
+        "error_rate": round(float((~ok).mean()), 6) if len(ms) else 0.0,
+        "throughput_rps": round(len(ms) / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": {"mean": round(float(ms.mean()), 3) if len(ms) else 0.0,
+                       "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+                       "p99": round(float(p99), 3), "max": round(float(ms.max()), 3) if len(ms) else 0.0},
+    }
+
+def summarize(records: List[Tuple[str, float, bool]], wall: float) -> Dict:
+    eps = [r[0] for r in records]
+    lat = np.array([r[1] for r in records], dtype=float)
+    ok = np.array([r[2] for r in records], dtype=bool)
+    out = {"overall": _stats(lat, ok, wall), "endpoints": {}}
+    for ep in sorted(set(eps)):
+        m = np.array([e == ep for e in eps], dtype=bool)
+        out["endpoints"][ep] = _stats(lat[m], ok[m], wall)
+    return out
+
+# 6. 클라이언트: --url 이면 HTTP, 아니면 앱을 프로세스 내에서 구동
+def make_client(url: Optional[str], artifacts: Optional[str], timeout: float):
+    import httpx
+    if url:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        return httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+    from src import app as app_module
+    if artifacts:
+        app_module.LOCAL_ARTIFACTS = artifacts
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://loadtest",
+                             timeout=timeout)
+
+async def run(client, reqs: List[Dict], mode: str, concurrency: int, rate: float,
+              duration: Optional[float], warmup: int, seed: int) -> Dict:
+    async with client:
+        # 6.1 워밍업 (모델 로드/캐시) — 집계 제외
+        for req in reqs[:warmup]:
+            await _send(client, req, time.perf_counter())
+        t0 = time.perf_counter()
+        if mode == "open":
+            records = await run_open(client, reqs, rate, duration, seed)
+        else:
+            records = await run_closed(client, reqs, concurrency, duration)
+        wall = time.perf_counter() - t0
+    report = summarize(records, wall)
+    report["wall_s"] = round(wall, 3)
+    return report
+
+# 7. 메인
+def main():
+    ap = argparse.ArgumentParser(description="Load-test the recommendation API")
+    ap.add_argument("--url", default=None, help="예: http://127.0.0.1:8000 (없으면 프로세스 내 ASGI)")
+    ap.add_argument("--artifacts", default=os.getenv("RECO_LOCAL_ARTIFACTS", "artifacts"),
+                    help="프로세스 내 모드의 모델 디렉터리 + 질의 합성용 어휘")
+    ap.add_argument("--style", default="reds")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--replay", default=None, help="요청 JSONL (없으면 어휘로 합성)")
+    ap.add_argument("--users", default=None, help="사용자 파일(.json/.jsonl) — 사용자 조회 요청을 섞는다")
+    ap.add_argument("--user-ratio", type=float, default=0.2)
+    ap.add_argument("--n", type=int, default=1000, help="합성 요청 수 (closed-loop 기본 총 요청 수)")
+    ap.add_argument("--mode", choices=["closed", "open"], default=None, help="기본: --rate 가 있으면 open")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=None, help="open-loop 평균 도착률 (요청/초)")
+    ap.add_argument("--duration", type=float, default=None, help="초 단위 실행 시간 (없으면 요청을 한 번씩)")
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--label", default=None, help="결과에 남길 빌드 이름")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+    mode = args.mode or ("open" if args.rate else "closed")
+    if mode == "open" and not args.rate:
+        raise SystemExit("--mode open requires --rate")
+
+    # 7.1 요청 준비
+    if args.replay:
+        reqs = load_requests(args.replay, args.style, args.k)
+    else:
+        terms, idf = vocabulary_terms(args.artifacts, args.style)
+        user_ids = [str(u["user_id"]) for u in load_users(args.users)] if args.users else None
+        reqs = synth_requests(terms, idf, args.n, args.style, args.k, user_ids=user_ids,
+                              user_ratio=args.user_ratio, seed=args.seed)
+    if not reqs:
+        raise SystemExit("No requests to send.")
+
+    # 7.2 실행
+    client = make_client(args.url, args.artifacts, args.timeout)
+    report = asyncio.run(run(client, reqs, mode, args.concurrency, args.rate, args.duration,
+                             args.warmup, args.seed))
+    report = {"label": args.label, "target": args.url or "in-process", "mode": mode,
+              "concurrency": args.concurrency if mode == "closed" else None,
+              "rate": args.rate if mode == "open" else None,
+              "created": time.strftime("%Y%m%d-%H%M%S"), **report}
+
+    # 7.3 출력
+    for ep, s in report["endpoints"].items():
+        lat = s["latency_ms"]
+        print(f"[LOAD] {ep:<32} n={s['requests']:<6} err={s['error_rate']:.2%} {s['throughput_rps']:>8.1f} rps "
+              f"p50={lat['p50']:.2f} p95={lat['p95']:.2f} p99={lat['p99']:.2f} ms")
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[LOAD] saved → {args.out}")
+
+# 8. 엔트리
+if __name__ == "__main__":
+    main()
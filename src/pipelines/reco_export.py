@@ -13,107 +13,64 @@ Usage:
 from __future__ import annotations
 
 # 1. 표준 라이브러리
-import argparse, json, time, re
+import argparse, time
 from pathlib import Path
 
 # 2. 서드파티
 import numpy as np
 import pandas as pd
-from joblib import load
-from scipy import sparse
-from sklearn.preprocessing import normalize
-from sklearn.metrics.pairwise import linear_kernel
 
 # 3. 우리 모듈
 from src.validate import load_latest_frame
-
-# 4. 리뷰 수/평점 파싱
-def _reviews_count(r):
-    s = (r or {}).get("reviews") if isinstance(r, dict) else None
-    if not s: return 0
-    m = re.search(r"\d+", str(s))
-    return int(m.group()) if m else 0
-
-def _avg_rating(r):
-    try: return float((r or {}).get("average")) if isinstance(r, dict) else 0.0
-    except: return 0.0
-
-# 5. 텍스트 쿼리 점수
-def score_by_terms(vec, X, terms):
-    q = " ".join(terms).lower().strip() if terms else "wine"
-    qv = normalize(vec.transform([q]))
-    return linear_kernel(X, qv).ravel()
-
-# 6. 소프트 가감점
-def apply_soft_prefs(scores: np.ndarray, df_idx: pd.DataFrame, keys: list[dict], u: dict,
-                     boost=0.05, penalty=0.20) -> np.ndarray:
-    s = scores.copy().astype(float)
-    pc = {x.lower() for x in (u.get("prefer_countries") or [])}
-    ac = {x.lower() for x in (u.get("avoid_countries")  or [])}
-    pw = {x.lower() for x in (u.get("prefer_wineries")  or [])}
-    aw = {x.lower() for x in (u.get("avoid_wineries")   or [])}
-    pt = {x.lower() for x in (u.get("terms")            or [])}
-    at = {x.lower() for x in (u.get("avoid_terms")      or [])}
-
-    for i, k in enumerate(keys):
-        key = (k["style"], int(k["id"]))
-        if key not in df_idx.index: 
-            continue
-        row = df_idx.loc[key]
-        country = (row.get("country") or "").lower()
-        winery  = (row.get("winery")  or "").lower()
-        text    = f"{row.get('wine','')} {row.get('winery','')} {row.get('location','')}".lower()
-        if pc and country in pc: s[i] += boost
-        if ac and country in ac: s[i] -= penalty
-        if pw and winery  in pw: s[i] += boost
-        if aw and winery  in aw: s[i] -= penalty
-        if pt and any(t in text for t in pt): s[i] += boost
-        if at and any(t in text for t in at): s[i] -= penalty
-    return s
-
-# 7. 하드 필터
-def apply_hard_filters(scores: np.ndarray, df_idx: pd.DataFrame, keys: list[dict],
-                       mask_allowed: np.ndarray, min_reviews: int, min_rating: float) -> np.ndarray:
-    s = scores.copy().astype(float)
-    s[~mask_allowed] = -1e9
-    if min_reviews or min_rating:
-        keep = np.ones_like(s, dtype=bool)
-        for i, k in enumerate(keys):
-            if not mask_allowed[i]:
-                keep[i] = False
-                continue
-            row = df_idx.loc[(k["style"], int(k["id"]))]
-            ok = True
-            if min_reviews:
-                ok &= _reviews_count(row.get("rating")) >= int(min_reviews)
-            if min_rating:
-                ok &= _avg_rating(row.get("rating")) >= float(min_rating)
-            keep[i] = ok
-        s[~keep] = -1e9
-    return s
+from src.io_utils.bundle import load_style_model, load_all_model
+from src.io_utils.users import load_users
+from src.reco.features import build_item_features, apply_soft_prefs, apply_hard_filters
+from src.reco.batch import query_matrix, topk_all
+
+# 4. 텍스트 쿼리 점수
+def query_text(terms) -> str:
+    return " ".join(terms).lower().strip() if terms else "wine"
+
+# 5. 스타일 게이트: 선호가 있으면 선호만, 없으면 회피 제외
+def allowed_styles_for(u: dict, all_styles) -> set[str]:
+    pref = set(u.get("preferred_styles") or [])
+    avoid = set(u.get("avoid_styles") or [])
+    if pref:
+        return {s for s in all_styles if s in pref}
+    return {s for s in all_styles if s not in avoid}
+
+# 6. 전 사용자 일괄 점수 → 게이트 → Top-K (선호 게이트는 src.reco.features 의 벡터화 버전)
+def recommend_all(vec, X, feats, users: list[dict], all_styles, k: int,
+                  mem_mb: float = 256) -> np.ndarray:
+    """(users × k) 행 인덱스 행렬, 후보가 모자라면 -1"""
+    Q = query_matrix(vec, [query_text(u.get("terms")) for u in users])
+
+    def adjust(start: int, S: np.ndarray) -> None:
+        for j in range(S.shape[0]):
+            u = users[start + j]
+            mask_allowed = feats.style_mask(allowed_styles_for(u, all_styles))
+            s = apply_soft_prefs(S[j], feats, u)
+            S[j] = apply_hard_filters(s, feats, mask_allowed,
+                                      u.get("min_reviews", 0), u.get("min_rating", 0.0))
+
+    return topk_all(X, Q, k, mem_mb, adjust)
 
 # 8. 아티팩트 로더
-def load_artifacts_any(style: str):
+def load_artifacts_any(style: str, dirpath: str = "artifacts"):
     # 9. all 모드
     if style == "all":
-        vec  = load("artifacts/tfidf_all.pkl")
-        X    = sparse.load_npz("artifacts/X_all.npz")
-        keys = json.load(open("artifacts/keys_all.json","r",encoding="utf-8"))
-        meta = json.load(open("artifacts/meta_all.json","r",encoding="utf-8"))
+        vec, X, keys, styles = load_all_model(dirpath)
         frames = []
-        for s in meta["styles"]:
+        for s in styles:
             df_s = load_latest_frame(s).copy()
             df_s["style"] = s
             frames.append(df_s)
         df_all = pd.concat(frames, ignore_index=True)
         df_idx = df_all.set_index(["style","id"], drop=False)
-        styles = meta["styles"]
         return vec, X, keys, df_idx, styles
     # 10. per-style 모드
     else:
-        vec = load(f"artifacts/tfidf_{style}.pkl")
-        X   = sparse.load_npz(f"artifacts/X_{style}.npz")
-        ids = json.load(open(f"artifacts/ids_{style}.json","r",encoding="utf-8"))
+        vec, X, ids = load_style_model(dirpath, style)
         df  = load_latest_frame(style).copy()
         df["style"] = style
         df_idx = df.set_index(["style","id"], drop=False)
@@ -145,11 +102,14 @@ def main():
     ap.add_argument("--style", default="all")  # all 또는 reds/whites/...
     ap.add_argument("--k", type=int, default=5)
     ap.add_argument("--out", default=None)
+    ap.add_argument("--mem-mb", type=float, default=256, help="점수 블록(users×items) 메모리 예산")
+    ap.add_argument("--artifacts", default="artifacts", help="모델 아티팩트 디렉터리 (embed_fit --outdir)")
     args = ap.parse_args()
 
     # 14. 데이터 로드
-    vec, X, keys, df_idx, all_styles = load_artifacts_any(args.style)
-    users = json.load(open(args.users, "r", encoding="utf-8"))
+    vec, X, keys, df_idx, all_styles = load_artifacts_any(args.style, args.artifacts)
+    users = load_users(args.users)
+    feats = build_item_features(df_idx, keys)   # 14-1. keys 정렬 피처 테이블(1회)
 
     # 15. 출력 경로
     Path("reports").mkdir(exist_ok=True)
@@ -159,54 +119,23 @@ def main():
     # 16. HTML 시작
     html = html_header()
 
-    # 17. 사용자별 루프
-    for u in users:
+    # 17. 전 사용자 일괄 점수/게이트/Top-K
+    picked = recommend_all(vec, X, feats, users, all_styles, args.k, args.mem_mb)
+
+    # 18. 사용자별 렌더
+    for u, rows in zip(users, picked):
         terms = ", ".join(u.get("terms", [])) or "키워드 없음"
         html.append(f"<div class='user'><div class='title'>👤 {u['user_id']} 님에게 추천 (Top {args.k}) "
                     f"<span style='font-weight:400;color:#666'>(키워드: {terms})</span></div>")
 
-        # 18. 스타일 게이트
-        pref = set(u.get("preferred_styles") or [])
-        avoid = set(u.get("avoid_styles") or [])
-        if pref:
-            allowed_styles = {s for s in all_styles if s in pref}
-        else:
-            allowed_styles = {s for s in all_styles if s not in avoid}
-
-        # 18. 스타일 게이트
-        pref = set(u.get("preferred_styles") or [])
-        avoid = set(u.get("avoid_styles") or [])
-        if pref:
-            allowed_styles = {s for s in all_styles if s in pref}
-        else:
-            allowed_styles = {s for s in all_styles if s not in avoid}
-
         # 18-1. 라벨: 'all' 대신 허용 스타일 나열(없으면 all)
+        allowed_styles = allowed_styles_for(u, all_styles)
         styles_label = ", ".join(sorted(allowed_styles)) if allowed_styles else "all"
         html.append(f"<div class='style'>• {styles_label}</div>")
 
-
-        # 19. 기본 점수
-        scores = score_by_terms(vec, X, u.get("terms"))
-
-        # 20. 허용 스타일 마스크
-        mask_allowed = np.array([k["style"] in allowed_styles for k in keys], dtype=bool)
-
-        # 21. 소프트 가감점
-        scores = apply_soft_prefs(scores, df_idx, keys, u)
-
-        # 22. 하드 필터
-        scores = apply_hard_filters(scores, df_idx, keys, mask_allowed,
-                                    u.get("min_reviews", 0), u.get("min_rating", 0.0))
-
-        # 23. 상위 K 선택
-        order = np.argsort(-scores)
-        picks = [keys[i] for i in order if scores[i] > -1e8][:args.k]
-
-        # 24. 렌더
-        # html.append(f"<div class='style'>• {args.style if args.style=='all' else list(allowed_styles)[0] if len(allowed_styles)==1 else 'selected styles'}</div>")
+        # 19. 렌더
         html.append("<div class='cards'>")
-        for k in picks:
+        for k in (keys[i] for i in rows if i >= 0):
             row = df_idx.loc[(k["style"], int(k["id"]))]
             name, winery, country = row.get("wine","?"), row.get("winery",""), row.get("country","")
             img = row.get("image","")
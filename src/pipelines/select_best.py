@@ -1,129 +1,102 @@
 """
 select_best.py
 - W&B에서 기록된 run들 중 지정 metric 기준으로 최적 run 선택
-- summary 타입이 깨진 경우를 대비해 history로 안전 폴백
+- 로컬 run 인덱스(.cache/run_index.json)를 증분 동기화한 뒤 인덱스에서 선택 (네트워크 왕복 최소화)
+- summary 타입이 깨진 경우를 대비해 history로 안전 폴백 (스레드 풀에서 병렬 스캔, 결과 캐시)
+- --offline: wandb/run-* 오프라인 디렉터리만으로 인덱스 구축/선택 (네트워크 없음)
 
 사용 예:
   python -m src.pipelines.select_best --project wine-reco --entity hwanseok0629- --metric avg_hit@k --maximize
+  python -m src.pipelines.select_best --offline --metric avg_hit@k --maximize
 """
 
 from __future__ import annotations
-import argparse, json
-from collections.abc import Mapping
-import wandb
+import argparse, time
+from src.io_utils.artifact_cache import ARTIFACT_CACHE, ArtifactResolver, WandbBackend, link_into
+from src.io_utils.run_index import (RUN_INDEX, load_index, save_index, sync_api, sync_offline,
+                                    fill_history, best_run, metric_value)
 
-def _is_num(x):
-    try:
-        float(x)
-        return True
-    except Exception:
-        return False
+class _LazyRun:
+    """인덱스에만 있는 run: history 스캔이 필요할 때(워커 스레드 안에서) API 객체를 가져온다"""
+    def __init__(self, api, key: str):
+        self._api, self._key = api, key
 
-def _get_metric_from_summary(run, metric: str):
-    """summary가 dict/HTTPSummary/str(JSON) 등 어떤 형태든 최대한 숫자 반환"""
-    try:
-        s = run.summary  # HTTPSummary | dict | str | 기타
-        # 1) dict/매핑이면 바로 접근
-        if isinstance(s, Mapping):
-            v = s.get(metric, None)
-            if _is_num(v):
-                return float(v)
-        # 2) HTTPSummary 내부 원시 딕셔너리 접근 시도
-        raw = getattr(s, "_json_dict", None)
-        if raw is not None:
-            if isinstance(raw, str):
-                try:
-                    raw = json.loads(raw)
-                except Exception:
-                    raw = None
-            if isinstance(raw, Mapping):
-                v = raw.get(metric, None)
-                if _is_num(v):
-                    return float(v)
-        # 3) s 자체가 문자열(JSON)인 경우
-        if isinstance(s, str):
-            try:
-                parsed = json.loads(s)
-                if isinstance(parsed, Mapping):
-                    v = parsed.get(metric, None)
-                    if _is_num(v):
-                        return float(v)
-            except Exception:
-                pass
-    except Exception:
-        pass
-    return None
-
-def _get_metric_from_history(run, metric: str):
-    """history 스캔해서 해당 metric의 '마지막 값'을 반환"""
-    try:
-        last_val = None
-        # scan_history는 메모리 안전: 페이지네이션으로 dict들을 Yield
-        for row in run.scan_history(keys=[metric]):
-            v = row.get(metric)
-            if _is_num(v):
-                last_val = float(v)
-        return last_val
-    except Exception:
-        return None
+    def scan_history(self, keys):
+        return self._api.run(self._key).scan_history(keys=keys)
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--project", required=True, help="W&B project name")
-    ap.add_argument("--entity", required=True, help="W&B entity (username/team)")
+    ap.add_argument("--project", default=None, help="W&B project name (온라인 모드 필수)")
+    ap.add_argument("--entity", default=None, help="W&B entity (username/team) (온라인 모드 필수)")
     ap.add_argument("--metric", required=True, help="Target metric (e.g., avg_hit@k)")
     ap.add_argument("--maximize", action="store_true", help="클수록 좋으면 지정")
     ap.add_argument("--state", default="finished", help="run 상태 필터 (finished|running|crashed|... or all)")
     ap.add_argument("--download", action="store_true", help="최적 run의 첫 artifact 다운로드")
+    ap.add_argument("--download-dir", default="artifacts/best", help="다운로드 노출 위치 (캐시 디렉터리 링크)")
+    ap.add_argument("--force", action="store_true", help="--download-dir 이 기존 실제 디렉터리여도 교체")
+    ap.add_argument("--artifact-cache", default=ARTIFACT_CACHE, help="다이제스트 키 공유 캐시")
+    ap.add_argument("--index", default=RUN_INDEX, help="로컬 run 인덱스 경로")
+    ap.add_argument("--offline", action="store_true", help="wandb/ 오프라인 run 디렉터리에서만 선택")
+    ap.add_argument("--wandb-dir", default="wandb")
+    ap.add_argument("--workers", type=int, default=8, help="history 폴백 스캔 스레드 수")
+    ap.add_argument("--refresh", action="store_true", help="인덱스를 버리고 전체 재동기화")
     args = ap.parse_args()
 
-    api = wandb.Api()
-    path = f"{args.entity}/{args.project}"
-    runs = api.runs(path)
-
-    best_run = None
-    best_val = None
-
-    for run in runs:
-        # 상태 필터 (선택)
-        if args.state != "all":
-            if getattr(run, "state", None) != args.state:
-                continue
-
-        # 1) summary 우선
-        val = _get_metric_from_summary(run, args.metric)
-
-        # 2) summary 실패 시 history 폴백
-        if val is None:
-            val = _get_metric_from_history(run, args.metric)
-
-        if val is None:
-            print(f"[WARN] {run.name} ({run.id}) → '{args.metric}' 없음/파싱 실패")
-            continue
-
-        # 최적값 갱신
-        if best_val is None:
-            best_val, best_run = val, run
-        else:
-            if (args.maximize and val > best_val) or ((not args.maximize) and val < best_val):
-                best_val, best_run = val, run
-
-    if not best_run:
+    t0 = time.perf_counter()
+    index = load_index(args.index, refresh=args.refresh)
+    api = None
+    if args.offline:
+        n = sync_offline(index, args.wandb_dir)
+        projects = ["offline"]
+        print(f"[INDEX] offline runs updated={n}")
+    else:
+        if not (args.project and args.entity):
+            ap.error("--project/--entity are required unless --offline")
+        import wandb  # 임포트 지연: --help/오프라인 사용 시 비용 없음
+        api = wandb.Api()
+        path = f"{args.entity}/{args.project}"
+        fetched = sync_api(index, api, path)
+        # summary에 없는 run만 history 폴백 (인덱스에 이전 결과가 있으면 건너뜀)
+        missing = [(k, e) for k, e in index["runs"].items()
+                   if e["project"] == path and metric_value(e, args.metric) is None
+                   and args.metric not in e["history"]]
+        fetched_keys = dict(fetched)
+        todo = [(k, fetched_keys.get(k) or _LazyRun(api, k)) for k, _ in missing]
+        scanned = fill_history(index, args.metric, todo, workers=args.workers)
+        projects = [path]
+        print(f"[INDEX] fetched={len(fetched)} history_scans={scanned}")
+    save_index(index, args.index)
+
+    best, best_val = best_run(index, args.metric, args.maximize, args.state, projects)
+    print(f"[INDEX] runs={len(index['runs'])} select={time.perf_counter() - t0:.3f}s")
+    for e in index["runs"].values():
+        if e["project"] in projects and (args.state == "all" or e.get("state") == args.state) \
+                and metric_value(e, args.metric) is None:
+            print(f"[WARN] {e['name']} ({e['id']}) → '{args.metric}' 없음/파싱 실패")
+
+    if not best:
         print("[ERROR] 적합한 run을 찾지 못했습니다.")
         return
 
-    print(f"[BEST] name={best_run.name} id={best_run.id} {args.metric}={best_val}")
-    print(f"[URL]  {best_run.url}")
+    print(f"[BEST] name={best['name']} id={best['id']} {args.metric}={best_val}")
+    print(f"[URL]  {best['url']}")
 
     # 필요 시 artifact 다운로드
     if args.download:
-        arts = list(best_run.logged_artifacts())
+        if api is None:
+            print("[INFO] --offline 모드에서는 artifact를 다운로드할 수 없습니다.")
+            return
+        best_run_obj = api.run(f"{best['project']}/{best['id']}")
+        arts = list(best_run_obj.logged_artifacts())
         if not arts:
             print("[INFO] 이 run에는 logged artifact가 없습니다.")
             return
         art = arts[0]
-        target = art.download(root="artifacts/best")
-        print(f"[DOWNLOAD] {art.name} → {target}")
+        # 다이제스트 캐시에 없을 때만 다운로드, --download-dir 은 캐시 디렉터리를 가리킨다
+        resolver = ArtifactResolver(args.artifact_cache, WandbBackend())
+        cached = resolver.ensure(WandbBackend.from_artifact(art))
+        target = link_into(cached, args.download_dir, force=args.force)
+        print(f"[DOWNLOAD] {art.name} → {target} ({'downloaded' if resolver.downloads else 'cache hit'}: {cached})")
 
 if __name__ == "__main__":
     main()
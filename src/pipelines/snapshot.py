@@ -1,23 +1,63 @@
 # 1. 멀티 스타일 스냅샷 파이프라인 (단일 --style도 호환)
 #    - 스타일별 API 결과를 타임스탬프 폴더로 저장(JSON/CSV).
+#    - 스타일은 풀링된 세션으로 병렬 수집(재시도 포함), 304(변경 없음)면 직전 스냅샷을 이어 붙인다.
 #    - 예)
 #      python -m src.pipelines.snapshot --styles reds,whites,sparkling,rose,port
 #      python -m src.pipelines.snapshot --style reds
+#      python -m src.pipelines.snapshot --styles reds,whites --delta   # 변경분만 저장(content-addressed)
+#      python -m src.pipelines.snapshot --styles reds,whites --stream  # 본문을 디스크로 직접 스트리밍(CSV 생략)
 
 from __future__ import annotations
 # 2. 표준/로컬 임포트
-import argparse
-from src.io.wines_api import fetch_style              # 3. 외부 API 호출
-from src.io.storage   import timestamp_dir, save_snapshot  # 4. 스냅샷 디렉터리/파일 저장
+import argparse, json
+from src.io_utils.wines_api import StyleFetcher             # 3. 외부 API 호출
+from src.io_utils.storage   import (                        # 4. 스냅샷 디렉터리/파일 저장
+    timestamp_dir, save_snapshot, save_delta_snapshot, previous_snapshot, carry_forward,
+)
 
-# 5. 핵심 실행: 스타일 리스트 순회 저장
-def run(styles: list[str]) -> None:
+HTTP_CACHE = "data/http_cache.json"   # ETag/Last-Modified 저장소 (snapshots/* 밖)
+
+# 5. 핵심 실행: 스타일 리스트 병렬 수집 후 저장
+def run(styles: list[str], delta: bool = False, workers: int = 4, retries: int = 3,
+        stream: bool = False) -> None:
+    if delta and stream:
+        raise ValueError("--delta needs parsed records; it cannot be combined with --stream")
     out = timestamp_dir()                            # 6. 타임스탬프 폴더 생성
-    print(f"[SNAPSHOT] dir={out}")
-    for s in styles:                                 # 7. 스타일별 API 호출 → 저장
-        items = fetch_style(s)
-        save_snapshot(items, s, out)
-        print(f"  - {s:<10} count={len(items):<4} -> wines_{s}.json")
+    mode = "delta" if delta else "stream" if stream else "full"
+    print(f"[SNAPSHOT] dir={out} mode={mode}")
+    fetcher = StyleFetcher(max_workers=workers, retries=retries, cache_path=HTTP_CACHE)
+    parents = {s: previous_snapshot(s, before=out) for s in styles}
+    for s, parent in parents.items():                # 6-1. 이어 붙일 부모가 없으면 조건부 요청 금지
+        if parent is None:
+            fetcher.validators.pop(fetcher.url(s), None)
+    try:
+        if stream:                                   # 6-2. 본문 → 파일 직행 (리스트 미생성)
+            fetched = fetcher.fetch_all_to_dir(styles, out)
+        else:
+            fetched = fetcher.fetch_all(styles)
+    finally:
+        fetcher.close()
+    manifest = {}
+    for s in styles:                                 # 7. 스타일별 저장
+        items, parent = fetched[s], parents[s]
+        if items is None:
+            n = carry_forward(s, out, parent, delta=delta)
+            print(f"  - {s:<10} count={n:<4} unchanged (304) -> carried from {parent}")
+        elif stream:
+            manifest[s] = items
+            print(f"  - {s:<10} count={items['count']:<4} bytes={items['bytes']} "
+                  f"sha256={items['sha256'][:12]} -> wines_{s}.json")
+        elif delta:
+            d = save_delta_snapshot(items, s, out, parent=parent)
+            print(f"  - {s:<10} count={len(items):<4} +{len(d['added'])} ~{len(d['changed'])} "
+                  f"-{len(d['removed'])} -> wines_{s}.delta.json (parent={parent})")
+        else:
+            save_snapshot(items, s, out)
+            print(f"  - {s:<10} count={len(items):<4} -> wines_{s}.json")
+    if manifest:
+        with open(f"{out}/stream_manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    fetcher.save_validators()
     print("[SNAPSHOT] done.")                        # 8. 완료 로그
 
 # 9. CLI 엔트리
@@ -25,6 +65,10 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser(description="Fetch wine lists by style and snapshot to data/snapshots")
     ap.add_argument("--styles", default="", help="쉼표구분: reds,whites,sparkling,rose,port")
     ap.add_argument("--style",  default="", help="단일 스타일(호환용). 예: reds")
+    ap.add_argument("--delta",  action="store_true", help="직전 스냅샷 대비 추가/변경/삭제 id만 저장")
+    ap.add_argument("--stream", action="store_true", help="응답 본문을 청크 단위로 파일에 직접 기록(CSV 생략)")
+    ap.add_argument("--workers", type=int, default=4, help="동시 요청 수 상한")
+    ap.add_argument("--retries", type=int, default=3, help="일시 오류 재시도 횟수(지수 백오프)")
     args = ap.parse_args()
 
     # 10. 인자 해석: --styles 우선, 없으면 --style(기본 reds)
@@ -34,4 +78,4 @@ if __name__ == "__main__":
         styles = [args.style.strip() or "reds"]
 
     # 11. 실행
-    run(styles)
+    run(styles, delta=args.delta, workers=args.workers, retries=args.retries, stream=args.stream)
@@ -0,0 +1,166 @@
+"""
+sweep.py
+- TF-IDF 하이퍼파라미터(ngram × min_df) 스윕을 한 번에 돌리고 리더보드 CSV를 남긴다.
+- 검증/코퍼스/아이템 피처/사용자 쿼리는 부모에서 한 번만 만들고 공유 메모리로 워커에 전달한다.
+- 각 설정은 프로세스 풀에서 fit_tfidf → 일괄 점수(batch) → 지표(evaluation) 순으로 평가한다.
+- configs/gates.yaml 임계값(ndcg_at_10, region_match_at_10, min_eval_queries)으로 통과 여부를 표시한다.
+
+Usage:
+  python -m src.pipelines.sweep --styles reds,whites,sparkling,rose,port --ngrams 1-1,1-2 --min-dfs 1,2,3 --k 10
+"""
+from __future__ import annotations
+
+# 1. 표준/외부 모듈
+import argparse, itertools, json, os, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+import pandas as pd
+import yaml
+
+# 2. 로컬 모듈
+from src.validate import load_latest_frame
+from src.reco.corpus import build_corpus
+from src.reco.embed import fit_tfidf
+from src.reco.features import ItemFeatures, build_item_features
+from src.reco.batch import query_matrix, topk_all
+from src.reco.evaluation import evaluate_picks
+from src.io_utils.shm import SharedArrays, attach
+from src.io_utils.users import load_users
+from src.pipelines.eval_report import query_text, user_query_tokens
+
+# 3. 워커 전역 상태 (initializer에서 1회 attach)
+_W: Dict = {}
+
+def _features_payload(feats: ItemFeatures) -> Dict:
+    return {
+        "present": feats.present, "style": feats.style, "country": feats.country,
+        "winery": feats.winery, "reviews": feats.reviews, "rating": feats.rating,
+        "text": feats.text.tolist(),
+    }
+
+def _init_worker(spec: Dict, vocabs: Dict[str, List[str]]) -> None:
+    data = attach(spec)
+    _W["corpus"] = data["corpus"]
+    _W["queries"] = data["queries"]
+    _W["users"] = [json.loads(s) for s in data["users"]]
+    _W["feats"] = ItemFeatures(
+        present=data["present"], style=data["style"], styles=vocabs["styles"],
+        country=data["country"], countries=vocabs["countries"],
+        winery=data["winery"], wineries=vocabs["wineries"],
+        reviews=data["reviews"], rating=data["rating"], text=pd.Series(data["text"]),
+    )
+
+# 4. 설정 하나 평가 (워커에서 실행)
+def evaluate_config(ngram: Tuple[int, int], min_df: int, k: int, mem_mb: float) -> Dict:
+    t0 = time.perf_counter()
+    vec, X = fit_tfidf(_W["corpus"], ngram=ngram, min_df=min_df)
+    t1 = time.perf_counter()
+    Q = query_matrix(vec, _W["queries"])
+    picked = topk_all(X, Q, k, mem_mb)
+    dfm = evaluate_picks(X, picked, _W["feats"], _W["users"])
+    t2 = time.perf_counter()
+    return {
+        "ngram": f"{ngram[0]}-{ngram[1]}",
+        "min_df": min_df,
+        "dims": int(X.shape[1]),
+        "fit_s": round(t1 - t0, 3),
+        "eval_s": round(t2 - t1, 3),
+        "avg_hit_at_k": round(float(dfm["hit@k"].mean()), 4),
+        "avg_terms_hit_at_k": round(float(dfm["terms_hit@k"].mean()), 4),
+        "avg_country_hit_at_k": round(float(dfm["country_hit@k"].mean()), 4),
+        "avg_diversity_at_k": round(float(dfm["Diversity@k"].mean()), 4),
+        f"ndcg_at_{k}": round(float(dfm["nDCG@k"].mean()), 4),
+        f"region_match_at_{k}": round(float(dfm["RegionMatch@k"].mean()), 4),
+    }
+
+# 5. 게이트 판정
+def check_gates(row: Dict, gates: Dict, n_users: int) -> Tuple[bool, str]:
+    notes = []
+    if n_users < int(gates.get("min_eval_queries", 0)):
+        notes.append(f"users {n_users} < min_eval_queries {gates['min_eval_queries']}")
+    results = []
+    for metric, threshold in (gates.get("gate") or {}).items():
+        if metric not in row:
+            notes.append(f"{metric} not computed")
+            results.append(False)
+            continue
+        ok = row[metric] >= float(threshold)
+        results.append(ok)
+        if not ok:
+            notes.append(f"{metric} {row[metric]} < {threshold}")
+    require_both = (gates.get("rollout") or {}).get("require_both_metrics", True)
+    passed = (all(results) if require_both else any(results)) and n_users >= int(gates.get("min_eval_queries", 0))
+    return passed, "; ".join(notes)
+
+def _parse_ngrams(s: str) -> List[Tuple[int, int]]:
+    out = []
+    for part in s.split(","):
+        lo, _, hi = part.strip().partition("-")
+        out.append((int(lo), int(hi or lo)))
+    return out
+
+# 6. 메인
+def main():
+    ap = argparse.ArgumentParser(description="Parallel TF-IDF hyperparameter sweep")
+    ap.add_argument("--styles", default="reds,whites,sparkling,rose,port")
+    ap.add_argument("--users", default="configs/users.json")
+    ap.add_argument("--ngrams", default="1-1,1-2,1-3")
+    ap.add_argument("--min-dfs", default="1,2,3,5")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--gates", default="configs/gates.yaml")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    ap.add_argument("--mem-mb", type=float, default=128, help="워커당 점수 블록 메모리 예산")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    # 6.1 검증 + 코퍼스 (1회)
+    frames = []
+    for s in [x.strip() for x in args.styles.split(",") if x.strip()]:
+        df_s = load_latest_frame(s).copy()
+        df_s["style"] = s
+        frames.append(df_s)
+    df_all = pd.concat(frames, ignore_index=True)
+    df_idx = df_all.set_index(["style", "id"], drop=False)
+    keys = [{"style": s, "id": int(i)} for s, i in zip(df_all["style"], df_all["id"])]
+    corpus = build_corpus(df_all)
+    feats = build_item_features(df_idx, keys)
+    users = load_users(args.users)
+    queries = [query_text(user_query_tokens(u)) for u in users]
+    gates = yaml.safe_load(open(args.gates, "r", encoding="utf-8")) if os.path.exists(args.gates) else {}
+
+    grid = list(itertools.product(_parse_ngrams(args.ngrams), [int(x) for x in args.min_dfs.split(",")]))
+    print(f"[SWEEP] items={len(corpus)} users={len(users)} configs={len(grid)} workers={args.workers}")
+
+    # 6.2 공유 메모리 → 프로세스 풀
+    payload = {"corpus": corpus, "queries": queries,
+               "users": [json.dumps(u, ensure_ascii=False) for u in users], **_features_payload(feats)}
+    vocabs = {"styles": feats.styles, "countries": feats.countries, "wineries": feats.wineries}
+    t0 = time.perf_counter()
+    with SharedArrays.create(payload) as shared, ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(shared.spec, vocabs)
+    ) as ex:
+        futures = [ex.submit(evaluate_config, ng, md, args.k, args.mem_mb) for ng, md in grid]
+        rows = []
+        for fut in futures:
+            row = fut.result()
+            row["gate_pass"], row["gate_notes"] = check_gates(row, gates, len(users))
+            rows.append(row)
+            print(f"  - ngram={row['ngram']} min_df={row['min_df']:<2} dims={row['dims']:<6} "
+                  f"ndcg@{args.k}={row[f'ndcg_at_{args.k}']} region@{args.k}={row[f'region_match_at_{args.k}']} "
+                  f"gate={'PASS' if row['gate_pass'] else 'FAIL'}")
+
+    # 6.3 리더보드
+    Path("reports").mkdir(exist_ok=True)
+    out = args.out or f"reports/sweep_{time.strftime('%Y%m%d-%H%M%S')}.csv"
+    board = pd.DataFrame(rows).sort_values(
+        ["gate_pass", f"ndcg_at_{args.k}", f"region_match_at_{args.k}"], ascending=False
+    )
+    board.to_csv(out, index=False, encoding="utf-8-sig")
+    best = board.iloc[0]
+    print(f"[SWEEP] best ngram={best['ngram']} min_df={best['min_df']} gate={'PASS' if best['gate_pass'] else 'FAIL'}")
+    print(f"[SWEEP] leaderboard={out} wall={time.perf_counter() - t0:.1f}s")
+
+# 7. 엔트리
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,24 @@ users_generate.py
 - 여러 스타일의 검증된 DF를 결합하여 자주 등장하는 국가/와이너리/단어 분포를 추출하고,
   이를 기반으로 가상 고객 N명을 생성하여 configs/users.json에 저장한다.
 - 행동 로그는 사용하지 않고 텍스트 기반 선호만 반영한다.
+- 카탈로그 통계(국가/와이너리/단어 빈도)는 청크 단위 map-reduce(프로세스 풀)로 1회 계산한다.
+- 사용자는 BLOCK 명 단위로 numpy 벡터 연산(Gumbel-top-k 가중 비복원 샘플링)으로 만들고,
+  블록 b 의 난수는 default_rng([seed, b]) 에서만 나온다 → 같은 seed면 --workers 와 무관하게 같은 출력.
+- 출력은 스트리밍: .jsonl(한 줄 = 사용자 1명) 또는 기존과 같은 들여쓰기 JSON 배열.
 
 Usage:
   python -m src.pipelines.users_generate --n 30 --styles reds,whites,sparkling,rose,port --out configs/users.json --minimal
+  python -m src.pipelines.users_generate --n 1000000 --out configs/users.jsonl --minimal --workers 8
 """
 
 # 1. 표준/외부 모듈
 import argparse
 import json
-import random
+import os
 from collections import Counter
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
 
 import numpy as np
 import pandas as pd
@@ -27,40 +34,235 @@ from src.reco.keywords import (
     canon_country,
 )
 
-# 3. 헬퍼: 가중치 고유 샘플링
-def _weighted_unique_sample(pool: List[str], weights: np.ndarray, n: int, exclude: set[str] | None = None) -> List[str]:
-    # 3.1 exclude 처리
-    exclude = exclude or set()
-    items = [c for c in pool if c not in exclude]
-    if not items:
-        return []
-    w = np.array([weights[pool.index(c)] for c in items], dtype=float)
-    if w.sum() <= 0:
-        w = np.ones_like(w) / len(w)
+BLOCK = 4096          # 블록 크기는 출력(난수 소비 단위)을 결정하므로 고정
+STATS_CHUNK = 20000   # 통계 map 단계 청크 크기
+
+# 3. 헬퍼: Gumbel-top-k 가중 비복원 샘플링 (행마다 독립)
+def _gumbel_topk(logw: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """logw: (B, P) 로그 가중치(-inf = 제외). 반환 (B, k) 인덱스, 뽑힌 순서대로; 후보가 모자라면 -1.
+    순차적으로 '남은 가중치 재정규화 후 1개씩 뽑기'와 같은 분포."""
+    B, P = logw.shape
+    k = min(k, P)
+    if k <= 0:
+        return np.full((B, 0), -1, dtype=np.int64)
+    keys = logw + rng.gumbel(size=(B, P))
+    part = np.argpartition(-keys, k - 1, axis=1)[:, :k] if k < P else np.tile(np.arange(P), (B, 1))
+    order = np.argsort(-np.take_along_axis(keys, part, axis=1), axis=1, kind="stable")
+    idx = np.take_along_axis(part, order, axis=1)
+    idx[np.isneginf(np.take_along_axis(keys, idx, axis=1))] = -1
+    return idx
+
+def _log_weights(w: np.ndarray) -> np.ndarray:
+    w = np.asarray(w, dtype=float)
+    if w.size == 0 or w.sum() <= 0:
+        return np.zeros(w.size)
+    with np.errstate(divide="ignore"):
+        return np.log(w / w.sum())
+
+# 4. 카탈로그 통계: map(청크) → reduce(청크 순서대로 Counter 병합 → 직렬과 같은 동률 순서)
+def _stats_chunk(rows: List[Tuple[str, str, str]]) -> Tuple[Counter, Counter, Counter]:
+    countries, wineries, words = Counter(), Counter(), Counter()
+    for country, winery, text in rows:
+        c = canon_country(country)
+        if c:
+            countries[c] += 1
+        if winery:
+            wineries[winery] += 1
+        # 4.1 terms에서 국가는 제거
+        words.update(extract_terms_from_text(text, max_terms=8, keep_countries=False))
+    return countries, wineries, words
+
+def catalog_stats(df_all: pd.DataFrame, workers: int = 1) -> Tuple[Counter, Counter, Counter]:
+    texts = (df_all["wine"].fillna("") + " " + df_all["winery"].fillna("") + " " + df_all["location"].fillna(""))
+    rows = list(zip(df_all["country"].fillna("").astype(str), df_all["winery"].fillna("").astype(str), texts))
+    chunks = [rows[i:i + STATS_CHUNK] for i in range(0, len(rows), STATS_CHUNK)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_stats_chunk, chunks))
+    else:
+        parts = [_stats_chunk(c) for c in chunks]
+    countries, wineries, words = Counter(), Counter(), Counter()
+    for c, w, t in parts:
+        countries.update(c)
+        wineries.update(w)
+        words.update(t)
+    return countries, wineries, words
+
+# 5. 생성 설정 (워커로 한 번 전달)
+def build_profile(country_counts: Counter, word_cnt: Counter, style_list: List[str]) -> Dict:
+    pop_countries = [c for c, _ in country_counts.most_common(50)]
+    top5 = [c for c, _ in country_counts.most_common(5)]
+    t5 = [c for c in top5 if c in pop_countries]
+    return {
+        "style_list": style_list,
+        "top_terms": [w for w, _ in word_cnt.most_common(200)],
+        "fill_terms": [w for w, _ in word_cnt.most_common(300)],
+        "pop_countries": pop_countries,
+        "pop_logw": _log_weights([country_counts[c] for c in pop_countries]),
+        "t5_idx": np.array([pop_countries.index(c) for c in t5], dtype=np.int64),
+        "uniq_countries": sorted(country_counts),
+    }
+
+@lru_cache(maxsize=65536)
+def _terms_for(sample: Tuple[str, ...], k_terms: int, fill: Tuple[str, ...]) -> Tuple[str, ...]:
+    terms = clean_terms(list(sample), max_terms=k_terms, keep_countries=False)
+    if len(terms) < k_terms:
+        for w in fill:
+            if w not in terms:
+                terms.append(w)
+                if len(terms) == k_terms:
+                    break
+    return tuple(terms)
+
+# 6. 블록 하나 생성 (사용자 start..start+B-1)
+def generate_block(block: int, n: int, seed: int, prof: Dict, opts: Dict) -> List[Dict]:
+    rng = np.random.default_rng([seed, block])
+    start = block * BLOCK
+    B = min(BLOCK, n - start)
+    styles, top_terms, pop = prof["style_list"], prof["top_terms"], prof["pop_countries"]
+    S, P = len(styles), len(pop)
+
+    # 6.1 terms: top_terms 에서 균등 비복원 k개
+    k_terms = max(opts["min_terms"], 2)
+    term_idx = _gumbel_topk(np.zeros((B, len(top_terms))), k_terms, rng)
+
+    # 6.2 스타일 선호/회피
+    pref_on = rng.random(B) < opts["p_pref_style"]
+    k_pref = min(2, max(1, S // 3))
+    pref_idx = _gumbel_topk(np.zeros((B, S)), k_pref, rng)
+    pref_mask = np.zeros((B, S), dtype=bool)
+    rows = np.repeat(np.arange(B), pref_idx.shape[1])
+    pref_mask[rows, pref_idx.ravel()] = pref_on[rows]
+    avoid_on = rng.random(B) < opts["p_avoid_style"]
+    avoid_idx = _gumbel_topk(np.where(pref_mask, -np.inf, 0.0), 1, rng)[:, 0] if S else np.full(B, -1)
+
+    # 6.3 선호 국가: Top5 에서 1개(공급 가중치) + 나머지는 공급 가중 비복원
+    m = np.where(rng.random(B) < 0.3, 3, 2) if P >= 3 else np.full(B, 2)
+    first = np.full(B, -1, dtype=np.int64)
+    if len(prof["t5_idx"]):
+        lw5 = np.broadcast_to(_log_weights(np.exp(prof["pop_logw"][prof["t5_idx"]])), (B, len(prof["t5_idx"])))
+        first = prof["t5_idx"][_gumbel_topk(lw5, 1, rng)[:, 0]]
+    lw = np.broadcast_to(prof["pop_logw"], (B, P)).copy()
+    if P:
+        has_first = first >= 0
+        lw[np.flatnonzero(has_first), first[has_first]] = -np.inf
+    extra = _gumbel_topk(lw, 2, rng)
+
+    # 6.4 회피 국가 (선호와 중복 금지)
+    avoid_c_on = rng.random(B) < opts["p_avoid_country"]
+    avoid_c_key = prof["pop_logw"][None, :] + rng.gumbel(size=(B, P))
+
+    # 6.5 품질 기준 / 모험성
+    min_rating = np.array([0.0, 4.0, 4.2])[rng.integers(0, 3, B)]
+    min_reviews = np.array([0, 5, 10])[rng.integers(0, 3, B)]
+    adventurous = np.array([0.2, 0.5, 0.8])[rng.integers(0, 3, B)]
+
+    # 6.6 사용자별 조립 (numpy 스칼라 인덱싱을 피하려고 리스트로 변환)
+    fill = tuple(prof["fill_terms"])
+    term_idx, pref_idx, extra = term_idx.tolist(), pref_idx.tolist(), extra.tolist()
+    pref_on, avoid_on, avoid_idx = pref_on.tolist(), avoid_on.tolist(), avoid_idx.tolist()
+    first, m, avoid_c_on = first.tolist(), m.tolist(), avoid_c_on.tolist()
+    min_rating, min_reviews, adventurous = min_rating.tolist(), min_reviews.tolist(), adventurous.tolist()
+    users = []
+    for j in range(B):
+        uid = f"u{start + j + 1:02d}"
+        terms = list(_terms_for(tuple(top_terms[t] for t in term_idx[j] if t >= 0), k_terms, fill))
+        preferred_styles = [styles[s] for s in pref_idx[j]] if pref_on[j] else []
+        avoid_styles = [styles[avoid_idx[j]]] if avoid_on[j] and avoid_idx[j] >= 0 else []
+
+        chosen = ([first[j]] if first[j] >= 0 else []) + [c for c in extra[j] if c >= 0]
+        prefer_countries = [pop[c] for c in chosen[:m[j]]]
+        # 6.7 풀 부족 시 백업
+        if len(prefer_countries) < m[j]:
+            backup = [c for c in prof["uniq_countries"] if c and c not in prefer_countries]
+            backup = [backup[i] for i in rng.permutation(len(backup))]
+            prefer_countries.extend(backup[: (m[j] - len(prefer_countries))])
+
+        avoid_countries = []
+        if P and avoid_c_on[j]:
+            key = avoid_c_key[j].copy()
+            key[[pop.index(c) for c in prefer_countries if c in pop]] = -np.inf
+            if np.isfinite(key).any():
+                avoid_countries = [pop[int(np.argmax(key))]]
+
+        if opts["minimal"]:
+            user = {
+                "user_id": uid,
+                "terms": terms,
+                "preferred_styles": preferred_styles,
+                "avoid_styles": avoid_styles,
+                "prefer_countries": prefer_countries,
+                "avoid_countries": avoid_countries,
+                "min_reviews": min_reviews[j],
+                "min_rating": min_rating[j],
+            }
+        else:
+            user = {
+                "user_id": uid,
+                "terms": terms,
+                "avoid_terms": [],
+                "preferred_styles": preferred_styles,
+                "avoid_styles": avoid_styles,
+                "prefer_countries": prefer_countries,
+                "avoid_countries": avoid_countries,
+                "prefer_regions": [],
+                "avoid_regions": [],
+                "prefer_wineries": [],
+                "avoid_wineries": [],
+                "min_rating": min_rating[j],
+                "min_reviews": min_reviews[j],
+                "adventurous": adventurous[j],
+            }
+        users.append(user)
+    return users
+
+# 7. 블록 직렬화 (워커에서 문자열까지 만들어 부모는 쓰기만)
+_G: Dict = {}
+
+def _init_gen(prof: Dict, opts: Dict) -> None:
+    _G["prof"], _G["opts"] = prof, opts
+
+def _render_block(args: Tuple[int, int, int, str]) -> str:
+    block, n, seed, fmt = args
+    users = generate_block(block, n, seed, _G["prof"], _G["opts"])
+    if fmt == "jsonl":
+        return "".join(json.dumps(u, ensure_ascii=False) + "\n" for u in users)
+    # json.dump(users, indent=2) 와 같은 모양: 원소마다 indent=2 덤프 후 2칸 들여쓰기
+    return ",\n".join("\n".join("  " + line for line in json.dumps(u, ensure_ascii=False, indent=2).splitlines())
+                      for u in users)
+
+def iter_rendered(n: int, seed: int, prof: Dict, opts: Dict, fmt: str, workers: int = 1) -> Iterator[str]:
+    tasks = [(b, n, seed, fmt) for b in range((n + BLOCK - 1) // BLOCK)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_gen, initargs=(prof, opts)) as ex:
+            yield from ex.map(_render_block, tasks)   # map은 블록 순서를 보존
     else:
-        w = w / w.sum()
-    # 3.2 고유 샘플
-    picks = []
-    while items and len(picks) < n:
-        choice = np.random.choice(items, p=w)
-        picks.append(choice)
-        j = items.index(choice)
-        items.pop(j)
-        w = np.delete(w, j)
-        if w.size > 0:
-            if w.sum() <= 0:
-                w = np.ones_like(w) / len(w)
-            else:
-                w = w / w.sum()
-    return picks
-
-# 4. 메인
+        _init_gen(prof, opts)
+        for t in tasks:
+            yield _render_block(t)
+
+def write_users(path: str, n: int, seed: int, prof: Dict, opts: Dict, fmt: str, workers: int = 1) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        if fmt == "jsonl":
+            for chunk in iter_rendered(n, seed, prof, opts, fmt, workers):
+                f.write(chunk)
+        else:
+            f.write("[" if n else "[]")
+            for b, chunk in enumerate(iter_rendered(n, seed, prof, opts, fmt, workers)):
+                f.write(("\n" if b == 0 else ",\n") + chunk)
+            if n:
+                f.write("\n]")
+    os.replace(tmp, path)
+
+# 8. 메인
 def main():
-    # 4.1 인자
+    # 8.1 인자
     ap = argparse.ArgumentParser(description="Generate synthetic users from wine metadata")
     ap.add_argument("--n", type=int, default=30)
     ap.add_argument("--styles", default="reds,whites,sparkling,rose,port")
     ap.add_argument("--out", default="configs/users.json")
+    ap.add_argument("--format", choices=["json", "jsonl"], default=None, help="기본: --out 확장자(.jsonl → jsonl)")
     ap.add_argument("--seed", type=int, default=42)
     ap.add_argument("--p_pref_style", type=float, default=0.7)
     ap.add_argument("--p_avoid_style", type=float, default=0.3)
@@ -68,13 +270,11 @@ def main():
     ap.add_argument("--p_avoid_country", type=float, default=0.2)
     ap.add_argument("--minimal", action="store_true")
     ap.add_argument("--min_terms", type=int, default=2)
+    ap.add_argument("--workers", type=int, default=1, help="통계 map-reduce / 블록 생성 프로세스 수 (출력에는 영향 없음)")
     args = ap.parse_args()
+    fmt = args.format or ("jsonl" if args.out.endswith(".jsonl") else "json")
 
-    # 4.2 시드
-    random.seed(args.seed)
-    np.random.seed(args.seed)
-
-    # 4.3 스타일 로드
+    # 8.2 스타일 로드
     style_list = [s.strip() for s in args.styles.split(",") if s.strip()]
     frames: List[pd.DataFrame] = []
     for style in style_list:
@@ -87,157 +287,19 @@ def main():
         raise SystemExit("Empty DF pool. Run snapshot/embed first.")
     df_all = pd.concat(frames, ignore_index=True)
 
-    # 4.4 텍스트/국가/와이너리
-    countries_raw = df_all["country"].fillna("")
-    countries = [canon_country(str(x)) for x in countries_raw]
-    wineries  = [str(x) for x in df_all["winery"].fillna("")]
-    texts = (df_all["wine"].fillna("") + " " + df_all["winery"].fillna("") + " " + df_all["location"].fillna(""))
-
-    # 4.5 분포 추출 (나라/와이너리/키워드)
-    top_countries = [c for c, _ in Counter([c for c in countries if c]).most_common(50)]
-    top_wineries  = [w for w, _ in Counter([w for w in wineries if w]).most_common(40)]
-
-    word_cnt = Counter()
-    for s in texts:
-        # 4.5.1 terms에서 국가는 제거
-        word_cnt.update(extract_terms_from_text(s, max_terms=8, keep_countries=False))
-    top_terms = [w for w, _ in word_cnt.most_common(200)]
-
-    # 4.6 국가 가중치 풀 (공급 기반)
-    country_counts = Counter([c for c in countries if c])
-    pop_countries = [c for c, _ in country_counts.most_common(50)]
-    pop_weights = np.array([country_counts[c] for c in pop_countries], dtype=float)
-    if pop_weights.size > 0 and pop_weights.sum() > 0:
-        pop_weights = pop_weights / pop_weights.sum()
-    else:
-        pop_weights = np.ones(len(pop_countries), dtype=float) / max(1, len(pop_countries))
-
-    # 4.7 Top5 국가 (무조건 1개 포함 규칙에 사용)
-    top5_countries = [c for c, _ in country_counts.most_common(5)]
-
-    # 4.8 디버그 출력
-    uniq_countries = sorted({c for c in countries if c})
-    print(f"[USERS] unique countries: {len(uniq_countries)}")
-    print(f"[USERS] top5 countries: {top5_countries}")
-
-    # 4.9 사용자 생성
-    users = []
-    for i in range(args.n):
-        uid = f"u{i+1:02d}"
-
-        # 4.9.1 terms (국가 제거) 최소 k개 보장
-        k_terms = max(args.min_terms, 2)
-        if len(top_terms) >= k_terms:
-            terms = random.sample(top_terms, k_terms)
-        else:
-            terms = top_terms[:]
-        terms = clean_terms(terms, max_terms=k_terms, keep_countries=False)
-        if len(terms) < k_terms:
-            for w, _ in word_cnt.most_common(300):
-                if w not in terms:
-                    terms.append(w)
-                    if len(terms) == k_terms:
-                        break
-
-        # 4.9.2 스타일 선호/회피
-        preferred_styles = []
-        avoid_styles = []
-        if random.random() < args.p_pref_style:
-            preferred_styles = random.sample(style_list, k=min(2, max(1, len(style_list)//3)))
-        remaining = [s for s in style_list if s not in preferred_styles]
-        if remaining and random.random() < args.p_avoid_style:
-            avoid_styles = random.sample(remaining, k=1)
-
-        # 4.9.3 선호 국가 (최소 2개, 가끔 3개) + Top5 중 1개 반드시 포함
-        m = 2 if len(pop_countries) < 3 else np.random.choice([2, 3], p=[0.7, 0.3])
-        prefer_countries: List[str] = []
-
-        # 4.9.3.1 Top5에서 1개 고정
-        if top5_countries:
-            # 4.9.3.1.1 Top5 가중치 재계산
-            t5 = [c for c in top5_countries if c in pop_countries]
-            if t5:
-                idx = [pop_countries.index(c) for c in t5]
-                w = pop_weights[idx]
-                if w.sum() <= 0:
-                    w = np.ones_like(w) / len(w)
-                else:
-                    w = w / w.sum()
-                prefer_countries.append(np.random.choice(t5, p=w))
-            else:
-                prefer_countries.append(random.choice(top5_countries))
-
-        # 4.9.3.2 나머지 국가는 공급 가중치 기반 고유 샘플
-        need_more = max(0, m - len(prefer_countries))
-        if need_more > 0 and pop_countries:
-            extra = _weighted_unique_sample(pop_countries, pop_weights, need_more, exclude=set(prefer_countries))
-            prefer_countries.extend(extra)
-
-        # 4.9.3.3 풀 부족 시 백업
-        if len(prefer_countries) < m:
-            pool_backup = [c for c in uniq_countries if c and c not in prefer_countries]
-            random.shuffle(pool_backup)
-            prefer_countries.extend(pool_backup[: (m - len(prefer_countries))])
-
-        # 4.9.4 회피 국가 (있어도 되고 없어도 됨, 선호와 중복 금지)
-        avoid_countries = []
-        if pop_countries and random.random() < args.p_avoid_country:
-            # 4.9.4.1 회피 후보는 선호에 없는 것만
-            avoid_pool = [c for c in pop_countries if c not in prefer_countries]
-            if avoid_pool:
-                aw = np.array([country_counts[c] for c in avoid_pool], dtype=float)
-                if aw.sum() <= 0:
-                    aw = np.ones_like(aw) / len(avoid_pool)
-                else:
-                    aw = aw / aw.sum()
-                avoid_countries = [np.random.choice(avoid_pool, p=aw)]
-
-        # 4.9.5 품질 기준
-        min_rating  = random.choice([0.0, 4.0, 4.2])
-        min_reviews = random.choice([0, 5, 10])
-
-        # 4.9.6 모험성
-        adventurous = random.choice([0.2, 0.5, 0.8])
-
-        # 4.9.7 레코드
-        user_full = {
-            "user_id": uid,
-            "terms": terms,
-            "avoid_terms": [],
-            "preferred_styles": preferred_styles,
-            "avoid_styles": avoid_styles,
-            "prefer_countries": prefer_countries,
-            "avoid_countries": avoid_countries,
-            "prefer_regions": [],
-            "avoid_regions": [],
-            "prefer_wineries": [],
-            "avoid_wineries": [],
-            "min_rating": min_rating,
-            "min_reviews": min_reviews,
-            "adventurous": adventurous
-        }
-
-        # 4.9.8 미니멀 스키마
-        if args.minimal:
-            user_full = {
-                "user_id": uid,
-                "terms": terms,
-                "preferred_styles": preferred_styles,
-                "avoid_styles": avoid_styles,
-                "prefer_countries": prefer_countries,
-                "avoid_countries": avoid_countries,
-                "min_reviews": min_reviews,
-                "min_rating": min_rating
-            }
+    # 8.3 분포 추출 (나라/와이너리/키워드) — 병렬 map-reduce
+    country_counts, _, word_cnt = catalog_stats(df_all, workers=args.workers)
+    prof = build_profile(country_counts, word_cnt, style_list)
 
-        users.append(user_full)
+    # 8.4 디버그 출력
+    print(f"[USERS] unique countries: {len(prof['uniq_countries'])}")
+    print(f"[USERS] top5 countries: {[c for c, _ in country_counts.most_common(5)]}")
 
-    # 4.10 저장
-    out = args.out
-    with open(out, "w", encoding="utf-8") as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)
-    print(f"[USERS] generated {len(users)} → {out}")
+    # 8.5 생성 + 스트리밍 저장
+    opts = {k: getattr(args, k) for k in ("p_pref_style", "p_avoid_style", "p_avoid_country", "min_terms", "minimal")}
+    write_users(args.out, args.n, args.seed, prof, opts, fmt, workers=args.workers)
+    print(f"[USERS] generated {args.n} → {args.out} ({fmt})")
 
-# 5. 엔트리
+# 9. 엔트리
 if __name__ == "__main__":
     main()
@@ -0,0 +1,88 @@
+"""
+users_materialize.py
+- configs/users.json 의 고정 프로필 전원에 대해 Top-K를 미리 계산해 온디스크 KV 스토어에 저장한다.
+- 점수/게이트는 reco_export.recommend_all 과 동일 (일괄 점수 → 소프트 선호 → 하드 필터 → Top-K).
+- 스토어는 버전별 파일 + {style}.current 포인터로 게시된다.
+  버전 = 아티팩트 다이제스트(번들 sha256 앞 12자리) + 입력(users 파일 내용, k) 해시 8자리
+  → 같은 모델이라도 사용자 목록/k 가 바뀌면 새 파일로 게시되어 API 가 다시 연다.
+- API: GET /users/{user_id}/recommendations?style=all → 점수 계산 없이 키 조회로 응답.
+
+Usage:
+  python -m src.pipelines.users_materialize --users configs/users.json --style all --k 10
+"""
+from __future__ import annotations
+
+# 1. 표준/외부 모듈
+import argparse, hashlib, json, time
+import numpy as np
+
+# 2. 로컬 모듈
+from src.io_utils.bundle import artifact_digest
+from src.io_utils.kvstore import publish
+from src.io_utils.users import load_users
+from src.reco.features import build_item_features
+from src.pipelines.reco_export import load_artifacts_any, recommend_all, allowed_styles_for
+
+USER_RECO_DIR = "artifacts/user_reco"
+
+# 3. 아이템 표시 정보 (keys 순서, 1회)
+def item_table(df_idx, keys) -> list[dict]:
+    uniq = df_idx[~df_idx.index.duplicated(keep="first")]
+    rows = uniq.reindex([(k["style"], int(k["id"])) for k in keys])
+    cols = {c: rows[c].tolist() if c in rows.columns else [None] * len(keys) for c in ("wine", "winery", "country")}
+    out = []
+    for j, k in enumerate(keys):
+        out.append({"style": k["style"], "id": int(k["id"]),
+                    **{c: (v[j] if isinstance(v[j], str) else "") for c, v in cols.items()}})
+    return out
+
+# 4. 스토어 버전 (모델 + 입력)
+def store_version(model_digest: str, users_path: str, k: int) -> str:
+    h = hashlib.blake2b(digest_size=4)
+    with open(users_path, "rb") as f:
+        h.update(f.read())
+    h.update(f"|k={k}".encode("utf-8"))
+    return f"{model_digest}-{h.hexdigest()}"
+
+# 5. 사용자별 레코드 (user_id → JSON bytes)
+def user_records(users: list[dict], picked: np.ndarray, items: list[dict], all_styles,
+                 style: str, version: str, k: int):
+    for u, rows in zip(users, picked):
+        doc = {
+            "user_id": u["user_id"],
+            "style": style,
+            "artifact": version,
+            "k": k,
+            "allowed_styles": sorted(allowed_styles_for(u, all_styles)),
+            "items": [{"rank": r + 1, **items[i]} for r, i in enumerate(i for i in rows.tolist() if i >= 0)],
+        }
+        yield str(u["user_id"]), json.dumps(doc, ensure_ascii=False).encode("utf-8")
+
+# 6. 메인
+def main():
+    ap = argparse.ArgumentParser(description="Precompute per-user Top-K into a versioned KV store")
+    ap.add_argument("--users", default="configs/users.json")
+    ap.add_argument("--style", default="all")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--mem-mb", type=float, default=256)
+    ap.add_argument("--out-dir", default=USER_RECO_DIR)
+    ap.add_argument("--artifacts", default="artifacts", help="모델 아티팩트 디렉터리 (embed_fit --outdir)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    vec, X, keys, df_idx, all_styles = load_artifacts_any(args.style, args.artifacts)
+    users = load_users(args.users)
+    feats = build_item_features(df_idx, keys)
+    picked = recommend_all(vec, X, feats, users, all_styles, args.k, args.mem_mb)
+    t1 = time.perf_counter()
+
+    version = store_version(artifact_digest(args.artifacts, args.style), args.users, args.k)
+    path = publish(args.out_dir, args.style, version,
+                   user_records(users, picked, item_table(df_idx, keys), all_styles, args.style, version, args.k),
+                   meta={"users": len(users), "k": args.k, "created": time.strftime("%Y%m%d-%H%M%S")})
+    print(f"[MATERIALIZE] users={len(users)} k={args.k} artifact={version} "
+          f"score={t1 - t0:.2f}s write={time.perf_counter() - t1:.2f}s → {path}")
+
+# 7. 엔트리
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+batch.py (PURE)
+- All-users scoring: one sparse query matrix → users×items scores in row blocks
+  sized to a memory budget → vectorized per-row top-k.
+- topk_all: the block loop shared by eval_report / reco_export / sweep.
+"""
+from __future__ import annotations
+from typing import Callable, Iterator, List, Optional, Tuple
+import numpy as np
+from sklearn.preprocessing import normalize
+
+def query_matrix(vec, queries: List[str]) -> "sparse.csr_matrix":
+    return normalize(vec.transform(queries)).tocsr()
+
+def block_rows(n_items: int, mem_mb: float = 256, itemsize: int = 8) -> int:
+    # 블록 하나(rows × n_items dense)가 예산 안에 들어가는 행 수
+    return max(1, int(mem_mb * 1024 * 1024) // max(1, n_items * itemsize))
+
+def iter_score_blocks(X: "sparse.csr_matrix", Q: "sparse.csr_matrix",
+                      mem_mb: float = 256) -> Iterator[Tuple[int, np.ndarray]]:
+    """(start, S) — S[j] 는 사용자 start+j 의 전체 아이템 점수 (dense float64)"""
+    XT = X.T.tocsc()
+    # 희소 곱 중간 결과(data 8B + indices 4B) + dense 변환(8B) → 원소당 ~20B
+    step = block_rows(X.shape[0], mem_mb, itemsize=20)
+    for start in range(0, Q.shape[0], step):
+        S = (Q[start:start + step] @ XT).toarray()
+        yield start, S
+
+def topk_rows(S: np.ndarray, k: int, floor: float = -1e8) -> Tuple[np.ndarray, np.ndarray]:
+    """행별 상위 k (점수 내림차순, 동점은 인덱스 오름차순). floor 이하는 -1로 채운다."""
+    n_rows, n_items = S.shape
+    k = min(k, n_items)
+    if k <= 0:
+        return np.full((n_rows, 0), -1, dtype=np.int64), np.zeros((n_rows, 0))
+    if k < n_items:
+        # k번째 값보다 큰 열은 모두, k번째 값과 같은 열은 낮은 인덱스부터 남은 자리만큼 남긴다
+        kth = np.partition(S, n_items - k, axis=1)[:, n_items - k][:, None]
+        eq = S == kth
+        room = k - (S > kth).sum(axis=1, keepdims=True)
+        keep = (S > kth) | (eq & (np.cumsum(eq, axis=1) <= room))
+        part = np.nonzero(keep)[1].reshape(n_rows, k)
+    else:
+        part = np.tile(np.arange(n_items), (n_rows, 1))
+    vals = np.take_along_axis(S, part, axis=1)
+    order = np.lexsort((part, -vals), axis=1)
+    idx = np.take_along_axis(part, order, axis=1).astype(np.int64)
+    vals = np.take_along_axis(vals, order, axis=1)
+    idx[vals <= floor] = -1
+    return idx, vals
+
+def topk_sparse(idx: np.ndarray, vals: np.ndarray, k: int, n_items: int) -> Tuple[np.ndarray, np.ndarray]:
+    """희소 점수 행(idx, vals; 나머지 아이템은 0점)의 상위 k.
+    점수 내림차순, 동점은 인덱스 오름차순 — 양수가 k개 미만이면 0점 아이템을 낮은 인덱스부터 채운다."""
+    k = max(0, min(k, n_items))
+    pos = vals > 0
+    idx, vals = np.asarray(idx)[pos], np.asarray(vals)[pos]
+    if len(vals) > k:
+        # k번째 값 이상만 남긴 뒤 정렬 (경계 동점도 인덱스 순으로 결정)
+        kth = np.partition(vals, len(vals) - k)[len(vals) - k] if k else np.inf
+        keep = vals >= kth
+        idx, vals = idx[keep], vals[keep]
+    order = np.lexsort((idx, -vals))[:k]
+    top_idx, top_vals = idx[order].astype(np.int64), vals[order]
+    if len(top_idx) < k:
+        fill = np.setdiff1d(np.arange(min(n_items, k + len(idx))), idx)[:k - len(top_idx)]
+        top_idx = np.concatenate([top_idx, fill.astype(np.int64)])
+        top_vals = np.concatenate([top_vals, np.zeros(len(fill))])
+    return top_idx, top_vals
+
+def topk_all(X: "sparse.csr_matrix", Q: "sparse.csr_matrix", k: int, mem_mb: float = 256,
+             adjust: Optional[Callable[[int, np.ndarray], None]] = None) -> np.ndarray:
+    """(queries × k) 행 인덱스 (-1 = 후보 없음).
+    adjust(start, S) 가 있으면 top-k 전에 블록 점수를 제자리에서 고친다 (선호 가중/필터)."""
+    picked = np.full((Q.shape[0], max(0, min(k, X.shape[0]))), -1, dtype=np.int64)
+    for start, S in iter_score_blocks(X, Q, mem_mb):
+        if adjust is not None:
+            adjust(start, S)
+        picked[start:start + S.shape[0]] = topk_rows(S, k)[0]
+    return picked
@@ -1,15 +1,18 @@
 """
 corpus.py (PURE)
 - Compose weighted text per item: wine×6 + winery×3 + location/country×1
+- item_text(): the same text for one record (dict), so single rows can be re-embedded
+  or compared without building a DataFrame.
 """
 from __future__ import annotations
 import pandas as pd
-from typing import List
+from typing import List, Mapping
+
+def item_text(r: Mapping) -> str:
+    wine   = (r.get("wine") or "")
+    winery = (r.get("winery") or "")
+    loc    = (r.get("location") or r.get("country") or "")
+    return (f"{wine} " * 6 + f"{winery} " * 3 + f"{loc} ").strip().lower()
 
 def build_corpus(df: pd.DataFrame) -> List[str]:
-    def row_text(r):
-        wine   = (r.get("wine") or "")
-        winery = (r.get("winery") or "")
-        loc    = (r.get("location") or r.get("country") or "")
-        return (f"{wine} " * 6 + f"{winery} " * 3 + f"{loc} ").strip().lower()
-    return df.apply(row_text, axis=1).tolist()
+    return df.apply(item_text, axis=1).tolist()
@@ -0,0 +1,98 @@
+"""
+evaluation.py (PURE)
+- Offline metrics for a (users × k) matrix of picked row indices (-1 = empty slot).
+- Terms/Country/Hit@K from precomputed item columns (ItemFeatures), ILS@K for all
+  users with batched sparse ops: sum_{i≠j} x_i·x_j = ||Σx||² − Σ||x||².
+- nDCG@K (gain = terms hit + country hit) / RegionMatch@K via metrics.*_batch.
+"""
+from __future__ import annotations
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from src.reco.features import ItemFeatures
+from src.reco.metrics import ndcg_at_k_batch, region_match_at_k_batch
+
+def _incidence(rows: List[List[str]], vocab: Dict[str, int], n_cols: int) -> "sparse.csr_matrix":
+    indptr, indices = [0], []
+    for r in rows:
+        cols = sorted({vocab[t] for t in r if t in vocab})
+        indices.extend(cols)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), max(1, n_cols)))
+
+def terms_hit_matrix(picked: np.ndarray, feats: ItemFeatures, user_terms: List[List[str]]) -> np.ndarray:
+    """(users × k) bool — 아이템 텍스트에 사용자 terms 중 하나라도 포함"""
+    vocab: Dict[str, int] = {}
+    for ts in user_terms:
+        for t in ts:
+            vocab.setdefault(t, len(vocab))
+    U = _incidence(user_terms, vocab, len(vocab))
+    # 아이템 × 용어 (term_mask는 용어별로 캐시됨)
+    cols = [np.flatnonzero(feats.term_mask(t)) for t in vocab]
+    r = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    c = np.concatenate([np.full(len(x), j) for j, x in enumerate(cols)]) if cols else np.zeros(0, dtype=np.int64)
+    T = sparse.csr_matrix((np.ones(len(r), dtype=np.float32), (r, c)), shape=(len(feats), U.shape[1]))
+    valid = picked >= 0
+    safe = np.where(valid, picked, 0)
+    out = np.zeros(picked.shape, dtype=bool)
+    for j in range(picked.shape[1]):
+        out[:, j] = np.asarray(U.multiply(T[safe[:, j]]).sum(axis=1)).ravel() > 0
+    return out & valid
+
+def country_hit_matrix(picked: np.ndarray, feats: ItemFeatures, user_countries: List[List[str]]) -> np.ndarray:
+    """(users × k) bool — 아이템 국가가 사용자 선호 국가에 포함"""
+    vocab = {c: i for i, c in enumerate(feats.countries) if c}
+    C = _incidence(user_countries, vocab, len(feats.countries))
+    valid = picked >= 0
+    codes = feats.country[np.where(valid, picked, 0)]
+    rows = np.arange(picked.shape[0])
+    out = np.zeros(picked.shape, dtype=bool)
+    for j in range(picked.shape[1]):
+        out[:, j] = np.asarray(C[rows, codes[:, j]]).ravel() > 0
+    return out & valid
+
+def intra_list_similarity_batch(X: "sparse.csr_matrix", picked: np.ndarray,
+                                chunk: int = 20000) -> np.ndarray:
+    """사용자별 mean_{i≠j} x_i·x_j (추천 1개 이하면 0.0)"""
+    X = sparse.csr_matrix(X)
+    sq = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+    n = (picked >= 0).sum(axis=1)
+    out = np.zeros(picked.shape[0])
+    for start in range(0, picked.shape[0], chunk):
+        P = picked[start:start + chunk]
+        rr, cc = np.nonzero(P >= 0)
+        A = sparse.csr_matrix((np.ones(len(rr)), (rr, P[rr, cc])), shape=(P.shape[0], X.shape[0]))
+        S = A @ X
+        total = np.asarray(S.multiply(S).sum(axis=1)).ravel()
+        off = total - A @ sq
+        m = n[start:start + chunk]
+        out[start:start + chunk] = np.where(m > 1, off / np.maximum(m * (m - 1), 1), 0.0)
+    return out
+
+def evaluate_picks(X, picked: np.ndarray, feats: ItemFeatures, users: List[dict]) -> pd.DataFrame:
+    base_terms = [[t.lower() for t in (u.get("terms") or [])] for u in users]
+    pcs = [[x.lower() for x in (u.get("prefer_countries") or [])] for u in users]
+    th = terms_hit_matrix(picked, feats, base_terms)
+    ch = country_hit_matrix(picked, feats, pcs)
+    n = (picked >= 0).sum(axis=1)
+    denom = np.maximum(n, 1)
+    terms_hit = th.sum(axis=1) / denom
+    country_hit = np.where([bool(p) for p in pcs], ch.sum(axis=1) / denom, 0.0)
+    hit = (th | ch).any(axis=1).astype(int)
+    ils = intra_list_similarity_batch(X, picked)
+    k = picked.shape[1]
+    ndcg, _ = ndcg_at_k_batch(th.astype(int) + ch.astype(int), k)
+    region, _ = region_match_at_k_batch(ch, k, valid=picked >= 0)
+    return pd.DataFrame({
+        "user_id": [u["user_id"] for u in users],
+        "reco_count": n,
+        "hit@k": hit,
+        "terms_hit@k": [round(float(x), 3) for x in terms_hit],
+        "country_hit@k": [round(float(x), 3) for x in country_hit],
+        "ILS@k": [round(float(x), 3) for x in ils],
+        "Diversity@k": [round(float(1.0 - x) if c else 0.0, 3) for x, c in zip(ils, n)],
+        "nDCG@k": [round(float(x), 3) for x in ndcg],
+        "RegionMatch@k": [round(float(x), 3) for x in region],
+    })
@@ -0,0 +1,128 @@
+"""
+features.py (PURE)
+- Item-feature table aligned with artifact `keys` (= row order of X).
+- Integer-coded country/winery/style, parsed review count, float rating, lowercase text.
+- Preference gates (soft boost/penalty, hard filters) as NumPy ops over all items.
+"""
+from __future__ import annotations
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+import numpy as np
+import pandas as pd
+
+_DIGITS = re.compile(r"\d+")
+
+# 1. 리뷰 수/평점 파싱 (아이템당 1회만 호출)
+def reviews_count(r) -> int:
+    s = (r or {}).get("reviews") if isinstance(r, dict) else None
+    if not s: return 0
+    m = _DIGITS.search(str(s))
+    return int(m.group()) if m else 0
+
+def avg_rating(r) -> float:
+    try: return float((r or {}).get("average")) if isinstance(r, dict) else 0.0
+    except (TypeError, ValueError): return 0.0
+
+def _encode(values: pd.Series) -> tuple[np.ndarray, List[str]]:
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int32), [str(u) for u in uniques]
+
+# 2. 아이템 피처 테이블
+@dataclass
+class ItemFeatures:
+    present: np.ndarray          # bool   key가 카탈로그(df_idx)에 존재
+    style: np.ndarray            # int32  → styles
+    styles: List[str]
+    country: np.ndarray          # int32  → countries (소문자, "" 포함)
+    countries: List[str]
+    winery: np.ndarray           # int32  → wineries (소문자, "" 포함)
+    wineries: List[str]
+    reviews: np.ndarray          # int64
+    rating: np.ndarray           # float64
+    text: pd.Series              # "wine winery location" 소문자
+    _terms: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    @staticmethod
+    def _isin(codes: np.ndarray, vocab: List[str], names: Iterable[str]) -> np.ndarray:
+        lookup = {v: i for i, v in enumerate(vocab)}
+        wanted = [lookup[n] for n in names if n in lookup]
+        return np.isin(codes, wanted)
+
+    def style_mask(self, names: Iterable[str]) -> np.ndarray:
+        return self._isin(self.style, self.styles, names)
+
+    def country_mask(self, names: Iterable[str]) -> np.ndarray:
+        return self._isin(self.country, self.countries, names) & self.present
+
+    def winery_mask(self, names: Iterable[str]) -> np.ndarray:
+        return self._isin(self.winery, self.wineries, names) & self.present
+
+    def term_mask(self, term: str) -> np.ndarray:
+        m = self._terms.get(term)
+        if m is None:
+            m = self.text.str.contains(term, regex=False).to_numpy(dtype=bool) & self.present
+            self._terms[term] = m
+        return m
+
+    def any_terms(self, terms: Iterable[str]) -> np.ndarray:
+        out = np.zeros(len(self), dtype=bool)
+        for t in terms:
+            out |= self.term_mask(t)
+        return out
+
+def build_item_features(df_idx: pd.DataFrame, keys: List[dict]) -> ItemFeatures:
+    key_tuples = [(k["style"], int(k["id"])) for k in keys]
+    present = np.asarray(pd.MultiIndex.from_tuples(key_tuples).isin(df_idx.index), dtype=bool)
+    rows = df_idx.reindex(pd.MultiIndex.from_tuples(key_tuples))
+    col = lambda c: rows[c] if c in rows.columns else pd.Series([None] * len(rows), index=rows.index)
+    style, styles = _encode(pd.Series([k[0] for k in key_tuples]))
+    country, countries = _encode(col("country").fillna("").astype(str).str.lower())
+    winery, wineries = _encode(col("winery").fillna("").astype(str).str.lower())
+    # f"{wine} {winery} {location}" 과 동일한 문자열 (None → "None")
+    text = (col("wine").astype(str) + " " + col("winery").astype(str) + " " + col("location").astype(str)).str.lower()
+    ratings = col("rating").tolist()
+    return ItemFeatures(
+        present=present,
+        style=style, styles=styles,
+        country=country, countries=countries,
+        winery=winery, wineries=wineries,
+        reviews=np.array([reviews_count(r) for r in ratings], dtype=np.int64),
+        rating=np.array([avg_rating(r) for r in ratings], dtype=np.float64),
+        text=text.reset_index(drop=True),
+    )
+
+# 3. 소프트 가감점
+def apply_soft_prefs(scores: np.ndarray, feats: ItemFeatures, u: dict,
+                     boost=0.05, penalty=0.20) -> np.ndarray:
+    s = scores.astype(float, copy=True)
+    pc = {x.lower() for x in (u.get("prefer_countries") or [])}
+    ac = {x.lower() for x in (u.get("avoid_countries")  or [])}
+    pw = {x.lower() for x in (u.get("prefer_wineries")  or [])}
+    aw = {x.lower() for x in (u.get("avoid_wineries")   or [])}
+    pt = {x.lower() for x in (u.get("terms")            or [])}
+    at = {x.lower() for x in (u.get("avoid_terms")      or [])}
+    if pc: s += boost   * feats.country_mask(pc)
+    if ac: s -= penalty * feats.country_mask(ac)
+    if pw: s += boost   * feats.winery_mask(pw)
+    if aw: s -= penalty * feats.winery_mask(aw)
+    if pt: s += boost   * feats.any_terms(pt)
+    if at: s -= penalty * feats.any_terms(at)
+    return s
+
+# 4. 하드 필터
+def apply_hard_filters(scores: np.ndarray, feats: ItemFeatures, mask_allowed: np.ndarray,
+                       min_reviews: int, min_rating: float) -> np.ndarray:
+    s = scores.astype(float, copy=True)
+    s[~mask_allowed] = -1e9
+    if min_reviews or min_rating:
+        keep = mask_allowed & feats.present
+        if min_reviews:
+            keep &= feats.reviews >= int(min_reviews)
+        if min_rating:
+            keep &= feats.rating >= float(min_rating)
+        s[~keep] = -1e9
+    return s
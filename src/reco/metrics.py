@@ -1,10 +1,13 @@
 """
 metrics.py (PURE)
 - NDCG@K, RegionMatch@K.
+- *_batch: same formulas over a (users × k) matrix, returning (per-user, mean).
 """
 from __future__ import annotations
-from typing import List, Set
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
 import math
+import numpy as np
 
 def ndcg_at_k(gains: List[int], k: int = 10) -> float:
     G = gains[:k]
@@ -21,3 +24,29 @@ def region_match_at_k(countries: List[str], preferred: Set[str], k: int = 10) ->
         return 0.0
     match = sum(1 for c in top if c in preferred)
     return match / len(top)
+
+@lru_cache(maxsize=32)
+def _discount(k: int) -> np.ndarray:
+    # log2(i+2), i = 0..k-1 (읽기 전용으로 캐시)
+    d = np.log2(np.arange(2, k + 2, dtype=np.float64))
+    d.flags.writeable = False
+    return d
+
+def ndcg_at_k_batch(gains: np.ndarray, k: int = 10) -> Tuple[np.ndarray, float]:
+    """gains: (users × L). 짧은 리스트는 0으로 패딩하면 ndcg_at_k와 같은 값(부동소수 오차 이내)."""
+    G = np.asarray(gains, dtype=np.float64)[:, :k]
+    disc = _discount(G.shape[1])
+    dcg = ((2.0 ** G - 1.0) / disc).sum(axis=1)
+    ideal = -np.sort(-G, axis=1)
+    idcg = ((2.0 ** ideal - 1.0) / disc).sum(axis=1)
+    per = np.divide(dcg, idcg, out=np.zeros_like(dcg), where=idcg != 0)
+    return per, float(per.mean()) if per.size else 0.0
+
+def region_match_at_k_batch(match: np.ndarray, k: int = 10,
+                            valid: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float]:
+    """match: (users × L) bool(선호 국가 일치). valid로 빈 슬롯을 제외한다."""
+    M = np.asarray(match, dtype=bool)[:, :k]
+    V = np.ones_like(M) if valid is None else np.asarray(valid, dtype=bool)[:, :k]
+    n = V.sum(axis=1)
+    per = np.divide((M & V).sum(axis=1), n, out=np.zeros(len(M)), where=n > 0)
+    return per, float(per.mean()) if per.size else 0.0
@@ -0,0 +1,181 @@
+"""
+query_encoder.py (PURE)
+- Single-query TF-IDF encoder that skips sklearn's transform pipeline
+  (analyzer build, input validation, one-row sparse matrix assembly).
+- Same preprocessing/tokenization/word n-grams/tf·idf/normalization as a fitted
+  TfidfVectorizer (analyzer="word"), output = (sorted column indices, weights).
+- Vocabulary lookup: the vectorizer's dict, or a bundle's byte-sorted term array
+  (np.searchsorted) so a bundle-loaded model never builds a Python dict.
+- score(): dot product against a CSC item matrix touching only the query's columns.
+"""
+from __future__ import annotations
+import math, re, sys
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+def _accent_function(strip_accents: Optional[str]) -> Optional[Callable[[str], str]]:
+    if strip_accents is None:
+        return None
+    from sklearn.feature_extraction.text import strip_accents_ascii, strip_accents_unicode
+    if strip_accents == "ascii":
+        return strip_accents_ascii
+    if strip_accents == "unicode":
+        return strip_accents_unicode
+    raise ValueError(f"unsupported strip_accents: {strip_accents!r}")
+
+def _stop_set(stop_words) -> frozenset:
+    if stop_words is None:
+        return frozenset()
+    if stop_words == "english":
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        return frozenset(ENGLISH_STOP_WORDS)
+    if isinstance(stop_words, str):
+        raise ValueError(f"unsupported stop_words: {stop_words!r}")
+    return frozenset(stop_words)
+
+def dict_lookup(vocabulary: Dict[str, int]) -> Callable[[List[str]], np.ndarray]:
+    get = vocabulary.get
+    return lambda terms: np.fromiter((get(t, -1) for t in terms), dtype=np.int64, count=len(terms))
+
+def dict_nbytes(vocabulary: Dict[str, int]) -> int:
+    # dict 테이블 + 키 문자열 + 값 int 객체 (근사치)
+    return sys.getsizeof(vocabulary) + sum(sys.getsizeof(t) + sys.getsizeof(c) for t, c in vocabulary.items())
+
+def sorted_lookup(terms_sorted: np.ndarray, cols: np.ndarray) -> Callable[[List[str]], np.ndarray]:
+    """terms_sorted: 바이트 정렬된 고정폭 S 배열 (bundle.sorted_vocabulary)"""
+    width = terms_sorted.dtype.itemsize
+    n = len(terms_sorted)
+
+    def lookup(terms: List[str]) -> np.ndarray:
+        enc = [t.encode("utf-8") for t in terms]
+        # 고정폭보다 긴 용어는 잘려서 오매칭될 수 있으므로 미리 제외
+        keep = np.array([len(b) <= width for b in enc], dtype=bool)
+        out = np.full(len(enc), -1, dtype=np.int64)
+        if not n or not keep.any():
+            return out
+        q = np.array([b for b, k in zip(enc, keep) if k], dtype=terms_sorted.dtype)
+        pos = np.searchsorted(terms_sorted, q)
+        pos_c = np.minimum(pos, n - 1)
+        hit = (pos < n) & (terms_sorted[pos_c] == q)
+        out[np.flatnonzero(keep)] = np.where(hit, cols[pos_c], -1)
+        return out
+
+    return lookup
+
+class QueryEncoder:
+    def __init__(self, lookup: Callable[[List[str]], np.ndarray], idf: Optional[np.ndarray],
+                 vocab_nbytes: int = 0, ngram_range: Tuple[int, int] = (1, 1), lowercase: bool = True,
+                 token_pattern: str = DEFAULT_TOKEN_PATTERN, norm: Optional[str] = "l2",
+                 sublinear_tf: bool = False, binary: bool = False, stop_words=None,
+                 strip_accents: Optional[str] = None, analyzer: str = "word"):
+        if analyzer != "word":
+            raise ValueError(f"unsupported analyzer: {analyzer!r}")
+        if norm not in ("l2", "l1", None):
+            raise ValueError(f"unsupported norm: {norm!r}")
+        self._lookup = lookup
+        self.vocab_nbytes = int(vocab_nbytes)
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float64)
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.lowercase = lowercase
+        self._token_re = re.compile(token_pattern)
+        if self._token_re.groups > 1:
+            raise ValueError("token_pattern must have at most one capturing group")
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self._stop = _stop_set(stop_words)
+        self._accents = _accent_function(strip_accents)
+
+    @classmethod
+    def from_vectorizer(cls, vec) -> "QueryEncoder":
+        p = vec.get_params()
+        if callable(p.get("analyzer")) or p.get("preprocessor") or p.get("tokenizer"):
+            raise ValueError("custom analyzer/preprocessor/tokenizer is not supported")
+        idf = vec.idf_ if p.get("use_idf", True) else None
+        return cls(dict_lookup(vec.vocabulary_), idf, vocab_nbytes=dict_nbytes(vec.vocabulary_),
+                   ngram_range=p["ngram_range"], lowercase=p["lowercase"],
+                   token_pattern=p["token_pattern"], norm=p["norm"],
+                   sublinear_tf=p["sublinear_tf"], binary=p["binary"], stop_words=p["stop_words"],
+                   strip_accents=p["strip_accents"], analyzer=p["analyzer"])
+
+    @classmethod
+    def from_bundle(cls, bundle) -> "QueryEncoder":
+        p = dict(bundle.meta.get("vectorizer") or {})
+        idf = bundle.idf if p.get("use_idf", True) else None
+        return cls(sorted_lookup(bundle.vocab_terms, bundle.vocab_cols), idf,
+                   vocab_nbytes=bundle.vocab_terms.nbytes + bundle.vocab_cols.nbytes,
+                   ngram_range=tuple(p.get("ngram_range", (1, 1))), lowercase=p.get("lowercase", True),
+                   token_pattern=p.get("token_pattern", DEFAULT_TOKEN_PATTERN), norm=p.get("norm", "l2"),
+                   sublinear_tf=p.get("sublinear_tf", False), binary=p.get("binary", False),
+                   stop_words=p.get("stop_words"), strip_accents=p.get("strip_accents"),
+                   analyzer=p.get("analyzer", "word"))
+
+    def nbytes(self) -> int:
+        return self.vocab_nbytes + (0 if self.idf is None else self.idf.nbytes)
+
+    # 1. 분석기: 전처리 → 토큰화 → 불용어 제거 → 단어 n-gram (sklearn _word_ngrams와 동일)
+    def analyze(self, text: str) -> List[str]:
+        if self.lowercase:
+            text = text.lower()
+        if self._accents is not None:
+            text = self._accents(text)
+        tokens = self._token_re.findall(text)
+        if self._stop:
+            tokens = [w for w in tokens if w not in self._stop]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens if min_n == 1 else []
+        original = tokens
+        out = list(original) if min_n == 1 else []
+        n_orig = len(original)
+        for n in range(max(min_n, 2), min(max_n + 1, n_orig + 1)):
+            out.extend(" ".join(original[i:i + n]) for i in range(n_orig - n + 1))
+        return out
+
+    # 2. 인코딩: (열 인덱스 오름차순, 가중치)
+    def encode(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        cols = self._lookup(self.analyze(text))
+        cols, counts = np.unique(cols[cols >= 0], return_counts=True)
+        w = np.ones(len(cols)) if self.binary else counts.astype(np.float64)
+        if self.sublinear_tf:
+            np.log(w, w)
+            w += 1
+        if self.idf is not None:
+            w = w * self.idf[cols]
+        if self.norm is not None and len(w):
+            # sklearn은 (X @ idf 대각) 결과의 저장 순서(열 내림차순)로 합산 → 같은 순서로 더해야 비트 단위 일치
+            s = 0.0
+            if self.norm == "l2":
+                for x in reversed(w.tolist()):
+                    s += x * x
+                s = math.sqrt(s)
+            else:
+                for x in reversed(w.tolist()):
+                    s += abs(x)
+            if s != 0.0:
+                w = w / s
+        return cols.astype(np.int32), w
+
+    def encode_many(self, texts: Sequence[str], n_features: int) -> "sparse.csr_matrix":
+        indptr, indices, data = [0], [], []
+        for t in texts:
+            c, w = self.encode(t)
+            indices.append(c)
+            data.append(w)
+            indptr.append(indptr[-1] + len(c))
+        return sparse.csr_matrix(
+            (np.concatenate(data) if data else np.zeros(0), np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32), indptr),
+            shape=(len(texts), n_features),
+        )
+
+def score(Xc: "sparse.csc_matrix", cols: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """아이템 점수 = X[:, cols] @ weights (CSC에서 질의 열만 순회)"""
+    out = np.zeros(Xc.shape[0])
+    indptr, indices, data = Xc.indptr, Xc.indices, Xc.data
+    for c, w in zip(cols.tolist(), weights.tolist()):
+        s, e = indptr[c], indptr[c + 1]
+        out[indices[s:e]] += data[s:e] * w
+    return out
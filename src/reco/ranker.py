@@ -1,9 +1,34 @@
 """
 ranker.py (PURE)
 - Re-rank with user preferences (style/region) and adventurousness 'a'.
+- rerank_scores(): the same formula over NumPy arrays (one pass over N candidates).
+- profile_from_user(): users.json profile → ranker profile (countries canonicalized
+  with keywords.canon_country, the same key the serving model uses for items).
 """
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence
+import numpy as np
+from src.reco.keywords import canon_country
+
+# 1. 점수식 (벡터): 0.55·sim + (0.35(1-a)+0.05a)·cat + 0.20(1-a)·reg, 모험형(a>0.6)은 비선호 스타일에 +0.05a
+def rerank_scores(sims: np.ndarray, cat: np.ndarray, reg: np.ndarray, a: float) -> np.ndarray:
+    a = float(a)
+    score = (
+        0.55 * np.asarray(sims, dtype=np.float64)
+      + (0.35*(1-a) + 0.05*a) * np.asarray(cat, dtype=np.float64)
+      + (0.20*(1-a))          * np.asarray(reg, dtype=np.float64)
+    )
+    if a > 0.6:
+        score = score + np.where(np.asarray(cat) == 0.0, 0.05 * a, 0.0)
+    return score
+
+def pref_weights(labels: Sequence[str], codes: Optional[np.ndarray], prefs: Dict[str, float],
+                 n: int) -> np.ndarray:
+    """라벨 코드 배열(-1 = 모름) → 선호 가중치. codes 가 None 이면 0."""
+    if codes is None or not prefs:
+        return np.zeros(n)
+    table = np.array([float(prefs.get(l, 0.0)) for l in labels] + [0.0])
+    return table[codes]
 
 def rerank(
     ids: List[int],
@@ -16,17 +41,18 @@ def rerank(
     pref_styles   = user_profile.get("pref_styles",   {})
     pref_regions  = user_profile.get("pref_regions",  {})
 
-    scored = []
-    for id_, sim, st, co in zip(ids, sims, item_styles, item_countries):
-        cat = float(pref_styles.get(st, 0.0))
-        reg = float(pref_regions.get(co, 0.0))
-        score = (
-            0.55 * sim
-          + (0.35*(1-a) + 0.05*a) * cat
-          + (0.20*(1-a))          * reg
-        )
-        if a > 0.6 and cat == 0.0:
-            score += 0.05 * a
-        scored.append((score, id_))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [id_ for score, id_ in scored]
+    cat = np.array([float(pref_styles.get(st, 0.0)) for st in item_styles])
+    reg = np.array([float(pref_regions.get(co, 0.0)) for co in item_countries])
+    score = rerank_scores(np.asarray(sims, dtype=np.float64), cat, reg, a)
+    # 안정 정렬(내림차순) → 동점은 입력 순서 유지 (기존 sort(reverse=True)와 동일)
+    order = np.argsort(-score, kind="stable")
+    return [ids[i] for i in order.tolist()]
+
+# 2. 사용자 프로필 변환 (configs/users.json 형식 → 랭커 형식)
+def profile_from_user(u: Dict) -> Dict:
+    a = u.get("adventurousness", u.get("adventurous", 0.5))
+    return {
+        "adventurousness": float(0.5 if a is None else a),
+        "pref_styles":  {s: 1.0 for s in (u.get("preferred_styles") or [])},
+        "pref_regions": {canon_country(c): 1.0 for c in (u.get("prefer_countries") or []) if c},
+    }
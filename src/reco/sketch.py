@@ -0,0 +1,68 @@
+"""
+sketch.py (PURE)
+- HyperLogLog distinct counter for streaming statistics (snapshot drift).
+- hash64(): stable across processes (crc32 → splitmix64 finalizer), so registers saved
+  with a model can be merged with a sketch built from a later snapshot.
+- merge() = elementwise max → |A ∪ B| without keeping either set;
+  new distinct values ≈ |A ∪ B| - |A| (exactly 0 when B ⊆ A).
+"""
+from __future__ import annotations
+import base64, zlib
+from typing import Iterable
+import numpy as np
+
+_M1, _M2 = np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB)
+
+def hash64(values: Iterable[str]) -> np.ndarray:
+    h = np.fromiter((zlib.crc32(v.encode("utf-8")) for v in values), dtype=np.uint64)
+    # splitmix64 finalizer: crc32 의 선형성을 섞어 64비트 전체에 고르게 퍼뜨린다
+    h = h + np.uint64(0x9E3779B97F4A7C15)
+    h = (h ^ (h >> np.uint64(30))) * _M1
+    h = (h ^ (h >> np.uint64(27))) * _M2
+    return h ^ (h >> np.uint64(31))
+
+class HyperLogLog:
+    def __init__(self, p: int = 12):
+        if not 4 <= p <= 16:
+            raise ValueError("p must be in [4, 16]")
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add_hashes(self, h: np.ndarray) -> None:
+        if len(h) == 0:
+            return
+        idx = (h >> np.uint64(64 - self.p)).astype(np.intp)
+        # 순위 = 하위 32비트의 선행 0 개수 + 1 (frexp 지수 = 비트 길이, 0 → 33)
+        low = (h & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        rank = (33 - np.frexp(low)[1]).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def add(self, values: Iterable[str]) -> None:
+        self.add_hashes(hash64(values))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("cannot merge sketches with different precision")
+        out = HyperLogLog(self.p)
+        out.registers = np.maximum(self.registers, other.registers)
+        return out
+
+    def count(self) -> float:
+        m = float(len(self.registers))
+        est = (0.7213 / (1 + 1.079 / m)) * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * np.log(m / zeros)   # 작은 범위: linear counting
+        return float(est)
+
+    def to_b64(self) -> str:
+        return base64.b64encode(self.registers.tobytes()).decode("ascii")
+
+    @classmethod
+    def from_b64(cls, s: str, p: int = 12) -> "HyperLogLog":
+        out = cls(p)
+        regs = np.frombuffer(base64.b64decode(s), dtype=np.uint8)
+        if len(regs) != len(out.registers):
+            raise ValueError("register count does not match precision")
+        out.registers = regs.copy()
+        return out
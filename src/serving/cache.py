@@ -0,0 +1,66 @@
+"""
+cache.py
+- LRU cache of loaded serving models bounded by a memory budget (bytes).
+- Each entry is sized once at insert (model.nbytes()); inserting evicts
+  least-recently-used entries until the total fits. An entry larger than the
+  whole budget is still kept (alone) so the request that loaded it can be served.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+class ModelCache:
+    def __init__(self, budget_bytes: int, sizeof: Callable[[Any], int] = lambda m: int(m.nbytes())):
+        self.budget_bytes = int(budget_bytes)
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            self._entries.move_to_end(key)
+            return hit[0]
+
+    def put(self, key: Hashable, model: Any) -> List[Hashable]:
+        """삽입 후 예산 초과분을 LRU 순으로 내보내고, 내보낸 키 목록을 돌려준다"""
+        size = self._sizeof(model)
+        evicted = []
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (model, size)
+            while self._resident() > self.budget_bytes and len(self._entries) > 1:
+                old, _ = self._entries.popitem(last=False)
+                evicted.append(old)
+            self.evictions += len(evicted)
+        return evicted
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            hit = self._entries.pop(key, None)
+            return None if hit is None else hit[0]
+
+    def _resident(self) -> int:
+        # 호출자가 _lock 을 잡고 있어야 한다
+        return sum(size for _, size in self._entries.values())
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return self._resident()
+
+    def sizes(self) -> Dict[Hashable, int]:
+        """LRU → MRU 순서의 {키: 바이트}"""
+        with self._lock:
+            return {k: size for k, (_, size) in self._entries.items()}
@@ -0,0 +1,61 @@
+"""
+coalesce.py
+- Micro-batching for async handlers: requests with the same key (style) that arrive
+  within window_ms are scored together by one run_batch(key, items) call in a worker
+  thread, and each awaiting handler gets its own result back.
+- A batch is flushed when the window elapses or max_batch items are queued, whichever
+  comes first. All bookkeeping runs on the event loop thread, so no locks.
+"""
+from __future__ import annotations
+import asyncio
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Set, Tuple
+
+class Coalescer:
+    def __init__(self, run_batch: Callable[[Hashable, List[Any]], Sequence[Any]],
+                 window_ms: float = 2.0, max_batch: int = 32):
+        if window_ms < 0 or max_batch < 1:
+            raise ValueError("window_ms must be >= 0 and max_batch >= 1")
+        self._run_batch = run_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"batches": 0, "items": 0, "max_seen": 0}
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, fut))
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await fut
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        self.stats["batches"] += 1
+        self.stats["items"] += len(batch)
+        self.stats["max_seen"] = max(self.stats["max_seen"], len(batch))
+        try:
+            results = await asyncio.to_thread(self._run_batch, key, [item for item, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        # 클라이언트가 끊겨 취소된 future는 건너뛴다
+        for (_, fut), res in zip(batch, results):
+            if not fut.done():
+                fut.set_result(res)
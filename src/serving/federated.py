@@ -0,0 +1,17 @@
+"""
+federated.py
+- Gather step of scatter-gather search over per-style shards: the app searches each
+  per-style ServingModel in a thread pool (each returns its own top-k), and
+  merge_topk() heap-merges those lists into the global top-k, tagging every hit
+  with its shard style.
+- Merge order: score desc; ties keep shard order (as requested), then in-shard rank.
+"""
+from __future__ import annotations
+import heapq
+from itertools import islice
+from typing import Dict, List, Sequence, Tuple
+
+def merge_topk(shards: Sequence[Tuple[str, List[Dict]]], k: int) -> List[Dict]:
+    """shards: [(style, 점수 내림차순 hits)] → 전역 상위 k (heapq.merge: 입력은 이미 정렬됨)"""
+    tagged = ([{**h, "style": h.get("style") or style} for h in hits] for style, hits in shards)
+    return list(islice(heapq.merge(*tagged, key=lambda h: -h["score"]), max(0, k)))
@@ -0,0 +1,130 @@
+"""
+metadata.py
+- Columnar item metadata aligned to the serving model's row index, so /recommend can
+  return display fields (wine, winery, country, rating, reviews, image) without the
+  client downloading whole catalogs.
+- String columns are dictionary-encoded: int32 codes per row (-1 = missing) into a
+  table of unique values stored as one UTF-8 blob + offsets (no per-row str objects;
+  winery/country repeat heavily). rating is float32 (NaN = missing), reviews int32 (-1).
+- Built by embed_fit from the same validated frame as the vectors and stored in the
+  model bundle (to_arrays/from_arrays, "item_*" arrays), so display fields always match
+  the model's snapshot. Older bundles fall back to from_frame() at load. nbytes() counts
+  toward the model cache budget.
+"""
+from __future__ import annotations
+import math, re
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+
+FIELDS = ("wine", "winery", "country", "rating", "reviews", "image")
+_TEXT = ("wine", "winery", "country", "image")
+
+def parse_fields(spec: Optional[str]) -> List[str]:
+    """'wine,image' → ['wine', 'image'] (None = 전부, '' = 없음). 모르는 필드는 ValueError"""
+    if spec is None:
+        return list(FIELDS)
+    names = [f.strip() for f in spec.split(",") if f.strip()]
+    unknown = [f for f in names if f not in FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {unknown} (available: {', '.join(FIELDS)})")
+    return names
+
+class StringColumn:
+    def __init__(self, codes: np.ndarray, blob: bytes, offsets: np.ndarray):
+        self.codes, self.blob, self.offsets = codes, blob, offsets
+
+    @classmethod
+    def build(cls, values: Iterable[Optional[str]]) -> "StringColumn":
+        pos: Dict[str, int] = {}
+        codes = [pos.setdefault(v, len(pos)) if v else -1 for v in values]
+        enc = [s.encode("utf-8") for s in pos]
+        offsets = np.zeros(len(enc) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in enc], out=offsets[1:])
+        return cls(np.asarray(codes, dtype=np.int32), b"".join(enc), offsets)
+
+    def get(self, row: int) -> Optional[str]:
+        c = int(self.codes[row])
+        if c < 0:
+            return None
+        return self.blob[self.offsets[c]:self.offsets[c + 1]].decode("utf-8")
+
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + len(self.blob) + self.offsets.nbytes)
+
+def _text(v) -> Optional[str]:
+    # 프레임 결측값(None/NaN) → None
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    return str(v)
+
+def _reviews(v) -> int:
+    # "1,234 ratings" → 1234 (API 원본은 문자열)
+    if v is None:
+        return -1
+    digits = re.sub(r"\D", "", str(v))
+    return int(digits) if digits else -1
+
+class ItemMetadata:
+    def __init__(self, text: Dict[str, StringColumn], rating: np.ndarray, reviews: np.ndarray):
+        self.text, self.rating, self.reviews = text, rating, reviews
+
+    def __len__(self) -> int:
+        return int(self.rating.shape[0])
+
+    @classmethod
+    def from_columns(cls, cols: Dict[str, Sequence], n: int) -> "ItemMetadata":
+        """필드별 값 목록(행 순서; rating 은 {"average", "reviews"} 또는 None) → 컬럼 저장소"""
+        text = {f: StringColumn.build(_text(v) for v in cols.get(f, [None] * n)) for f in _TEXT}
+        ratings = [g if isinstance(g, dict) else {} for g in cols.get("rating", [None] * n)]
+        rating = np.array([math.nan if g.get("average") is None else float(g["average"]) for g in ratings],
+                          dtype=np.float32)
+        reviews = np.array([_reviews(g.get("reviews")) for g in ratings], dtype=np.int32)
+        return cls(text, rating, reviews)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Optional[Dict]]) -> "ItemMetadata":
+        """행 순서의 검증 레코드(없으면 None) → 컬럼 저장소"""
+        recs = [r or {} for r in records]
+        return cls.from_columns({f: [r.get(f) for r in recs] for f in (*_TEXT, "rating")}, len(recs))
+
+    @classmethod
+    def from_frame(cls, df, rows: Optional[np.ndarray] = None) -> "ItemMetadata":
+        """검증 프레임의 컬럼에서 바로 생성. rows[i] = 모델 행 i 의 프레임 행 (-1 = 없음, None = 프레임 순서)"""
+        n = len(df) if rows is None else len(rows)
+        cols = {}
+        for f in (*_TEXT, "rating"):
+            if f not in df.columns:
+                continue
+            vals = df[f].tolist()
+            cols[f] = vals if rows is None else [vals[j] if j >= 0 else None for j in rows.tolist()]
+        return cls.from_columns(cols, n)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        out = {"item_rating": self.rating, "item_reviews": self.reviews}
+        for f, c in self.text.items():
+            out[f"item_{f}_codes"] = c.codes
+            out[f"item_{f}_blob"] = np.frombuffer(c.blob, dtype=np.uint8)
+            out[f"item_{f}_offsets"] = c.offsets
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "ItemMetadata":
+        text = {f: StringColumn(arrays[f"item_{f}_codes"], arrays[f"item_{f}_blob"].tobytes(),
+                                arrays[f"item_{f}_offsets"]) for f in _TEXT}
+        return cls(text, arrays["item_rating"], arrays["item_reviews"])
+
+    def row(self, i: int, fields: Sequence[str]) -> Dict:
+        out = {}
+        for f in fields:
+            if f == "rating":
+                v = float(self.rating[i])
+                out[f] = None if math.isnan(v) else round(v, 2)
+            elif f == "reviews":
+                v = int(self.reviews[i])
+                out[f] = None if v < 0 else v
+            else:
+                out[f] = self.text[f].get(i)
+        return out
+
+    def nbytes(self) -> int:
+        return int(sum(c.nbytes() for c in self.text.values()) + self.rating.nbytes + self.reviews.nbytes)
@@ -0,0 +1,162 @@
+"""
+model.py
+- Serving-side model: item matrix (CSR + CSC copy for column scoring), ids and a QueryEncoder.
+- Loads model_{style}.bundle when present (no vocabulary dict is built),
+  otherwise the pkl/npz/json artifacts.
+- recommend() (one query, CSC column scoring) and recommend_batch() (many queries,
+  one sparse product) share the same top-k ordering: score desc, row index asc.
+- rerank(): two-stage — top-N candidates by cosine, then the ranker formula over
+  those N only (item style/country codes are looked up for the candidates).
+- describe(): adds display fields from the attached ItemMetadata to a page of hits.
+"""
+from __future__ import annotations
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from src.io_utils.bundle import artifact_digest, bundle_path, read_bundle, load_legacy_files
+from src.reco.query_encoder import QueryEncoder, score
+from src.reco.batch import topk_sparse
+from src.reco.keywords import canon_country
+from src.reco.ranker import rerank_scores, pref_weights
+from src.serving.metadata import ItemMetadata
+
+@dataclass
+class ServingModel:
+    style: str
+    X: "sparse.csr_matrix"
+    Xc: "sparse.csc_matrix"
+    ids: np.ndarray
+    encoder: QueryEncoder
+    # 아이템 속성 코드 (-1 = 모름). style_codes 가 None 이면 전 아이템 = self.style
+    style_codes: Optional[np.ndarray] = None
+    style_names: List[str] = field(default_factory=list)
+    country_codes: Optional[np.ndarray] = None
+    country_names: List[str] = field(default_factory=list)
+    # 표시용 필드 (행 순서). 없으면 describe() 는 hits 그대로
+    meta: Optional[ItemMetadata] = None
+    # 번들 meta 의 스냅샷 계보 (메타데이터 없는 이전 번들의 폴백용)
+    snapshot: Optional[str] = None
+    # 아티팩트 버전 (artifact_digest 와 같은 12 hex) — 커서 캐시가 다른 모델의 순위를 재사용하지 않게
+    version: str = ""
+    _id_order: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    @property
+    def rows(self) -> int:
+        return int(self.X.shape[0])
+
+    @property
+    def dims(self) -> int:
+        return int(self.X.shape[1])
+
+    def nbytes(self) -> int:
+        """상주 메모리 근사치: CSR + CSC 행렬, ids, 아이템 속성 코드/메타데이터, 인코더(어휘 + IDF)"""
+        mats = sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in (self.X, self.Xc))
+        codes = sum(c.nbytes for c in (self.style_codes, self.country_codes) if c is not None)
+        meta = self.meta.nbytes() if self.meta is not None else 0
+        return int(mats + self.ids.nbytes + codes + meta + self.encoder.nbytes())
+
+    def encode(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        return self.encoder.encode(query)
+
+    def scores(self, query: str) -> np.ndarray:
+        return score(self.Xc, *self.encoder.encode(query))
+
+    def _hits(self, idx: np.ndarray, vals: np.ndarray, k: int) -> List[Dict]:
+        # 짧은 질의는 대부분 아이템이 0점 → 양수 후보만 정렬 (dense argpartition 회피)
+        top_idx, top_vals = topk_sparse(idx, vals, k, self.rows)
+        hits = [{"id": int(self.ids[i]), "score": float(v)} for i, v in zip(top_idx.tolist(), top_vals.tolist())]
+        if self.style_codes is not None:   # 통합 번들: id 가 스타일 간에 겹칠 수 있으므로 스타일 표기
+            for h, st in zip(hits, self.item_styles(top_idx)):
+                h["style"] = st
+        return hits
+
+    def recommend(self, query: str, k: int) -> List[Dict]:
+        s = self.scores(query)
+        idx = np.flatnonzero(s)
+        return self._hits(idx, s[idx], k)
+
+    def candidates(self, query: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """1단계: 코사인 상위 n (행 인덱스, 점수) — recommend() 와 같은 순서"""
+        s = self.scores(query)
+        idx = np.flatnonzero(s)
+        return topk_sparse(idx, s[idx], n, self.rows)
+
+    def item_styles(self, rows: np.ndarray) -> List[str]:
+        if self.style_codes is None:
+            return [self.style] * len(rows)
+        return [self.style_names[c] for c in self.style_codes[rows].tolist()]
+
+    def rerank(self, query: str, k: int, profile: Dict, n_candidates: int = 200) -> List[Dict]:
+        """2단계: 후보 N개에만 선호(스타일/국가)·모험성 점수식 적용 → 상위 k (동점은 코사인 순서 유지)"""
+        idx, sims = self.candidates(query, max(n_candidates, k))
+        n = len(idx)
+        if self.style_codes is None:
+            cat = np.full(n, float((profile.get("pref_styles") or {}).get(self.style, 0.0)))
+        else:
+            cat = pref_weights(self.style_names, self.style_codes[idx], profile.get("pref_styles") or {}, n)
+        codes = None if self.country_codes is None else self.country_codes[idx]
+        reg = pref_weights(self.country_names, codes, profile.get("pref_regions") or {}, n)
+        sc = rerank_scores(sims, cat, reg, profile.get("adventurousness", 0.5))
+        order = np.argsort(-sc, kind="stable")[:k].tolist()
+        styles = self.item_styles(idx[order])
+        return [{"id": int(self.ids[idx[o]]), "score": float(sc[o]), "sim": float(sims[o]), "style": st}
+                for o, st in zip(order, styles)]
+
+    def attach_meta(self, meta: ItemMetadata) -> None:
+        """메타데이터 + 재정렬용 국가 코드 (국가 컬럼의 고유값만 정규화)"""
+        self.meta = meta
+        col = meta.text["country"]
+        uniq = [canon_country(col.blob[col.offsets[c]:col.offsets[c + 1]].decode("utf-8"))
+                for c in range(len(col.offsets) - 1)]
+        names = sorted({c for c in uniq if c})
+        pos = {c: i for i, c in enumerate(names)}
+        lut = np.array([pos.get(c, -1) for c in uniq] + [-1], dtype=np.int32)   # 마지막 = 결측(-1)
+        self.country_names = names
+        self.country_codes = lut[col.codes]
+
+    def rows_of(self, ids: Sequence[int], styles: Optional[Sequence[Optional[str]]] = None) -> List[int]:
+        """id → 행 번호 (-1 = 없음). 통합 번들에서 id 가 스타일 간에 겹치면 styles 로 구분"""
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind="stable")
+        sorted_ids = self.ids[self._id_order]
+        q = np.asarray(ids, dtype=sorted_ids.dtype)
+        lo, hi = np.searchsorted(sorted_ids, q, "left"), np.searchsorted(sorted_ids, q, "right")
+        out = []
+        for j, (a, b) in enumerate(zip(lo.tolist(), hi.tolist())):
+            rows = self._id_order[a:b].tolist()
+            if len(rows) > 1 and styles is not None and styles[j]:
+                rows = [r for r in rows if self.item_styles(np.array([r]))[0] == styles[j]] or rows
+            out.append(rows[0] if rows else -1)
+        return out
+
+    def describe(self, hits: List[Dict], fields: Sequence[str]) -> List[Dict]:
+        if self.meta is None or not fields or not hits:
+            return hits
+        rows = self.rows_of([h["id"] for h in hits], [h.get("style") for h in hits])
+        return [{**h, **self.meta.row(r, fields)} if r >= 0 else h for h, r in zip(hits, rows)]
+
+    def recommend_batch(self, queries: Sequence[str], ks: Sequence[int]) -> List[List[Dict]]:
+        Q = self.encoder.encode_many(queries, self.dims)
+        S = (Q @ self.Xc.T).tocsr()   # Xc.T = X.T의 CSR 뷰 (변환 없음)
+        return [self._hits(S.indices[S.indptr[j]:S.indptr[j + 1]], S.data[S.indptr[j]:S.indptr[j + 1]], k)
+                for j, k in enumerate(ks)]
+
+def load_serving_model(dirpath: str, style: str) -> ServingModel:
+    bpath = bundle_path(dirpath, style)
+    if os.path.exists(bpath):
+        b = read_bundle(bpath)
+        X, ids, encoder = b.X, b.ids, QueryEncoder.from_bundle(b)
+        extra = {"snapshot": b.meta.get("snapshot"), "version": b.checksum[:12]}
+        if b.key_styles is not None:
+            extra.update(style_codes=b.key_styles.astype(np.int32), style_names=list(b.meta["styles"]))
+        model = ServingModel(style=style, X=X, Xc=X.tocsc(), ids=ids, encoder=encoder, **extra)
+        if b.item_arrays:
+            model.attach_meta(ItemMetadata.from_arrays(b.item_arrays))
+        return model
+    else:
+        vec, X, ids = load_legacy_files(dirpath, style)
+        X, ids, encoder = sparse.csr_matrix(X), np.asarray(ids, dtype=np.int64), QueryEncoder.from_vectorizer(vec)
+    return ServingModel(style=style, X=X, Xc=X.tocsc(), ids=ids, encoder=encoder,
+                        version=artifact_digest(dirpath, style))
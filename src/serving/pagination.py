@@ -0,0 +1,71 @@
+"""
+pagination.py
+- Cursor pagination for /recommend. A request ranks a few pages ahead (depth ∝ k) once
+  and keeps that ranked list in a small LRU + TTL cache; the cursor returned with it is
+  opaque (base64url JSON: cache token, offset, and the request parameters).
+- Page N+1 is a slice of the cached list. If the entry expired/was evicted, or the
+  page runs past the cached depth, the caller re-ranks from the parameters stored
+  in the cursor — so a cursor never dangles.
+- Token = hash of the request parameters, so identical queries share one entry.
+  The caller stores the artifact versions of the models it ranked with in the entry
+  and re-ranks when a different model is loaded now (eviction + moved :latest).
+- Used from the event loop thread only (no locks), like coalesce.py.
+"""
+from __future__ import annotations
+import base64, hashlib, json, time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+def page_token(params: Dict) -> str:
+    raw = json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=12).hexdigest()
+
+def encode_cursor(token: str, offset: int, params: Dict) -> str:
+    raw = json.dumps({"t": token, "o": int(offset), "p": params}, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[str, int, Dict]:
+    """(token, offset, params). 잘못된 커서는 ValueError"""
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        d = json.loads(base64.urlsafe_b64decode(cursor + pad))
+        token, offset, params = d["t"], int(d["o"]), d["p"]
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(params, dict) or offset < 0 or token != page_token(params):
+        raise ValueError("invalid cursor")
+    return token, offset, params
+
+class CursorCache:
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1 or ttl_s <= 0:
+            raise ValueError("max_entries must be >= 1 and ttl_s > 0")
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, token: str, value: Any) -> None:
+        self._entries.pop(token, None)
+        self._entries[token] = (self._clock() + self.ttl_s, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, token: str) -> Optional[Any]:
+        hit = self._entries.get(token)
+        if hit is None:
+            self.stats["misses"] += 1
+            return None
+        if hit[0] <= self._clock():
+            del self._entries[token]
+            self.stats["expired"] += 1
+            return None
+        self._entries.move_to_end(token)
+        self.stats["hits"] += 1
+        return hit[1]
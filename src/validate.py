@@ -2,15 +2,26 @@
 validate.py
 - Load latest snapshot → schema validate (pydantic) → minimal cleanup.
 - Output: clean pandas.DataFrame ready for reco module.
+- Validated-frame cache: `python -m src.validate --styles reds,whites --cache` stores
+  (frame, stats) under .cache/validated, keyed by the snapshot file's path/size/mtime plus
+  a hash of this module, src/io_utils/storage.py and the pandas/pydantic versions (a schema
+  or parsing change never serves an old frame). Reading is opt-in: load_*frame*() use the
+  cache only when RECO_VALIDATED_CACHE=1 (the DAG sets it for its stages); every other
+  caller always validates. Nothing is written unless --cache (or write_cache) is used.
 - 실행 코드
     python -c "from src.validate import load_latest_frame_with_stats as f; import pprint; _,s=f('reds'); pprint.pprint(s)"
+    python -m src.validate --styles reds,whites --cache
 """
 # 1. 최신 스냅샷 로드 → 스키마 검증 → DataFrame 반환(+통계)
 from __future__ import annotations
-import glob, json, re
+import argparse, functools, glob, hashlib, json, os, pickle, re
 from typing import Optional, Literal, Tuple, Dict
 import pandas as pd
 from pydantic import BaseModel, HttpUrl, ValidationError
+from src.io_utils.storage import delta_path, reconstruct
+
+VALIDATED_CACHE = ".cache/validated"
+CACHE_ENV = "RECO_VALIDATED_CACHE"   # "1" → load_*frame*() 가 캐시를 읽는다
 
 # 2. 평점/리뷰 스키마
 class Rating(BaseModel):
@@ -39,11 +50,67 @@ def _latest(style: str) -> str:
         raise FileNotFoundError("No snapshots. Run snapshot first.")
     return f"{dirs[-1]}/wines_{style}.json"
 
-# 6. 검증 실행(통계 함께 반환)
-def load_latest_frame_with_stats(style: str = "reds") -> tuple[pd.DataFrame, Dict[str,int|str]]:
-    # 7. 원본 로드
+# 5-1. 검증 결과 캐시 경로 (원본 파일 경로+크기+mtime 기준; delta 스냅샷은 매니페스트)
+def source_file(json_path: str, style: str) -> str:
+    return json_path if os.path.exists(json_path) else delta_path(os.path.dirname(json_path), style)
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """검증 결과를 바꿀 수 있는 코드/라이브러리 지문 (스키마·파싱·복원 로직, pandas/pydantic)"""
+    import pydantic
+    from src.io_utils import storage
+    h = hashlib.blake2b(digest_size=8)
+    for path in (__file__, storage.__file__):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    h.update(f"|pandas={pd.__version__}|pydantic={pydantic.VERSION}".encode("utf-8"))
+    return h.hexdigest()
+
+def cache_path(style: str, json_path: Optional[str] = None) -> Optional[str]:
+    src = source_file(json_path or _latest(style), style)
+    try:
+        st = os.stat(src)
+    except FileNotFoundError:
+        return None
+    key = f"{os.path.abspath(src)}|{st.st_size}|{st.st_mtime_ns}|{code_version()}"
+    return f"{VALIDATED_CACHE}/{style}-{hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()}.pkl"
+
+def write_cache(style: str = "reds") -> Tuple[str, Dict[str,int|str]]:
     json_path = _latest(style)
-    raw = json.load(open(json_path, "r", encoding="utf-8"))
+    df, stats = _validate_snapshot(json_path, style)
+    path = cache_path(style, json_path)
+    if path is None:
+        raise FileNotFoundError(f"no snapshot file for style={style}")
+    os.makedirs(VALIDATED_CACHE, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump((df, stats), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    for old in glob.glob(f"{VALIDATED_CACHE}/{style}-*.pkl"):   # 이전 스냅샷용 캐시 정리
+        if os.path.normpath(old) != os.path.normpath(path):
+            os.remove(old)
+    return path, stats
+
+# 6. 검증 실행(통계 함께 반환) — RECO_VALIDATED_CACHE=1 이고 캐시가 있으면 그대로 사용
+def load_latest_frame_with_stats(style: str = "reds") -> tuple[pd.DataFrame, Dict[str,int|str]]:
+    return load_frame_with_stats(style, None)
+
+def load_frame_with_stats(style: str, snap_dir: Optional[str]) -> tuple[pd.DataFrame, Dict[str,int|str]]:
+    """지정 스냅샷 폴더(None = 최신)의 검증 프레임 — 모델 계보(meta["snapshot"])와 맞출 때 사용"""
+    json_path = f"{snap_dir}/wines_{style}.json" if snap_dir else _latest(style)
+    path = cache_path(style, json_path) if os.getenv(CACHE_ENV) == "1" else None
+    if path is not None and os.path.exists(path):
+        with open(path, "rb") as f:
+            df, stats = pickle.load(f)
+        return df, stats
+    return _validate_snapshot(json_path, style)
+
+def _validate_snapshot(json_path: str, style: str) -> tuple[pd.DataFrame, Dict[str,int|str]]:
+    # 7. 원본 로드 (delta 스냅샷이면 부모 체인에서 전체 목록 복원)
+    if os.path.exists(json_path):
+        raw = json.load(open(json_path, "r", encoding="utf-8"))
+    else:
+        raw = reconstruct(os.path.dirname(json_path), style)
     # 8. 초기 통계
     raw_total = len(raw)
     ok_rows, bad_log = [], []
@@ -86,3 +153,20 @@ def load_latest_frame_with_stats(style: str = "reds") -> tuple[pd.DataFrame, Dic
 def load_latest_frame(style: str = "reds") -> pd.DataFrame:
     df, _ = load_latest_frame_with_stats(style)
     return df
+
+# 16. CLI: 스타일별 검증 (+ --cache 면 결과 캐시 저장)
+def main():
+    ap = argparse.ArgumentParser(description="Validate the latest snapshot per style")
+    ap.add_argument("--styles", default="reds,whites,sparkling,rose,port")
+    ap.add_argument("--cache", action="store_true", help="검증 결과를 .cache/validated 에 저장")
+    args = ap.parse_args()
+    for style in [s.strip() for s in args.styles.split(",") if s.strip()]:
+        if args.cache:
+            path, stats = write_cache(style)
+        else:
+            path, (_, stats) = None, _validate_snapshot(_latest(style), style)
+        print(f"[VALIDATE] {style:<10} ok={stats['validated_ok']} bad={stats['invalid_bad']} "
+              f"dup={stats['duplicates_removed']} rows={stats['final_rows']}" + (f" -> {path}" if path else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from sklearn.metrics.pairwise import linear_kernel
+from src import app as app_module
+from src.io_utils.bundle import bundle_path, write_bundle
+from src.reco.embed import fit_tfidf
+from src.serving.cache import ModelCache
+
+CORPUS = ["pinot noir napa valley", "bordeaux merlot blend", "rioja tempranillo reserva",
+          "napa cabernet sauvignon", "champagne brut france", "pinot grigio italy"]
+
+def _client(tmp_path, monkeypatch):
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 2), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, [100 + i for i in range(len(CORPUS))])
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", str(tmp_path))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    return TestClient(app_module.app), vec, X
+
+def test_recommend_from_local_bundle(tmp_path, monkeypatch):
+    client, vec, X = _client(tmp_path, monkeypatch)
+    r = client.get("/recommend", params={"style": "reds", "query": "Napa pinot", "k": 3})
+    assert r.status_code == 200
+    top = r.json()["top_k"]
+    expected = linear_kernel(X, vec.transform(["Napa pinot"])).ravel()
+    assert [t["id"] for t in top][0] == 100 + int(np.argmax(expected))
+    assert np.isclose(top[0]["score"], expected.max())
+    info = client.get("/info", params={"style": "reds"}).json()
+    assert info["rows"] == len(CORPUS) and info["num_ids"] == len(CORPUS)
+    assert info["cache"]["entries"] == [{"style": "reds", "bytes": info["model_bytes"]}]
+    assert 0 < info["model_bytes"] <= info["cache"]["resident_bytes"]
+
+def test_coalesced_results_match_single_path(tmp_path, monkeypatch):
+    import asyncio, httpx
+    from src.serving.coalesce import Coalescer
+    client, _, _ = _client(tmp_path, monkeypatch)
+    queries = ["napa pinot", "bordeaux", "italy", "zzz", "rioja reserva", "pinot"]
+    single = [client.get("/recommend", params={"query": q, "k": 4}).json() for q in queries]
+
+    coalescer = Coalescer(app_module._recommend_batch, window_ms=20, max_batch=4)
+    monkeypatch.setattr(app_module, "_coalescer", coalescer)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            rs = await asyncio.gather(*[ac.get("/recommend", params={"query": q, "k": 4}) for q in queries])
+        return [r.json() for r in rs]
+
+    batched = asyncio.run(main())
+    assert coalescer.stats["batches"] < len(queries)
+    for a, b in zip(single, batched):
+        assert [t["id"] for t in a["top_k"]] == [t["id"] for t in b["top_k"]]
+        assert np.allclose([t["score"] for t in a["top_k"]], [t["score"] for t in b["top_k"]])
+
+def test_user_recommendations_from_kv_store(tmp_path, monkeypatch):
+    from src.io_utils.kvstore import publish
+    client, _, _ = _client(tmp_path, monkeypatch)
+    monkeypatch.setattr(app_module, "USER_RECO_DIR", str(tmp_path / "user_reco"))
+    monkeypatch.setattr(app_module, "_user_stores", {})
+    assert client.get("/users/u01/recommendations").status_code == 404
+    publish(str(tmp_path / "user_reco"), "all", "v1", [("u01", b'{"user_id": "u01", "items": [{"id": 1}]}')])
+    r = client.get("/users/u01/recommendations", params={"style": "all"})
+    assert r.status_code == 200 and r.json()["items"] == [{"id": 1}]
+    publish(str(tmp_path / "user_reco"), "all", "v2", [("u01", b'{"user_id": "u01", "items": []}')])
+    assert client.get("/users/u01/recommendations").json()["items"] == []
+    # 같은 버전으로 다시 게시(예: users/k 만 바뀐 재실행)해도 새 파일을 연다
+    publish(str(tmp_path / "user_reco"), "all", "v2", [("u01", b'{"user_id": "u01", "items": [{"id": 2}]}')])
+    assert client.get("/users/u01/recommendations").json()["items"] == [{"id": 2}]
+    assert client.get("/users/u99/recommendations").status_code == 404
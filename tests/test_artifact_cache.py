@@ -0,0 +1,150 @@
+import os, threading, time
+import pytest
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.io_utils.artifact_cache import ArtifactCacheError, ArtifactResolver, Resolved, link_into
+from src.io_utils.bundle import bundle_path, write_bundle
+from src.reco.embed import fit_tfidf
+from src.serving.cache import ModelCache
+
+class FakeBackend:
+    """ref → (digest, files). download 은 느리게(경쟁 유도) 파일을 쓴다."""
+    def __init__(self, versions, delay=0.0):
+        self.versions = versions
+        self.delay = delay
+        self.calls = 0
+        self.fail_resolve = False
+        self.resolve_error = None
+        self._lock = threading.Lock()
+
+    def resolve(self, ref, type=None):
+        if self.fail_resolve:
+            raise ConnectionError("network down")
+        if self.resolve_error is not None:
+            raise self.resolve_error
+        digest, _ = self.versions[ref]
+        return Resolved(digest=digest, name=ref.replace(":latest", f":{digest}"), handle=ref)
+
+    def download(self, resolved, dest):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        for name, data in self.versions[resolved.handle][1].items():
+            with open(os.path.join(dest, name), "wb") as f:
+                f.write(data)
+
+REF = "ent/proj/tfidf-reds:latest"
+
+def test_fetch_downloads_once_and_records_alias(tmp_path):
+    backend = FakeBackend({REF: ("d1", {"a.txt": b"one"})})
+    path = ArtifactResolver(str(tmp_path), backend).fetch(REF)
+    assert open(os.path.join(path, "a.txt"), "rb").read() == b"one"
+    # 새 프로세스(새 리졸버)도 같은 다이제스트면 다운로드 없음
+    assert ArtifactResolver(str(tmp_path), backend).fetch(REF) == path and backend.calls == 1
+    # :latest 가 새 다이제스트로 이동 → 한 번 더 다운로드, 이전 객체는 유지
+    backend.versions[REF] = ("d2", {"a.txt": b"two"})
+    r = ArtifactResolver(str(tmp_path), backend)
+    path2 = r.fetch(REF)
+    assert path2 != path and os.path.isdir(path) and backend.calls == 2
+    aliases = r.aliases()
+    assert aliases[REF]["digest"] == "d2" and aliases["ent/proj/tfidf-reds:d2"]["digest"] == "d2"
+    assert os.listdir(tmp_path / "tmp") == []
+
+def test_concurrent_fetch_single_download(tmp_path):
+    backend = FakeBackend({REF: ("d1", {"a.txt": b"x" * 1000})}, delay=0.2)
+    paths = []
+    def work():
+        paths.append(ArtifactResolver(str(tmp_path), backend).fetch(REF))
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert backend.calls == 1 and len(set(paths)) == 1 and len(paths) == 6
+
+def test_offline_resolution_from_alias_map(tmp_path):
+    backend = FakeBackend({REF: ("d1", {"a.txt": b"one"})})
+    online = ArtifactResolver(str(tmp_path), backend, offline=False).fetch(REF)
+    assert ArtifactResolver(str(tmp_path), None, offline=True).fetch(REF) == online
+    backend.fail_resolve = True
+    assert ArtifactResolver(str(tmp_path), backend, offline=False).fetch(REF) == online
+    with pytest.raises(ArtifactCacheError):
+        ArtifactResolver(str(tmp_path), backend, offline=False).fetch("ent/proj/tfidf-whites:latest")
+    with pytest.raises(ArtifactCacheError):
+        ArtifactResolver(str(tmp_path), None, offline=True).fetch("ent/proj/tfidf-whites:latest")
+
+def test_non_network_resolve_errors_propagate(tmp_path):
+    backend = FakeBackend({REF: ("d1", {"a.txt": b"1"})})
+    ArtifactResolver(str(tmp_path), backend, offline=False).fetch(REF)
+    # 인증 실패/삭제된 아티팩트는 캐시 별칭이 있어도 오프라인 폴백하지 않는다
+    for err in (PermissionError("401 unauthorized"), ValueError("artifact not found")):
+        backend.resolve_error = err
+        with pytest.raises(type(err)):
+            ArtifactResolver(str(tmp_path), backend, offline=False).fetch(REF)
+
+    class CommError(Exception):   # wandb.errors.CommError 처럼 원인을 .exc 로 감싼 경우
+        def __init__(self, exc):
+            super().__init__(str(exc))
+            self.exc = exc
+    backend.resolve_error = CommError(TimeoutError("timed out"))
+    assert ArtifactResolver(str(tmp_path), backend, offline=False).fetch(REF)
+
+def test_failed_download_publishes_nothing(tmp_path):
+    class Broken(FakeBackend):
+        def download(self, resolved, dest):
+            open(os.path.join(dest, "partial"), "wb").close()
+            raise IOError("connection reset")
+    r = ArtifactResolver(str(tmp_path), Broken({REF: ("d1", {})}))
+    with pytest.raises(IOError):
+        r.fetch(REF)
+    assert not os.path.exists(r.object_dir("d1")) and os.listdir(tmp_path / "tmp") == []
+    assert REF not in r.aliases()
+
+def test_link_into_points_at_cache(tmp_path):
+    src = tmp_path / "objects" / "d1"
+    src.mkdir(parents=True)
+    (src / "f").write_text("v")
+    dest = str(tmp_path / "artifacts" / "best")
+    link_into(str(src), dest)
+    link_into(str(src), dest)
+    assert open(os.path.join(dest, "f")).read() == "v"
+
+def test_link_into_refuses_foreign_directory(tmp_path, monkeypatch):
+    src = tmp_path / "objects" / "d1"
+    src.mkdir(parents=True)
+    (src / "f").write_text("v")
+    dest = tmp_path / "artifacts" / "best"
+    dest.mkdir(parents=True)
+    (dest / "mine").write_text("keep")
+    with pytest.raises(ArtifactCacheError):
+        link_into(str(src), str(dest))
+    assert (dest / "mine").read_text() == "keep"
+    link_into(str(src), str(dest), force=True)
+    assert os.path.islink(dest) and (dest / "f").read_text() == "v"
+
+    # 심볼릭 링크가 안 되는 환경: 복사본은 표식을 남겨 다음 실행에서 교체 가능
+    def no_symlink(*a, **kw):
+        raise OSError("symlinks not supported")
+    monkeypatch.setattr(os, "symlink", no_symlink)
+    os.remove(dest)
+    link_into(str(src), str(dest))
+    (src / "g").write_text("w")
+    link_into(str(src), str(dest))
+    assert not os.path.islink(dest) and (dest / "g").read_text() == "w"
+
+def test_app_loads_model_through_resolver(tmp_path, monkeypatch):
+    corpus = ["pinot noir napa", "bordeaux merlot", "rioja reserva"]
+    vec, X = fit_tfidf(corpus, ngram=(1, 1), min_df=1)
+    staged = tmp_path / "staged"
+    staged.mkdir()
+    write_bundle(bundle_path(str(staged), "reds"), vec, X, [1, 2, 3])
+    files = {n: (staged / n).read_bytes() for n in os.listdir(staged)}
+    ref = f"{app_module.WANDB_ENTITY}/{app_module.WANDB_PROJECT}/tfidf-reds:latest"
+    backend = FakeBackend({ref: ("abc", files)})
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", None)
+    monkeypatch.setattr(app_module, "_resolver", ArtifactResolver(str(tmp_path / "cache"), backend))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    client = TestClient(app_module.app)
+    r = client.get("/recommend", params={"style": "reds", "query": "rioja", "k": 1})
+    assert r.status_code == 200 and r.json()["top_k"][0]["id"] == 3
+    assert backend.calls == 1
@@ -0,0 +1,52 @@
+import json
+import pytest
+from joblib import dump
+from scipy import sparse
+from src.reco.embed import fit_tfidf
+from src.io_utils.bundle import (BundleError, bundle_path, write_bundle, read_bundle,
+                                 load_style_model, load_all_model, bundle_from_files)
+
+CORPUS = ["Pinot Noir from Napa Valley", "Bordeaux blend, Château Margaux",
+          "Rioja tempranillo", "Napa cabernet sauvignon", "Crémant de Bourgogne"]
+
+def test_bundle_roundtrip_and_transform(tmp_path):
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 2), min_df=1)
+    path = bundle_path(str(tmp_path), "reds")
+    write_bundle(path, vec, X, [10, 11, 12, 13, 14], meta={"style": "reds"})
+    b = read_bundle(path)
+    assert b.meta["style"] == "reds" and b.meta["rows"] == 5
+    assert (b.X != X).nnz == 0
+    assert b.ids.tolist() == [10, 11, 12, 13, 14]
+    q = ["napa pinot", "château bourgogne", "nothing here"]
+    assert (b.vectorizer().transform(q) != vec.transform(q)).nnz == 0
+
+def test_bundle_checksum_mismatch(tmp_path):
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 1), min_df=1)
+    path = bundle_path(str(tmp_path), "reds")
+    write_bundle(path, vec, X, list(range(5)))
+    raw = bytearray(open(path, "rb").read())
+    raw[-70] ^= 0xFF
+    open(path, "wb").write(bytes(raw))
+    with pytest.raises(BundleError):
+        read_bundle(path)
+
+def test_load_prefers_bundle_and_keeps_all_keys(tmp_path):
+    d = str(tmp_path)
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 1), min_df=1)
+    keys = [{"style": s, "id": i} for s, i in zip(["reds", "whites", "reds", "reds", "sparkling"], range(5))]
+    dump(vec, f"{d}/tfidf_all.pkl")
+    sparse.save_npz(f"{d}/X_all.npz", X)
+    json.dump(keys, open(f"{d}/keys_all.json", "w"))
+    json.dump({"styles": ["reds", "whites", "sparkling"]}, open(f"{d}/meta_all.json", "w"))
+    legacy = load_all_model(d)
+
+    bundle_from_files(d, "all")
+    for name in ("tfidf_all.pkl", "X_all.npz", "keys_all.json"):
+        (tmp_path / name).unlink()
+    _, X2, keys2, styles2 = load_all_model(d)
+    assert keys2 == keys == legacy[2]
+    assert styles2 == ["reds", "whites", "sparkling"]
+    assert (X2 != X).nnz == 0
+
+    with pytest.raises(FileNotFoundError):
+        load_style_model(d, "reds")
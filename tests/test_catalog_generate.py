@@ -0,0 +1,23 @@
+from collections import Counter
+from src.pipelines.catalog_generate import synth_wines, write_snapshot, COUNTRIES
+from src.validate import Wine, _country_from_location, load_latest_frame_with_stats
+
+def test_records_follow_wine_schema():
+    items = synth_wines(2000, seed=3, start_id=10)
+    assert items == synth_wines(2000, seed=3, start_id=10)
+    assert [w["id"] for w in items[:3]] == [10, 11, 12]
+    for w in items[:200]:
+        Wine(**w, style="reds")
+        assert _country_from_location(w["location"]) in COUNTRIES
+        assert float(w["rating"]["average"]) >= 2.5 and w["rating"]["reviews"].endswith(" ratings")
+    # 와이너리 Zipf: 상위 와이너리가 평균보다 훨씬 많다
+    counts = Counter(w["winery"] for w in items).most_common()
+    assert counts[0][1] > 10 * len(items) / len(counts)
+
+def test_snapshot_roundtrip_through_validate(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_snapshot("data/snapshots/20000101-000000", ["reds"], 500, seed=1, invalid_rate=0.05)
+    df, stats = load_latest_frame_with_stats("reds")
+    assert stats["raw_total"] == 500 and stats["invalid_bad"] > 0
+    assert len(df) == stats["validated_ok"] == 500 - stats["invalid_bad"]
+    assert set(df["country"]) <= set(COUNTRIES)
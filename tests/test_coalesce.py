@@ -0,0 +1,33 @@
+import asyncio
+import pytest
+from src.serving.coalesce import Coalescer
+
+def test_batches_by_size_and_window():
+    calls = []
+    def run_batch(key, items):
+        calls.append((key, list(items)))
+        return [f"{key}:{x}" for x in items]
+
+    async def main():
+        c = Coalescer(run_batch, window_ms=50, max_batch=4)
+        reqs = [c.submit("reds", i) for i in range(6)] + [c.submit("whites", 9)]
+        return await asyncio.gather(*reqs), c.stats
+
+    out, stats = asyncio.run(main())
+    assert out == [f"reds:{i}" for i in range(6)] + ["whites:9"]
+    assert sorted(len(items) for _, items in calls) == [1, 2, 4]
+    assert stats["batches"] == 3 and stats["items"] == 7
+
+def test_errors_reach_every_waiter():
+    def run_batch(key, items):
+        raise RuntimeError("boom")
+
+    async def main():
+        c = Coalescer(run_batch, window_ms=1, max_batch=8)
+        return await asyncio.gather(c.submit("reds", 1), c.submit("reds", 2), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+def test_rejects_bad_config():
+    with pytest.raises(ValueError):
+        Coalescer(lambda k, xs: xs, window_ms=1, max_batch=0)
@@ -0,0 +1,120 @@
+import sys, time
+from src.pipelines.dag import Stage, run_dag
+
+def _stage(name, code, deps=(), inputs=(), outputs=()):
+    return Stage(name, ["-c", code], deps=list(deps),
+                 inputs=lambda: list(inputs), outputs=lambda: list(outputs))
+
+def _graph(tmp_path, sleep=0.0):
+    src, a, b, c = (str(tmp_path / n) for n in ("src.txt", "a.txt", "b.txt", "c.txt"))
+    cp = "import sys,time; time.sleep({s}); open(sys.argv[2],'w').write(open(sys.argv[1]).read()+'{tag}')"
+    def copy(name, i, o, deps=(), tag=""):
+        st = _stage(name, cp.format(s=sleep, tag=tag), deps, [i], [o])
+        st.argv += [i, o]
+        return st
+    return src, [copy("a", src, a), copy("b", a, b, ["a"], "b"), copy("c", a, c, ["a"], "c")]
+
+def _status(results):
+    return {r["stage"]: r["status"] for r in results}
+
+def test_skips_unchanged_and_reruns_dependents(tmp_path):
+    src, stages = _graph(tmp_path)
+    open(src, "w").write("v1")
+    kw = dict(state_path=str(tmp_path / "state.json"), log_dir=str(tmp_path / "logs"))
+    assert _status(run_dag(stages, **kw)) == {"a": "ok", "b": "ok", "c": "ok"}
+    assert open(tmp_path / "b.txt").read() == "v1b"
+    assert _status(run_dag(stages, **kw)) == {"a": "skipped", "b": "skipped", "c": "skipped"}
+
+    (tmp_path / "c.txt").write_text("tampered")          # 출력이 바뀌면 그 단계만 다시
+    assert _status(run_dag(stages, **kw)) == {"a": "skipped", "b": "skipped", "c": "ok"}
+
+    open(src, "w").write("v2")                           # 입력 변경 → 하류 전부
+    assert _status(run_dag(stages, **kw)) == {"a": "ok", "b": "ok", "c": "ok"}
+    assert open(tmp_path / "c.txt").read() == "v2c"
+    assert _status(run_dag(stages, dry_run=True, **kw)) == {"a": "skipped", "b": "skipped", "c": "skipped"}
+
+def test_independent_stages_run_in_parallel(tmp_path):
+    src, stages = _graph(tmp_path, sleep=0.6)
+    open(src, "w").write("v1")
+    t0 = time.perf_counter()
+    res = run_dag(stages, jobs=2, state_path=str(tmp_path / "state.json"), log_dir=str(tmp_path / "logs"))
+    wall = time.perf_counter() - t0
+    assert _status(res) == {"a": "ok", "b": "ok", "c": "ok"}
+    assert wall < sum(r["seconds"] for r in res) - 0.3     # b, c 가 겹쳐 실행됨
+
+def test_failure_blocks_downstream(tmp_path):
+    kw = dict(state_path=str(tmp_path / "state.json"), log_dir=str(tmp_path / "logs"))
+    stages = [_stage("bad", "import sys; print('boom'); sys.exit(3)"),
+              _stage("after", "pass", ["bad"]), _stage("other", "pass")]
+    res = _status(run_dag(stages, **kw))
+    assert res == {"bad": "failed", "after": "blocked", "other": "ok"}
+    assert "boom" in (tmp_path / "logs" / "bad.log").read_text()
+    missing = _stage("needs", "pass", inputs=[str(tmp_path / "nope.txt")])
+    assert _status(run_dag([missing], **kw)) == {"needs": "failed"}
+
+def test_cycle_is_rejected(tmp_path):
+    import pytest
+    stages = [_stage("x", "pass", ["y"]), _stage("y", "pass", ["x"])]
+    with pytest.raises(ValueError):
+        run_dag(stages, state_path=str(tmp_path / "s.json"), log_dir=str(tmp_path / "logs"))
+
+def test_pipeline_graph_and_validated_cache(tmp_path, monkeypatch):
+    import json, os
+    from src import validate
+    from src.pipelines.catalog_generate import synth_wines
+    from src.pipelines.dag import pipeline_stages
+    monkeypatch.chdir(tmp_path)
+    snap = tmp_path / "data" / "snapshots" / "20250101-000000"
+    snap.mkdir(parents=True)
+    (snap / "wines_reds.json").write_text(json.dumps(synth_wines(50, seed=2)), encoding="utf-8")
+
+    stages = {s.name: s for s in pipeline_stages(["reds"])}
+    assert stages["embed_fit:reds"].deps == ["validate:reds"]
+    assert set(stages["eval_report:reds"].deps) == {"embed_fit:reds", "users_generate"}
+    assert stages["validate:reds"].inputs() == ["data/snapshots/20250101-000000/wines_reds.json"]
+    assert stages["validate:reds"].outputs() == [validate.cache_path("reds")]
+    custom = {s.name: s for s in pipeline_stages(["reds"], outdir="out")}
+    for name in ("embed_fit:reds", "eval_report:reds", "reco_export:reds"):   # 모든 모델 단계가 같은 디렉터리
+        argv = custom[name].argv
+        flag = "--outdir" if name.startswith("embed_fit") else "--artifacts"
+        assert argv[argv.index(flag) + 1] == "out"
+
+    assert all(stages[n].env == {validate.CACHE_ENV: "1"} for n in ("embed_fit:reds", "eval_report:reds"))
+
+    path, stats = validate.write_cache("reds")
+    assert os.path.exists(path) and stats["final_rows"] == 50
+    real = validate._validate_snapshot
+    monkeypatch.setattr(validate, "_validate_snapshot", lambda *a: (_ for _ in ()).throw(AssertionError))
+    monkeypatch.setenv(validate.CACHE_ENV, "1")
+    df, cached = validate.load_latest_frame_with_stats("reds")    # 캐시에서 (재검증 없음)
+    assert len(df) == 50 and cached == stats
+
+    calls = []
+    monkeypatch.setattr(validate, "_validate_snapshot", lambda *a: calls.append(a) or real(*a))
+    monkeypatch.delenv(validate.CACHE_ENV)                         # 명시적 opt-in 없으면 항상 검증
+    validate.load_latest_frame_with_stats("reds")
+    monkeypatch.setenv(validate.CACHE_ENV, "1")
+    monkeypatch.setattr(validate, "code_version", lambda: "other")  # 검증 코드가 바뀌면 다른 키
+    assert validate.cache_path("reds") != path
+    validate.load_latest_frame_with_stats("reds")
+    assert len(calls) == 2
+
+def test_transitive_local_import_change_reruns(tmp_path, monkeypatch):
+    # 임시 트리의 src 패키지: a → b (모듈 수준) → c (함수 안 지연 임포트)
+    pkg = tmp_path / "src"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    (pkg / "a.py").write_text("import sys\nfrom src.b import tag\nopen(sys.argv[1], 'w').write(tag())\n")
+    (pkg / "b.py").write_text("def tag():\n    from src import c\n    return c.TAG\n")
+    (pkg / "c.py").write_text("TAG = 'v1'\n")
+    (pkg / "unused.py").write_text("")
+    monkeypatch.chdir(tmp_path)
+    out = str(tmp_path / "out.txt")
+    stage = Stage("a", ["-m", "src.a", out], outputs=lambda: [out])
+    kw = dict(state_path=str(tmp_path / "state.json"), log_dir=str(tmp_path / "logs"))
+    assert _status(run_dag([stage], **kw)) == {"a": "ok"}
+    (pkg / "unused.py").write_text("X = 1\n")                 # 임포트되지 않는 모듈 → 건너뜀
+    assert _status(run_dag([stage], **kw)) == {"a": "skipped"}
+    (pkg / "c.py").write_text("TAG = 'v2 changed'\n")         # 전이적 임포트 변경 → 다시 실행
+    assert _status(run_dag([stage], **kw)) == {"a": "ok"}
+    assert open(out).read() == "v2 changed"
@@ -0,0 +1,72 @@
+import json
+import numpy as np
+from src.io_utils.bundle import bundle_path, read_bundle, write_bundle
+from src.pipelines import drift
+from src.pipelines.catalog_generate import synth_wines
+from src.pipelines.embed_fit import _incremental
+from src.reco.corpus import build_corpus
+from src.reco.embed import fit_tfidf
+from src.reco.sketch import HyperLogLog
+from src.validate import load_latest_frame
+
+def test_hll_estimate_and_merge():
+    a = HyperLogLog(12)
+    a.add(f"term-{i}" for i in range(50_000))
+    assert abs(a.count() - 50_000) / 50_000 < 0.05
+    sub = HyperLogLog(12)
+    sub.add(f"term-{i}" for i in range(100, 20_000))
+    assert a.merge(sub).count() == a.count()              # 부분집합 → 새 원소 0
+    assert HyperLogLog.from_b64(a.to_b64()).count() == a.count()
+
+def test_df_recovered_from_idf():
+    corpus = ["pinot noir napa", "pinot noir sonoma", "cabernet napa", "rioja", "napa napa"]
+    vec, X = fit_tfidf(corpus, ngram=(1, 1), min_df=1)
+    df = np.bincount(X.indices, minlength=X.shape[1])
+    assert (drift.df_from_idf(vec.idf_, len(corpus)) == df).all()
+
+def _snapshot(tmp_path, name, rows):
+    d = tmp_path / "data" / "snapshots" / name
+    d.mkdir(parents=True)
+    (d / "wines_reds.json").write_text(json.dumps(rows), encoding="utf-8")
+    return f"data/snapshots/{name}"
+
+def _fit(snap, outdir="artifacts", lineage=True):
+    df = load_latest_frame("reds")
+    corpus = build_corpus(df)
+    vec, X = fit_tfidf(corpus, ngram=(1, 2), min_df=2)
+    meta = drift.fit_lineage(snap, X.shape[0], df["country"], corpus) if lineage else {}
+    write_bundle(bundle_path(outdir, "reds"), vec, X, df["id"].astype(int).tolist(), meta=meta)
+
+def test_decisions_follow_drift(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "artifacts").mkdir()
+    rows = synth_wines(600, seed=1)
+    a = _snapshot(tmp_path, "20250101-000000", rows)
+    _fit(a, lineage=False)
+    assert drift.compute("reds")["decision"] == "refit"    # 계보 없는 기존 번들
+    _fit(a)
+    assert drift.compute("reds")["decision"] == "skip"
+
+    # 소수 행 변경 → 증분
+    small = [dict(r) for r in rows[5:]]
+    for r in small[:10]:
+        r["wine"] += " Riserva"
+    b = _snapshot(tmp_path, "20250102-000000", small)
+    d = drift.compute("reds")
+    assert d["decision"] == "incremental" and d["baseline"] == a
+    assert d["stats"]["ids"] == {"base": 600, "current": 595, "churn": round(15 / 600, 4),
+                                 "added": 0, "changed": 10, "removed": 5}
+
+    # 증분 임베딩 = 기존 어휘로 전체를 다시 transform 한 것과 같다
+    old = read_bundle(bundle_path("artifacts", "reds"))
+    df = load_latest_frame("reds")
+    vec, X, lineage = _incremental("reds", "artifacts", df, b)
+    assert abs(X - old.vectorizer().transform(build_corpus(df))).max() < 1e-12
+    assert lineage["fit_snapshot"] == a and lineage["idf_rows"] == 600
+
+    # 새 카탈로그(국가/어휘/id 전부 변경) → 재학습
+    _snapshot(tmp_path, "20250103-000000", synth_wines(600, seed=9, start_id=10_000))
+    d = drift.compute("reds")
+    assert d["decision"] == "refit" and any(r.startswith("churn") for r in d["reasons"])
+    path = drift.write_decision(d, "artifacts")
+    assert json.load(open(path))["decision"] == "refit"
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.io_utils.bundle import bundle_path, write_bundle
+from src.reco.embed import fit_tfidf
+from src.serving.cache import ModelCache
+from src.serving.federated import merge_topk
+
+def test_merge_topk_order_and_tags():
+    shards = [("reds", [{"id": 1, "score": 0.9}, {"id": 2, "score": 0.5}]),
+              ("whites", [{"id": 1, "score": 0.7}, {"id": 3, "score": 0.5}, {"id": 4, "score": 0.1}]),
+              ("rose", [])]
+    top = merge_topk(shards, 4)
+    assert [(h["style"], h["id"]) for h in top] == [("reds", 1), ("whites", 1), ("reds", 2), ("whites", 3)]
+    assert merge_topk(shards, 0) == [] and len(merge_topk(shards, 10)) == 5
+
+SHARDS = {"reds": ["pinot noir napa", "cabernet napa", "rioja tempranillo"],
+          "whites": ["chardonnay napa", "riesling mosel", "pinot grigio veneto", "sauvignon blanc loire"]}
+
+def _client(tmp_path, monkeypatch):
+    for style, corpus in SHARDS.items():
+        vec, X = fit_tfidf(corpus, ngram=(1, 1), min_df=1)
+        write_bundle(bundle_path(str(tmp_path), style), vec, X, list(range(len(corpus))))
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", str(tmp_path))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    return TestClient(app_module.app)
+
+def test_styles_param_merges_shards(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    per = {s: client.get("/recommend", params={"style": s, "query": "napa pinot", "k": 3}).json()["top_k"]
+           for s in SHARDS}
+    expected = sorted(((h["score"], s, h["id"]) for s, hits in per.items() for h in hits),
+                      key=lambda t: -t[0])[:3]
+    r = client.get("/recommend", params={"styles": "reds,whites", "query": "napa pinot", "k": 3}).json()
+    assert r["styles"] == ["reds", "whites"] and "missing" not in r
+    assert [(h["score"], h["style"], h["id"]) for h in r["top_k"]] == expected
+    assert r["top_k"][0]["style"] == "reds"
+
+def test_styles_param_reports_missing_shards(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    r = client.get("/recommend", params={"styles": "reds,whites,port", "query": "mosel riesling", "k": 2,
+                                         "pref_styles": "whites"}).json()
+    assert r["missing"] == ["port"] and r["reranked"]
+    assert r["top_k"][0] == {**r["top_k"][0], "style": "whites", "id": 1}
+    assert client.get("/recommend", params={"styles": "port", "query": "x"}).status_code == 404
+
+def test_shard_errors_other_than_missing_model_propagate(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    real = app_module.load_model
+
+    def broken(style="reds"):
+        if style == "whites":
+            raise ValueError("corrupt bundle")
+        return real(style)
+    monkeypatch.setattr(app_module, "load_model", broken)
+    with pytest.raises(ValueError):
+        client.get("/recommend", params={"styles": "reds,whites", "query": "napa"})
+
+def test_style_all_uses_combined_model(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    corpus = SHARDS["reds"] + SHARDS["whites"]
+    vec, X = fit_tfidf(corpus, ngram=(1, 1), min_df=1)
+    key_styles = np.array([0] * len(SHARDS["reds"]) + [1] * len(SHARDS["whites"]), dtype=np.int32)
+    ids = list(range(len(SHARDS["reds"]))) + list(range(len(SHARDS["whites"])))
+    write_bundle(bundle_path(str(tmp_path), "all"), vec, X, ids,
+                 meta={"style": "all", "styles": ["reds", "whites"]}, key_styles=key_styles)
+    r = client.get("/recommend", params={"style": "all", "query": "mosel riesling", "k": 2}).json()
+    assert r["style"] == "all" and "styles" not in r
+    assert r["top_k"][0]["style"] == "whites" and r["top_k"][0]["id"] == 1
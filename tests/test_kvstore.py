@@ -0,0 +1,30 @@
+import json
+from src.io_utils.kvstore import write_kv, KVReader, publish, current_path
+
+def test_kv_roundtrip(tmp_path):
+    path = str(tmp_path / "s.kv")
+    items = [(f"u{i}", json.dumps({"i": i}).encode()) for i in range(5000)] + [("유저", b"\x00bin")]
+    write_kv(path, items + [("u7", b"last")], meta={"k": 3})
+    with KVReader(path) as r:
+        assert len(r) == 5001 and r.meta == {"k": 3}
+        assert json.loads(r.get("u4321")) == {"i": 4321}
+        assert r.get("u7") == b"last"
+        assert r.get("유저") == b"\x00bin"
+        assert r.get("u5000") is None and r.get("") is None
+
+def test_publish_switches_current(tmp_path):
+    d = str(tmp_path)
+    assert current_path(d, "all") is None
+    p1 = publish(d, "all", "aaa", [("u1", b"1")])
+    p2 = publish(d, "all", "bbb", [("u1", b"2")])
+    assert current_path(d, "all") == p2 != p1
+    with KVReader(current_path(d, "all")) as r:
+        assert r.get("u1") == b"2" and r.meta["version"] == "bbb"
+
+def test_is_current_detects_rewrite_under_same_version(tmp_path):
+    d = str(tmp_path)
+    r = KVReader(publish(d, "all", "aaa", [("u1", b"1")]))
+    assert r.is_current(current_path(d, "all"))
+    publish(d, "all", "aaa", [("u1", b"22")])   # 같은 버전 이름으로 다시 게시
+    assert not r.is_current(current_path(d, "all"))
+    r.close()
@@ -0,0 +1,50 @@
+import asyncio, json
+import httpx
+from src import app as app_module
+from src.io_utils.bundle import bundle_path, write_bundle
+from src.pipelines import loadtest
+from src.reco.embed import fit_tfidf
+from src.serving.cache import ModelCache
+
+CORPUS = ["pinot noir napa valley", "bordeaux merlot blend", "rioja tempranillo reserva",
+          "napa cabernet sauvignon", "champagne brut france", "pinot grigio italy"]
+
+def _setup(tmp_path, monkeypatch):
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 2), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, list(range(len(CORPUS))))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    monkeypatch.setattr(app_module, "USER_RECO_DIR", str(tmp_path / "none"))
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", str(tmp_path))
+    return loadtest.make_client(None, None, timeout=10)
+
+def test_synth_uses_unigram_vocabulary(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    terms, idf = loadtest.vocabulary_terms(str(tmp_path), "reds")
+    assert "pinot" in terms and all(" " not in t for t in terms) and len(idf) == len(terms)
+    reqs = loadtest.synth_requests(terms, idf, 200, k=3, user_ids=["u1"], user_ratio=0.5, seed=1)
+    assert reqs == loadtest.synth_requests(terms, idf, 200, k=3, user_ids=["u1"], user_ratio=0.5, seed=1)
+    rec = [r for r in reqs if r["path"] == "/recommend"]
+    assert 50 < len(rec) < 150
+    assert all(1 <= len(r["params"]["query"].split()) <= 3 for r in rec)
+
+def test_closed_and_open_loop_report(tmp_path, monkeypatch):
+    client = _setup(tmp_path, monkeypatch)
+    replay = tmp_path / "requests.jsonl"
+    lines = [{"query": "napa pinot", "k": 2}, {"path": "/info", "params": {"style": "reds"}},
+             {"path": "/users/u9/recommendations"}, {"request_id": "x", "title": "not a request"}]
+    replay.write_text("\n".join(json.dumps(l) for l in lines) + "\n", encoding="utf-8")
+    reqs = loadtest.load_requests(str(replay))
+    assert [r["path"] for r in reqs] == ["/recommend", "/info", "/users/u9/recommendations"]
+
+    report = asyncio.run(loadtest.run(client, reqs * 10, "closed", 4, None, None, 3, 0))
+    eps = report["endpoints"]
+    assert set(eps) == {"/recommend", "/info", loadtest.USER_PATH}
+    assert eps["/recommend"]["requests"] == 10 and eps["/recommend"]["errors"] == 0
+    assert eps[loadtest.USER_PATH]["error_rate"] == 1.0          # 스토어 없음 → 404
+    assert report["overall"]["requests"] == 30
+    lat = eps["/info"]["latency_ms"]
+    assert 0 < lat["p50"] <= lat["p95"] <= lat["p99"] <= lat["max"]
+
+    client = loadtest.make_client(None, None, timeout=10)
+    report = asyncio.run(loadtest.run(client, reqs[:1], "open", 1, 500.0, 0.2, 0, 0))
+    assert report["overall"]["requests"] > 20 and report["overall"]["errors"] == 0
@@ -0,0 +1,98 @@
+import json, math
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.io_utils.bundle import bundle_path, write_bundle
+from src.pipelines.catalog_generate import synth_wines
+from src.reco.embed import fit_tfidf
+from src.serving.cache import ModelCache
+from src.serving.metadata import FIELDS, ItemMetadata, parse_fields
+from src.serving.pagination import CursorCache
+
+def test_columns_roundtrip_and_missing():
+    recs = [{"wine": "Rioja 2019", "winery": "Bodega", "country": "Spain",
+             "rating": {"average": 4.2, "reviews": "1,204 ratings"}, "image": "https://x/1.png"},
+            None,
+            {"wine": "Barolo", "winery": "Bodega", "country": "Italy", "rating": None}]
+    meta = ItemMetadata.from_records(recs)
+    assert len(meta) == 3 and len(meta.text["winery"].offsets) == 2   # 와이너리 값 1개만 저장
+    assert meta.row(0, FIELDS) == {"wine": "Rioja 2019", "winery": "Bodega", "country": "Spain",
+                                   "rating": 4.2, "reviews": 1204, "image": "https://x/1.png"}
+    assert meta.row(1, FIELDS) == {f: None for f in FIELDS}
+    assert meta.row(2, ["country", "rating"]) == {"country": "Italy", "rating": None}
+    assert math.isnan(meta.rating[2]) and meta.nbytes() > 0
+    assert parse_fields(None) == list(FIELDS) and parse_fields("") == [] and parse_fields("wine, image") == ["wine", "image"]
+
+def _client(tmp_path, monkeypatch):
+    snap = tmp_path / "data" / "snapshots" / "20250101-000000"
+    snap.mkdir(parents=True)
+    rows = synth_wines(40, seed=3)
+    rows[5]["wine"] = None                     # 검증 실패 행 → 메타데이터 없음
+    (snap / "wines_reds.json").write_text(json.dumps(rows), encoding="utf-8")
+    corpus = [f"{r['winery']} {r['wine'] or ''}" for r in rows]
+    vec, X = fit_tfidf(corpus, ngram=(1, 1), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, [r["id"] for r in rows])
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", str(tmp_path))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    monkeypatch.setattr(app_module, "_pages", CursorCache(16, 300))
+    return TestClient(app_module.app), {r["id"]: r for r in rows}
+
+def test_recommend_returns_display_fields(tmp_path, monkeypatch):
+    client, by_id = _client(tmp_path, monkeypatch)
+    query = by_id[1]["wine"]
+    hits = client.get("/recommend", params={"query": query, "k": 3}).json()["top_k"]
+    for h in hits:
+        raw = by_id[h["id"]]
+        assert h["wine"] == raw["wine"] and h["winery"] == raw["winery"] and h["image"] == raw["image"]
+        assert h["country"] == raw["location"].split("\n")[0]
+        assert h["rating"] == float(raw["rating"]["average"])
+        assert h["reviews"] == int(raw["rating"]["reviews"].split()[0])
+    slim = client.get("/recommend", params={"query": query, "k": 3, "fields": "wine,rating"}).json()["top_k"]
+    assert [set(h) for h in slim] == [{"id", "score", "wine", "rating"}] * 3
+    bare = client.get("/recommend", params={"query": query, "k": 3, "fields": ""}).json()["top_k"]
+    assert [set(h) for h in bare] == [{"id", "score"}] * 3
+    assert client.get("/recommend", params={"query": query, "fields": "price"}).status_code == 400
+
+def test_federated_hits_use_shard_metadata(tmp_path, monkeypatch):
+    client, by_id = _client(tmp_path, monkeypatch)
+    hits = client.get("/recommend", params={"styles": "reds", "query": by_id[2]["wine"], "k": 2}).json()["top_k"]
+    assert hits and all(h["style"] == "reds" and h["winery"] == by_id[h["id"]]["winery"] for h in hits)
+
+def test_bundle_carries_item_metadata(tmp_path, monkeypatch):
+    import pandas as pd
+    from src.io_utils.bundle import read_bundle
+    from src.serving.model import load_serving_model
+    df = pd.DataFrame([{"id": 7, "wine": "Rioja", "winery": "Bodega", "country": "Spain",
+                        "rating": {"average": 4.1, "reviews": "12 ratings"}, "image": None},
+                       {"id": 9, "wine": "Mosel", "winery": None, "country": float("nan"), "rating": None,
+                        "image": "https://x/9.png"}])
+    meta = ItemMetadata.from_frame(df)
+    assert meta.row(1, FIELDS) == {"wine": "Mosel", "winery": None, "country": None, "rating": None,
+                                   "reviews": None, "image": "https://x/9.png"}
+    vec, X = fit_tfidf(["rioja bodega", "mosel riesling"], ngram=(1, 1), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, [7, 9], item_arrays=meta.to_arrays())
+    assert set(read_bundle(bundle_path(str(tmp_path), "reds")).item_arrays) >= {"item_rating", "item_wine_blob"}
+    model = load_serving_model(str(tmp_path), "reds")
+    assert [model.meta.row(i, FIELDS) for i in range(2)] == [meta.row(i, FIELDS) for i in range(2)]
+    assert model.country_names == ["spain"] and model.country_codes.tolist() == [0, -1]
+
+    # 스냅샷이 없어도(또는 깨져 있어도) API 는 번들의 메타데이터로 응답
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", str(tmp_path))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    monkeypatch.setattr(app_module, "_pages", CursorCache(16, 300))
+    hits = TestClient(app_module.app).get("/recommend", params={"query": "rioja", "k": 1}).json()["top_k"]
+    assert hits[0]["id"] == 7 and hits[0]["wine"] == "Rioja" and hits[0]["reviews"] == 12
+
+def test_malformed_snapshot_serves_without_metadata(tmp_path, monkeypatch):
+    snap = tmp_path / "data" / "snapshots" / "20250101-000000"
+    snap.mkdir(parents=True)
+    (snap / "wines_reds.json").write_text("[{not json", encoding="utf-8")
+    vec, X = fit_tfidf(["rioja bodega", "mosel riesling"], ngram=(1, 1), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, [7, 9])   # item_* 없는 이전 번들
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", str(tmp_path))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    monkeypatch.setattr(app_module, "_pages", CursorCache(16, 300))
+    r = TestClient(app_module.app).get("/recommend", params={"query": "mosel", "k": 1})
+    assert r.status_code == 200 and r.json()["top_k"] == [{"id": 9, "score": r.json()["top_k"][0]["score"]}]
@@ -0,0 +1,29 @@
+from src.serving.cache import ModelCache
+
+class _M:
+    def __init__(self, n):
+        self.n = n
+    def nbytes(self):
+        return self.n
+
+def test_lru_eviction_under_budget():
+    c = ModelCache(100)
+    assert c.put("a", _M(40)) == []
+    assert c.put("b", _M(40)) == []
+    assert c.get("a").n == 40            # a가 가장 최근 사용
+    assert c.put("c", _M(40)) == ["b"]
+    assert list(c.sizes()) == ["a", "c"]
+    assert c.resident_bytes == 80 and c.evictions == 1
+    assert c.get("b") is None
+
+def test_oversized_entry_is_kept_alone():
+    c = ModelCache(100)
+    c.put("a", _M(40))
+    assert c.put("big", _M(500)) == ["a"]
+    assert c.sizes() == {"big": 500}
+
+def test_replace_same_key():
+    c = ModelCache(100)
+    c.put("a", _M(60))
+    c.put("a", _M(30))
+    assert c.sizes() == {"a": 30}
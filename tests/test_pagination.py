@@ -0,0 +1,100 @@
+import pytest
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.io_utils.bundle import bundle_path, write_bundle
+from src.reco.embed import fit_tfidf
+from src.serving.cache import ModelCache
+from src.serving.pagination import CursorCache, decode_cursor, encode_cursor, page_token
+
+def test_cursor_roundtrip_and_tamper():
+    p = {"query": "napa pinot", "style": "reds", "k": 2}
+    c = encode_cursor(page_token(p), 4, p)
+    assert decode_cursor(c) == (page_token(p), 4, p)
+    forged = encode_cursor(page_token(p), 4, {**p, "k": 50})
+    for bad in (forged, "not-a-cursor", c[:-3]):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+def test_cursor_cache_ttl_and_lru():
+    now = [0.0]
+    cache = CursorCache(max_entries=2, ttl_s=10, clock=lambda: now[0])
+    cache.put("a", [1]); cache.put("b", [2])
+    assert cache.get("a") == [1]          # a 가 최근 → b 가 축출 대상
+    cache.put("c", [3])
+    assert cache.get("b") is None and cache.stats["evictions"] == 1
+    now[0] = 10.0
+    assert cache.get("a") is None and cache.stats["expired"] == 1 and len(cache) == 1
+
+CORPUS = [f"pinot noir napa {i}" for i in range(6)] + ["cabernet napa", "rioja tempranillo", "chardonnay"]
+
+def _client(tmp_path, monkeypatch, ahead=2):
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 1), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, list(range(len(CORPUS))))
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", str(tmp_path))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    monkeypatch.setattr(app_module, "_coalescer", None)
+    monkeypatch.setattr(app_module, "PAGE_AHEAD", ahead)
+    monkeypatch.setattr(app_module, "_pages", CursorCache(16, 300))
+    return TestClient(app_module.app)
+
+def _walk(client, params):
+    pages, r = [], client.get("/recommend", params=params).json()
+    while True:
+        pages.append([h["id"] for h in r["top_k"]])
+        if r["next_cursor"] is None:
+            return pages
+        r = client.get("/recommend", params={"cursor": r["next_cursor"]}).json()
+
+def test_pages_match_full_ranking(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    full = [h["id"] for h in client.get("/recommend", params={"query": "napa pinot", "k": 20}).json()["top_k"]]
+    calls = []
+    model = app_module.load_model("reds")
+    orig = type(model).recommend
+    monkeypatch.setattr(type(model), "recommend", lambda self, q, k: calls.append(k) or orig(self, q, k))
+    pages = _walk(client, {"query": "napa pinot", "k": 2})
+    assert sum(pages, []) == full and all(len(p) == 2 for p in pages[:-1])
+    # 첫 페이지는 k × 2 = 4까지 한 번 계산, 그 뒤로는 깊이를 넘을 때만 offset + 4 까지 다시 계산
+    assert calls == [4, 4 + 4, 8 + 4]
+    # 같은 첫 페이지 요청은 캐시 항목을 공유 (재계산 없음)
+    assert _walk(client, {"query": "napa pinot", "k": 2}) == pages and calls == [4, 8, 12]
+
+def test_expired_cursor_recomputes(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    r1 = client.get("/recommend", params={"query": "napa pinot", "k": 2}).json()
+    monkeypatch.setattr(app_module, "_pages", CursorCache(16, 300))   # 캐시 비움 = 만료/축출
+    r2 = client.get("/recommend", params={"cursor": r1["next_cursor"]}).json()
+    full = client.get("/recommend", params={"query": "napa pinot", "k": 4}).json()["top_k"]
+    assert [h["id"] for h in r2["top_k"]] == [h["id"] for h in full[2:4]]
+    assert client.get("/recommend", params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/recommend", params={"style": "reds"}).status_code == 422
+
+def test_reranked_pages_share_one_candidate_pool(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    params = {"query": "napa pinot", "k": 2, "candidates": 5, "pref_countries": "France"}
+    full = [h["id"] for h in client.get("/recommend", params={**params, "k": 5}).json()["top_k"]]
+    calls = []
+    model = app_module.load_model("reds")
+    orig = type(model).rerank
+    monkeypatch.setattr(type(model), "rerank",
+                        lambda self, q, k, prof, n=200: calls.append(k) or orig(self, q, k, prof, n))
+    monkeypatch.setattr(app_module, "_pages", CursorCache(16, 300))
+    pages = _walk(client, params)
+    # 풀(candidates=5) 전체를 한 번만 재정렬 → 페이지 사이 중복/누락 없음, 풀 끝에서 커서 종료
+    assert sum(pages, []) == full and len(set(full)) == 5
+    assert calls == [5]
+
+def test_reloaded_model_invalidates_cached_pages(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    r1 = client.get("/recommend", params={"query": "napa pinot", "k": 2}).json()
+    assert "versions" not in r1
+    # 모델 축출 + :latest 이동 (같은 코퍼스, 다른 id) → 커서 다음 페이지는 새 모델 기준
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 1), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, [100 + i for i in range(len(CORPUS))])
+    app_module._models.pop("reds")
+    r2 = client.get("/recommend", params={"cursor": r1["next_cursor"]}).json()
+    assert r2["top_k"] and all(h["id"] >= 100 for h in r2["top_k"])
+    # 모델이 그대로면 캐시 항목 재사용
+    stats = dict(app_module._pages.stats)
+    client.get("/recommend", params={"query": "napa pinot", "k": 2})
+    assert app_module._pages.stats["hits"] == stats["hits"] + 1
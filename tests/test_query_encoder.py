@@ -0,0 +1,46 @@
+import random
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.io_utils.bundle import write_bundle, read_bundle
+from src.reco.query_encoder import QueryEncoder, score
+
+WORDS = [f"w{i}" for i in range(200)] + ["château", "Crémant", "pinot", "noir", "napa", "rioja", "the", "a"]
+
+def _texts(n, lo, hi, seed):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi))) for _ in range(n)]
+
+CORPUS = _texts(800, 3, 20, 0)
+QUERIES = _texts(500, 0, 12, 1) + ["", "!!", "Pinot PINOT pinot noir", "zz unknown-terms"]
+
+@pytest.mark.parametrize("params", [
+    dict(ngram_range=(1, 2), min_df=2),
+    dict(ngram_range=(1, 3), sublinear_tf=True),
+    dict(ngram_range=(2, 2), norm="l1"),
+    dict(binary=True, stop_words="english", strip_accents="unicode", ngram_range=(1, 2)),
+])
+def test_encoder_matches_sklearn_transform_exactly(tmp_path, params):
+    vec = TfidfVectorizer(**params).fit(CORPUS)
+    expected = vec.transform(QUERIES)
+    expected.sort_indices()
+    write_bundle(str(tmp_path / "m.bundle"), vec, vec.transform(CORPUS), list(range(len(CORPUS))))
+    for enc in (QueryEncoder.from_vectorizer(vec), QueryEncoder.from_bundle(read_bundle(str(tmp_path / "m.bundle")))):
+        for i, q in enumerate(QUERIES):
+            cols, w = enc.encode(q)
+            row = expected[i]
+            assert np.array_equal(cols, row.indices)
+            assert np.array_equal(w, row.data)   # 비트 단위 일치
+
+def test_score_matches_sparse_product():
+    vec = TfidfVectorizer(ngram_range=(1, 2), min_df=2).fit(CORPUS)
+    X = vec.transform(CORPUS)
+    enc = QueryEncoder.from_vectorizer(vec)
+    for q in QUERIES[:50]:
+        expected = (X @ vec.transform([q]).T).toarray().ravel()
+        assert np.allclose(score(X.tocsc(), *enc.encode(q)), expected, rtol=0, atol=1e-12)
+
+def test_unsupported_analyzer():
+    vec = TfidfVectorizer(analyzer="char").fit(CORPUS)
+    with pytest.raises(ValueError):
+        QueryEncoder.from_vectorizer(vec)
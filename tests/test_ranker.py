@@ -0,0 +1,87 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.io_utils.bundle import bundle_path, write_bundle
+from src.reco.embed import fit_tfidf
+from src.reco.ranker import rerank, profile_from_user
+from src.serving.cache import ModelCache
+from src.serving.metadata import ItemMetadata
+from src.serving.model import load_serving_model
+
+def _rerank_loop(ids, sims, item_styles, item_countries, user_profile):
+    # 기존 구현 (항목별 루프 + 정렬) — 벡터 버전과 비교 기준
+    a = float(user_profile.get("adventurousness", 0.5))
+    pref_styles = user_profile.get("pref_styles", {})
+    pref_regions = user_profile.get("pref_regions", {})
+    scored = []
+    for id_, sim, st, co in zip(ids, sims, item_styles, item_countries):
+        cat = float(pref_styles.get(st, 0.0))
+        reg = float(pref_regions.get(co, 0.0))
+        score = 0.55 * sim + (0.35*(1-a) + 0.05*a) * cat + (0.20*(1-a)) * reg
+        if a > 0.6 and cat == 0.0:
+            score += 0.05 * a
+        scored.append((score, id_))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [id_ for score, id_ in scored]
+
+def test_vectorized_rerank_matches_loop():
+    rng = np.random.default_rng(0)
+    styles, countries = ["reds", "whites", "rose"], ["france", "italy", "spain", "chile"]
+    for _ in range(300):
+        n = int(rng.integers(0, 40))
+        ids = rng.permutation(1000)[:n].tolist()
+        sims = (rng.integers(0, 5, n) / 4).tolist()           # 동점 다수
+        st = [styles[i] for i in rng.integers(0, 3, n)]
+        co = [countries[i] for i in rng.integers(0, 4, n)]
+        prof = {"adventurousness": float(rng.choice([0.2, 0.5, 0.8])),
+                "pref_styles": {"reds": 1.0, "rose": 0.5}, "pref_regions": {"italy": 1.0}}
+        assert rerank(ids, sims, st, co, prof) == _rerank_loop(ids, sims, st, co, prof)
+
+def test_profile_from_user():
+    p = profile_from_user({"preferred_styles": ["reds"], "prefer_countries": ["Italy", "usa"], "adventurous": 0.8})
+    assert p == {"adventurousness": 0.8, "pref_styles": {"reds": 1.0},
+                 "pref_regions": {"italy": 1.0, "united states": 1.0}}
+    assert profile_from_user({})["adventurousness"] == 0.5
+
+CORPUS = ["pinot noir napa", "pinot noir burgundy", "pinot grigio veneto", "rioja tempranillo",
+          "napa cabernet", "pinot blanc alsace"]
+COUNTRIES = ["United States", "France", "Italy", "Spain", "United States", "France"]
+
+def _attach_countries(model):
+    model.attach_meta(ItemMetadata.from_records([{"country": c} for c in COUNTRIES]))
+
+def test_two_stage_matches_full_rerank(tmp_path):
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 1), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, [10 + i for i in range(len(CORPUS))])
+    model = load_serving_model(str(tmp_path), "reds")
+    _attach_countries(model)
+    prof = profile_from_user({"prefer_countries": ["italy"], "adventurous": 0.2})
+    # 후보 수 ≥ 카탈로그 → 전체 재정렬과 같다
+    sims = model.scores("pinot").tolist()
+    full = rerank(list(range(len(CORPUS))), sims, ["reds"] * len(CORPUS),
+                  [c.lower() for c in COUNTRIES], prof)
+    got = model.rerank("pinot", 3, prof, n_candidates=len(CORPUS))
+    assert [h["id"] for h in got] == [10 + i for i in full[:3]]
+    assert got[0]["id"] == 12 and got[0]["style"] == "reds"      # 이탈리아 가중
+    # 후보 2개로 제한하면 1단계 코사인 상위 2개 안에서만 재정렬
+    top2 = {h["id"] for h in model.recommend("pinot", 2)}
+    assert {h["id"] for h in model.rerank("pinot", 2, prof, n_candidates=2)} == top2
+
+def test_recommend_endpoint_reranks(tmp_path, monkeypatch):
+    vec, X = fit_tfidf(CORPUS, ngram=(1, 1), min_df=1)
+    write_bundle(bundle_path(str(tmp_path), "reds"), vec, X, [10 + i for i in range(len(CORPUS))])
+    users = tmp_path / "users.jsonl"
+    users.write_text('{"user_id": "u1", "prefer_countries": ["spain"], "adventurous": 0.2}\n', encoding="utf-8")
+    monkeypatch.setattr(app_module, "LOCAL_ARTIFACTS", str(tmp_path))
+    monkeypatch.setattr(app_module, "_models", ModelCache(64 * 1024 * 1024))
+    monkeypatch.setattr(app_module, "USERS_PATH", str(users))
+    monkeypatch.setattr(app_module, "_profiles", None)
+    monkeypatch.setattr(app_module, "_attach_items", _attach_countries)
+    client = TestClient(app_module.app)
+    plain = client.get("/recommend", params={"query": "napa tempranillo", "k": 2}).json()
+    assert "reranked" not in plain
+    r = client.get("/recommend", params={"query": "napa tempranillo", "k": 2, "user_id": "u1"}).json()
+    assert r["reranked"] and r["top_k"][0]["id"] == 13
+    r = client.get("/recommend", params={"query": "napa tempranillo", "k": 2, "pref_countries": "United States"}).json()
+    assert r["top_k"][0]["id"] in (10, 14) and r["top_k"][0]["score"] >= r["top_k"][1]["score"]
+    assert client.get("/recommend", params={"query": "napa", "user_id": "nobody"}).status_code == 404
@@ -0,0 +1,61 @@
+import numpy as np
+from sklearn.metrics.pairwise import linear_kernel
+from src.reco.embed import fit_tfidf
+from src.reco.batch import query_matrix, iter_score_blocks, topk_rows, topk_sparse, topk_all
+
+def test_blocks_match_per_user_scores():
+    corpus = ["merlot napa valley", "cabernet france bordeaux", "prosecco italy veneto",
+              "pinot noir sonoma", "bordeaux merlot blend"]
+    vec, X = fit_tfidf(corpus, ngram=(1, 2), min_df=1)
+    queries = ["merlot", "bordeaux france", "zzz", "pinot napa"]
+    Q = query_matrix(vec, queries)
+    blocks = list(iter_score_blocks(X, Q, mem_mb=1e-6))   # 1행씩
+    assert [start for start, _ in blocks] == [0, 1, 2, 3]
+    S = np.vstack([b for _, b in blocks])
+    for i, q in enumerate(queries):
+        assert np.allclose(S[i], linear_kernel(X, Q[i]).ravel())
+
+def test_topk_rows_order_and_floor():
+    S = np.array([[0.1, 0.9, 0.5, 0.9], [-1e9, 0.2, -1e9, -1e9]])
+    idx, vals = topk_rows(S, 3)
+    assert idx.tolist() == [[1, 3, 2], [1, -1, -1]]
+    assert vals[0].tolist() == [0.9, 0.9, 0.5]
+
+def test_topk_rows_tie_at_cutoff_prefers_low_index():
+    S = np.zeros((2, 200))
+    S[0, 150] = 1.0
+    S[1, [7, 3]] = 0.5
+    idx, vals = topk_rows(S, 3)
+    assert idx.tolist() == [[150, 0, 1], [3, 7, 0]]
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        S = rng.integers(0, 3, (3, int(rng.integers(1, 40)))) / 2
+        k = int(rng.integers(1, 45))
+        idx, _ = topk_rows(S, k)
+        for i, row in enumerate(S):
+            assert idx[i].tolist() == np.lexsort((np.arange(len(row)), -row))[:k].tolist()
+
+def test_topk_sparse_matches_full_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        n = int(rng.integers(1, 30))
+        s = np.where(rng.random(n) < 0.5, rng.integers(0, 4, n) / 4, 0.0)
+        k = int(rng.integers(0, 35))
+        idx = np.flatnonzero(s)
+        top_idx, top_vals = topk_sparse(idx, s[idx], k, n)
+        order = np.lexsort((np.arange(n), -s))[:k]
+        assert np.array_equal(top_idx, order)
+        assert np.array_equal(top_vals, s[order])
+
+def test_topk_all_blocks_and_adjust():
+    corpus = ["merlot napa", "merlot bordeaux", "pinot noir", "noir napa", "rioja spain", "napa cab"]
+    vec, X = fit_tfidf(corpus, ngram=(1, 1), min_df=1)
+    Q = query_matrix(vec, ["napa", "merlot noir", "zzz", "rioja", "napa merlot"])
+    full = topk_rows((Q @ X.T).toarray(), 3)[0]
+    assert np.array_equal(topk_all(X, Q, 3, mem_mb=1e-6), full)
+    assert topk_all(X, Q, 10).shape == (5, 6)
+
+    def drop_first(start, S):
+        S[:, 0] = -1e9
+    picked = topk_all(X, Q, 3, mem_mb=1e-6, adjust=drop_first)
+    assert not (picked == 0).any()
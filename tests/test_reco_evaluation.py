@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from src.reco.embed import fit_tfidf
+from src.reco.features import build_item_features
+from src.reco.evaluation import evaluate_picks, intra_list_similarity_batch
+from sklearn.metrics.pairwise import linear_kernel
+
+def intra_list_similarity(X, picked_row_idxs):
+    # 사용자별 기준 구현 (쌍별 코사인 평균, 대각 제외)
+    if len(picked_row_idxs) <= 1:
+        return 0.0
+    sub = X[picked_row_idxs]
+    sim = linear_kernel(sub, sub)
+    vals = sim[~np.eye(sim.shape[0], dtype=bool)]
+    return float(np.mean(vals)) if vals.size else 0.0
+
+def test_batched_ils_matches_per_user():
+    corpus = ["merlot napa", "merlot bordeaux", "pinot noir", "noir napa", "rioja spain"]
+    _, X = fit_tfidf(corpus, ngram=(1, 1), min_df=1)
+    picked = np.array([[0, 1, 3], [2, 4, -1], [1, -1, -1]])
+    got = intra_list_similarity_batch(X, picked)
+    want = [intra_list_similarity(X, [i for i in row if i >= 0]) for row in picked]
+    assert np.allclose(got, want)
+
+def test_evaluate_picks_columns():
+    df = pd.DataFrame([
+        {"style": "reds", "id": 1, "wine": "Merlot", "winery": "A", "location": "France", "country": "France"},
+        {"style": "reds", "id": 2, "wine": "Pinot", "winery": "B", "location": "Italy", "country": "Italy"},
+    ]).set_index(["style", "id"], drop=False)
+    keys = [{"style": "reds", "id": 1}, {"style": "reds", "id": 2}]
+    feats = build_item_features(df, keys)
+    _, X = fit_tfidf(["merlot a france", "pinot b italy"], ngram=(1, 1), min_df=1)
+    users = [{"user_id": "u1", "terms": ["merlot"], "prefer_countries": ["Italy"]},
+             {"user_id": "u2", "terms": [], "prefer_countries": []}]
+    out = evaluate_picks(X, np.array([[0, 1], [-1, -1]]), feats, users)
+    assert list(out.columns) == ["user_id", "reco_count", "hit@k", "terms_hit@k",
+                                 "country_hit@k", "ILS@k", "Diversity@k", "nDCG@k", "RegionMatch@k"]
+    assert out.iloc[0][["reco_count", "hit@k", "terms_hit@k", "country_hit@k"]].tolist() == [2, 1, 0.5, 0.5]
+    assert out.iloc[1][["reco_count", "hit@k", "Diversity@k"]].tolist() == [0, 0, 0.0]
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from src.reco.features import build_item_features, apply_soft_prefs, apply_hard_filters
+
+def _frame():
+    df = pd.DataFrame([
+        {"style": "reds", "id": 1, "wine": "Pinot Noir", "winery": "Kistler", "location": "United States · Sonoma",
+         "country": "United States", "rating": {"average": "4.6", "reviews": "120 ratings"}},
+        {"style": "reds", "id": 2, "wine": "Rioja", "winery": None, "location": "Spain · Rioja",
+         "country": "Spain", "rating": {"average": None, "reviews": None}},
+        {"style": "whites", "id": 3, "wine": "Chablis", "winery": "Fevre", "location": "France · Burgundy",
+         "country": "France", "rating": {"average": "4.3", "reviews": "8 ratings"}},
+    ])
+    return df.set_index(["style", "id"], drop=False)
+
+def test_features_and_gates():
+    keys = [{"style": "reds", "id": 1}, {"style": "reds", "id": 2},
+            {"style": "whites", "id": 3}, {"style": "whites", "id": 99}]
+    feats = build_item_features(_frame(), keys)
+    assert feats.present.tolist() == [True, True, True, False]
+    assert feats.reviews.tolist() == [120, 0, 8, 0]
+    assert feats.rating.tolist() == [4.6, 0.0, 4.3, 0.0]
+    assert feats.text[1] == "rioja none spain · rioja"
+
+    u = {"prefer_countries": ["Spain"], "avoid_countries": ["France"], "terms": ["pinot"],
+         "avoid_wineries": ["kistler"]}
+    s = apply_soft_prefs(np.zeros(4), feats, u)
+    assert np.allclose(s, [0.05 - 0.20, 0.05, -0.20, 0.0])
+
+    allowed = feats.style_mask({"reds", "whites"})
+    out = apply_hard_filters(np.ones(4), feats, allowed, min_reviews=10, min_rating=4.0)
+    assert out.tolist() == [1.0, -1e9, -1e9, -1e9]
+    out = apply_hard_filters(np.ones(4), feats, feats.style_mask({"whites"}), 0, 0.0)
+    assert out.tolist() == [-1e9, -1e9, 1.0, 1.0]
@@ -1,4 +1,5 @@
-from src.reco.metrics import ndcg_at_k, region_match_at_k
+import numpy as np
+from src.reco.metrics import ndcg_at_k, region_match_at_k, ndcg_at_k_batch, region_match_at_k_batch
 
 def test_ndcg_simple():
     gains = [2,1,0,0,0]
@@ -9,3 +10,22 @@ def test_region_match():
     countries = ["France","Italy","USA","Spain","France"]
     preferred = {"France","Italy"}
     assert abs(region_match_at_k(countries, preferred, 5) - 0.6) < 1e-9
+
+def test_batch_matches_scalar():
+    rng = np.random.default_rng(0)
+    gains = rng.integers(0, 3, size=(200, 10))
+    gains[:5] = 0
+    per, mean = ndcg_at_k_batch(gains, 10)
+    want = [ndcg_at_k(g.tolist(), 10) for g in gains]
+    assert np.allclose(per, want, rtol=0, atol=1e-12)
+    assert abs(mean - np.mean(want)) < 1e-12
+
+    countries = [["France", "Italy", "USA", "Spain", "France"], ["Chile"], []]
+    preferred = [{"France", "Italy"}, {"Chile"}, {"France"}]
+    match = np.zeros((3, 5), dtype=bool)
+    valid = np.zeros((3, 5), dtype=bool)
+    for i, cs in enumerate(countries):
+        for j, c in enumerate(cs):
+            match[i, j], valid[i, j] = c in preferred[i], True
+    per, _ = region_match_at_k_batch(match, 5, valid)
+    assert per.tolist() == [region_match_at_k(c, p, 5) for c, p in zip(countries, preferred)]
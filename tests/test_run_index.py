@@ -0,0 +1,72 @@
+import json
+from src.io_utils.run_index import (load_index, save_index, sync_api, sync_offline,
+                                    fill_history, best_run)
+
+class FakeRun:
+    def __init__(self, rid, created, summary, state="finished", history=None):
+        self.id, self.name, self.created_at, self.state = rid, f"run-{rid}", created, state
+        self.url, self.summary, self._history = f"https://wandb/{rid}", summary, history or []
+        self.scans = 0
+
+    def scan_history(self, keys):
+        self.scans += 1
+        return [r for r in self._history if any(k in r for k in keys)]
+
+class FakeApi:
+    def __init__(self, runs):
+        self.runs_list, self.calls = runs, []
+
+    def runs(self, path, filters=None, order=None):
+        self.calls.append(filters)
+        since = (filters or {}).get("created_at", {}).get("$gte", "")
+        return [r for r in sorted(self.runs_list, key=lambda r: r.created_at) if r.created_at >= since]
+
+    def run(self, key):
+        return next(r for r in self.runs_list if key.endswith("/" + r.id))
+
+def test_incremental_sync_and_history_cache(tmp_path):
+    r1 = FakeRun("a", "2025-01-01T00:00:00", {"avg_hit@k": 0.5})
+    r2 = FakeRun("b", "2025-01-02T00:00:00", '{"avg_hit@k": "0.7"}')        # 문자열 JSON summary
+    r3 = FakeRun("c", "2025-01-03T00:00:00", {}, history=[{"avg_hit@k": 0.2}, {"avg_hit@k": 0.9}])
+    api = FakeApi([r1, r2, r3])
+    index = load_index(str(tmp_path / "idx.json"))
+    fetched = sync_api(index, api, "e/p")
+    assert len(fetched) == 3 and api.calls == [None]
+    assert fill_history(index, "avg_hit@k", fetched, workers=4) == 1
+    assert fill_history(index, "avg_hit@k", fetched, workers=4) == 0   # 캐시됨
+    assert r3.scans == 1
+    save_index(index, str(tmp_path / "idx.json"))
+
+    index = load_index(str(tmp_path / "idx.json"))
+    r4 = FakeRun("d", "2025-01-04T00:00:00", {"avg_hit@k": 0.8}, state="running")
+    api.runs_list.append(r4)
+    fetched = sync_api(index, api, "e/p")
+    assert api.calls[-1] == {"created_at": {"$gte": "2025-01-03T00:00:00"}}
+    assert {k for k, _ in fetched} == {"e/p/c", "e/p/d"}
+    best, val = best_run(index, "avg_hit@k", maximize=True)
+    assert best["id"] == "c" and val == 0.9
+
+    r4.state, r4.summary = "finished", {"avg_hit@k": 0.95}
+    sync_api(index, api, "e/p")                                           # running → 다시 가져옴
+    assert best_run(index, "avg_hit@k", maximize=True)[0]["id"] == "d"
+    assert best_run(index, "avg_hit@k", maximize=False)[0]["id"] == "a"
+
+def test_offline_index(tmp_path):
+    for rid, val in (("x1", 0.3), ("x2", 0.6)):
+        files = tmp_path / "wandb" / f"run-20250101_000000-{rid}" / "files"
+        files.mkdir(parents=True)
+        (files / "wandb-summary.json").write_text(json.dumps({"avg_hit@k": val, "_step": 1, "img": {"path": "p"}}))
+    index = load_index(str(tmp_path / "none.json"))
+    assert sync_offline(index, str(tmp_path / "wandb")) == 2
+    assert sync_offline(index, str(tmp_path / "wandb")) == 0
+    best, val = best_run(index, "avg_hit@k", maximize=True)
+    assert best["id"] == "x2" and val == 0.6
+    assert set(best["metrics"]) == {"avg_hit@k"}
+
+def test_load_index_refresh_ignores_existing_file(tmp_path):
+    path = str(tmp_path / "idx.json")
+    index = load_index(path)
+    index["runs"]["p/r1"] = {"id": "r1"}
+    save_index(index, path)
+    assert "p/r1" in load_index(path)["runs"]
+    assert load_index(path, refresh=True)["runs"] == {}
@@ -0,0 +1,9 @@
+import subprocess, sys
+import pytest
+from benchmarks.bench_startup import ENTRY_POINTS, HEAVY
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_does_not_import_heavy_modules(module):
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
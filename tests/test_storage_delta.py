@@ -0,0 +1,51 @@
+import json
+from src.io_utils.storage import save_snapshot, save_delta_snapshot, reconstruct, load_delta
+
+def _wine(i, avg="4.5"):
+    return {"id": i, "wine": f"wine {i}", "winery": "w", "location": "France · Bordeaux",
+            "rating": {"average": avg, "reviews": "10 ratings"}}
+
+def test_delta_roundtrip(tmp_path):
+    objects = str(tmp_path / "objects")
+    base, d1, d2 = (tmp_path / n for n in ("s0", "s1", "s2"))
+    for d in (base, d1, d2):
+        d.mkdir()
+    save_snapshot([_wine(1), _wine(2), _wine(3)], "reds", str(base))
+
+    items1 = [_wine(1), _wine(2, avg="4.9"), _wine(4)]
+    delta = save_delta_snapshot(items1, "reds", str(d1), parent=str(base), objects_dir=objects)
+    assert delta["added"].keys() == {"4"}
+    assert delta["changed"].keys() == {"2"}
+    assert delta["removed"] == [3]
+    assert not (d1 / "wines_reds.json").exists()
+    assert reconstruct(str(d1), "reds", objects_dir=objects) == items1
+
+    items2 = [_wine(1), _wine(2, avg="4.9"), _wine(4), _wine(5)]
+    save_delta_snapshot(items2, "reds", str(d2), parent=str(d1), objects_dir=objects)
+    assert load_delta(str(d2), "reds")["added"].keys() == {"5"}
+    assert reconstruct(str(d2), "reds", objects_dir=objects) == items2
+    assert load_delta(str(base), "reds") is None
+
+def test_delta_keeps_fetch_order_and_duplicates(tmp_path):
+    from src.io_utils.storage import carry_forward
+    objects = str(tmp_path / "objects")
+    base, d1, d2 = (tmp_path / n for n in ("s0", "s1", "s2"))
+    for d in (base, d1, d2):
+        d.mkdir()
+    save_snapshot([_wine(1), _wine(2), _wine(3)], "reds", str(base))
+
+    # 재정렬 + id 중복(앞선 버전은 다른 내용) → 전체 스냅샷과 같은 원본 목록
+    items = [_wine(3), _wine(1, avg="3.0"), _wine(2), _wine(1)]
+    delta = save_delta_snapshot(items, "reds", str(d1), parent=str(base), objects_dir=objects)
+    assert delta["count"] == 3 and len(delta["order"]) == 4
+    assert reconstruct(str(d1), "reds", objects_dir=objects) == items
+
+    # 304 이어 붙이기도 순서 유지 (매니페스트만 복사)
+    carry_forward("reds", str(d2), str(d1), delta=True)
+    assert reconstruct(str(d2), "reds", objects_dir=objects) == items
+
+    # 순서가 같으면 order 는 남기지 않는다
+    d3 = tmp_path / "s3"; d3.mkdir()
+    plain = save_delta_snapshot([_wine(1), _wine(2), _wine(3), _wine(4)], "reds", str(d3),
+                                parent=str(base), objects_dir=objects)
+    assert "order" not in plain
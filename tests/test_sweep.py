@@ -0,0 +1,19 @@
+import numpy as np
+from src.io_utils.shm import SharedArrays, attach
+from src.pipelines.sweep import check_gates
+
+GATES = {"min_eval_queries": 50, "gate": {"ndcg_at_10": 0.8, "region_match_at_10": 0.55},
+         "rollout": {"require_both_metrics": True}}
+
+def test_shared_arrays_roundtrip():
+    with SharedArrays.create({"a": np.arange(5, dtype=np.int32), "t": ["merlot", "rosé", ""]}) as sh:
+        got = attach(sh.spec)
+        assert got["a"].tolist() == [0, 1, 2, 3, 4]
+        assert got["t"] == ["merlot", "rosé", ""]
+
+def test_check_gates():
+    row = {"ndcg_at_10": 0.9, "region_match_at_10": 0.6}
+    assert check_gates(row, GATES, 100) == (True, "")
+    ok, notes = check_gates({**row, "region_match_at_10": 0.5}, GATES, 100)
+    assert not ok and "region_match_at_10" in notes
+    assert not check_gates(row, GATES, 10)[0]
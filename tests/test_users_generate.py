@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.io_utils.users import load_users
+from src.pipelines import users_generate as ug
+
+def _profile():
+    df = pd.DataFrame({
+        "wine": ["Cabernet Sauvignon Reserve", "Pinot Noir", "Chardonnay Oak", "Riesling Dry", "Malbec"] * 40,
+        "winery": ["Alpha", "Beta", "Gamma", "Delta", "Epsilon"] * 40,
+        "location": ["Napa", "Burgundy", "Sonoma", "Mosel", "Mendoza"] * 40,
+        "country": ["United States", "France", "United States", "Germany", "Argentina"] * 40,
+    })
+    countries, _, words = ug.catalog_stats(df)
+    return ug.build_profile(countries, words, ["reds", "whites"])
+
+OPTS = {"p_pref_style": 0.7, "p_avoid_style": 0.3, "p_avoid_country": 0.2, "min_terms": 2, "minimal": True}
+
+def test_gumbel_topk_distinct_and_masks_excluded():
+    rng = np.random.default_rng(0)
+    logw = np.tile(ug._log_weights([0.5, 0.3, 0.2, 0.0]), (1000, 1))
+    idx = ug._gumbel_topk(logw, 3, rng)
+    assert idx.shape == (1000, 3)
+    # 가중치 0 후보는 뽑히지 않고, 뽑힌 인덱스는 행마다 중복이 없다
+    assert not (idx == 3).any()
+    assert all(len(set(r)) == 3 for r in idx.tolist())
+    first = np.bincount(idx[:, 0], minlength=3) / 1000
+    assert abs(first[0] - 0.5) < 0.06 and abs(first[2] - 0.2) < 0.06
+    assert (ug._gumbel_topk(ug._log_weights([1.0, 0.0])[None, :], 2, rng) == [[0, -1]]).all()
+
+def test_output_independent_of_workers_and_format(tmp_path, monkeypatch):
+    monkeypatch.setattr(ug, "BLOCK", 16)
+    prof = _profile()
+    n = 50
+    ug.write_users(str(tmp_path / "a.json"), n, 7, prof, OPTS, "json", workers=1)
+    ug.write_users(str(tmp_path / "b.json"), n, 7, prof, OPTS, "json", workers=1)
+    ug.write_users(str(tmp_path / "c.jsonl"), n, 7, prof, OPTS, "jsonl", workers=1)
+    a = (tmp_path / "a.json").read_text(encoding="utf-8")
+    assert a == (tmp_path / "b.json").read_text(encoding="utf-8")
+    users = json.loads(a)
+    assert a == json.dumps(users, ensure_ascii=False, indent=2)
+    assert len(users) == n and len({u["user_id"] for u in users}) == n
+    assert load_users(str(tmp_path / "c.jsonl")) == users == load_users(str(tmp_path / "a.json"))
+    # 블록 단위 난수 → 병렬 렌더링도 같은 순서/내용
+    assert "".join(ug.iter_rendered(n, 7, prof, OPTS, "jsonl", workers=2)) == (tmp_path / "c.jsonl").read_text(encoding="utf-8")
+
+def test_empty_json_array(tmp_path):
+    ug.write_users(str(tmp_path / "u.json"), 0, 1, _profile(), OPTS, "json")
+    assert load_users(str(tmp_path / "u.json")) == []
@@ -0,0 +1,58 @@
+import json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.io_utils.wines_api import StyleFetcher
+
+PAYLOAD = {"reds": [{"id": 1, "wine": "a"}], "whites": [{"id": 2, "wine": "b"}],
+           "rose": [{"id": 3, "wine": "say \"hi\", [x]\\"}, {"id": 4, "tags": [1, 2], "wine": "{,}"}, 5]}
+
+class _Handler(BaseHTTPRequestHandler):
+    hits: dict = {}
+
+    def do_GET(self):
+        style = self.path.strip("/")
+        n = self.hits[style] = self.hits.get(style, 0) + 1
+        if style == "whites" and n == 1:          # 첫 요청은 일시 오류 → 재시도 확인
+            self.send_response(503); self.end_headers(); return
+        etag = f'"{style}-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304); self.end_headers(); return
+        body = json.dumps(PAYLOAD[style]).encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_fetch_all_retry_and_conditional(tmp_path):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    cache = str(tmp_path / "http_cache.json")
+    try:
+        f = StyleFetcher(base=base, max_workers=2, backoff=0.01, cache_path=cache)
+        assert f.fetch_all(["reds", "whites"]) == {s: PAYLOAD[s] for s in ("reds", "whites")}
+        assert _Handler.hits["whites"] == 2
+        f.save_validators()
+
+        f2 = StyleFetcher(base=base, max_workers=2, backoff=0.01, cache_path=cache)
+        assert f2.fetch_all(["reds", "whites"]) == {"reds": None, "whites": None}
+        assert f2.fetch("reds", conditional=False) == PAYLOAD["reds"]
+    finally:
+        srv.shutdown()
+
+def test_fetch_to_file_streams_hash_and_count(tmp_path):
+    import hashlib
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        f = StyleFetcher(base=f"http://127.0.0.1:{srv.server_address[1]}")
+        path = tmp_path / "wines_rose.json"
+        info = f.fetch_to_file("rose", str(path), chunk_size=5)
+        body = path.read_bytes()
+        assert json.loads(body) == PAYLOAD["rose"]
+        assert info == {"sha256": hashlib.sha256(body).hexdigest(), "bytes": len(body), "count": 3}
+    finally:
+        srv.shutdown()
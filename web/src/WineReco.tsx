@@ -1,5 +1,5 @@
 // web/src/components/WineReco.tsx
-import { useEffect, useMemo, useState } from "react";
+import { useMemo, useState } from "react";
 
 /* ======================== Types ======================== */
 type Style = "reds" | "whites" | "rose" | "port" | "sparkling";
@@ -42,8 +42,28 @@ interface PredictResult {
   term_hint: boolean;
 }
 
+/** /recommend 응답 (표시 필드는 서버 메타데이터에서 채워짐) */
+interface ApiHit {
+  id: number | string;
+  score: number;
+  style?: Style;
+  wine?: string | null;
+  winery?: string | null;
+  country?: string | null;
+  rating?: number | null;
+  reviews?: number | null;
+  image?: string | null;
+}
+
+interface ApiResponse {
+  top_k: ApiHit[];
+  styles?: string[];
+  missing?: string[];
+  next_cursor?: string | null;
+}
+
 /* ================== Sample / External Sources ================== */
-/** 작은 샘플 카탈로그(외부 JSON이 없어도 항상 동작) */
+/** 작은 샘플 카탈로그(API에 연결할 수 없을 때의 오프라인 예비) */
 const CATALOG: RawCatalogItem[] = [
   { winery: "Maselva", wine: "Emporda 2012", rating: { average: "4.9", reviews: "88 ratings" }, location: "Spain · Empordà", image: "https://images.vivino.com/thumbs/ApnIiXjcT5Kc33OHgNb9dA_375x500.jpg", id: 1 },
   { winery: "Ernesto Ruffo", wine: "Amarone della Valpolicella Riserva N.V.", rating: { average: "4.9", reviews: "75 ratings" }, location: "Italy · Amarone della Valpolicella", image: "https://images.vivino.com/thumbs/nC9V6L2mQQSq0s-wZLcaxw_pb_x300.png", id: 2 },
@@ -55,13 +75,10 @@ const CATALOG: RawCatalogItem[] = [
 ];
 const DEFAULT_CATALOG: RawCatalogItem[] = CATALOG;
 
-const CATALOG_SOURCES: string[] = [
-  "wines_reds.json",
-  "wines_whites.json",
-  "wines_rose.json",
-  "wines_port.json",
-  "wines_sparkling.json",
-];
+/** 추천 API (카탈로그를 내려받지 않고 /recommend 결과의 표시 필드를 그대로 사용) */
+const API_BASE: string = (import.meta.env.VITE_API_URL as string | undefined) ?? "";
+const DISPLAY_FIELDS = "wine,winery,country,rating,reviews,image";
+const TOP_K = 3;
 
 /* ======================== Helpers ======================== */
 const TERM_ALIASES: Record<string, string[]> = {
@@ -125,6 +142,20 @@ const normalizeItem = (raw: RawCatalogItem): Item => {
   };
 };
 
+const hitToItem = (hit: ApiHit): Item => ({
+  wine_id: hit.id,
+  wine_name: hit.wine ?? "",
+  winery: hit.winery ?? "",
+  label: `${hit.winery ?? ""} ${hit.wine ?? ""}`.trim(),
+  rating: hit.rating ?? 0,
+  reviews: hit.reviews ?? 0,
+  image_url: hit.image ?? undefined,
+  country: (hit.country ?? "").toLowerCase(),
+  region: "",
+  style: hit.style ?? "reds",
+  _rawScore: hit.score,
+});
+
 const upscaleImage = (url?: string): string => {
   if (!url) return "";
   if (url.includes("_pb_x300")) return url.replace("_pb_x300", "_pb_x600");
@@ -177,52 +208,10 @@ export default function WineRecoSearchAndResults() {
   // Results
   const [result, setResult] = useState<PredictResult | null>(null);
 
-  // Catalog
-  const [catalog, setCatalog] = useState<RawCatalogItem[]>(DEFAULT_CATALOG);
-
-  const mergeCatalogs = (arrays: unknown[]): RawCatalogItem[] => {
-    const out: RawCatalogItem[] = [];
-    const seen = new Set<number | string>();
-    for (const arr of arrays) {
-      if (!Array.isArray(arr)) continue;
-      for (const x of arr as RawCatalogItem[]) {
-        const id = (x?.id ?? `${x?.winery}-${x?.wine}`) as number | string;
-        if (id == null || seen.has(id)) continue;
-        seen.add(id);
-        out.push(x);
-      }
-    }
-    return out.length ? out : DEFAULT_CATALOG;
-  };
-
-  // Load external JSONs (optional)
-  useEffect(() => {
-    let cancelled = false;
-    (async () => {
-      try {
-        const fetched: unknown[] = [];
-        for (const path of CATALOG_SOURCES) {
-          try {
-            const res = await fetch(path);
-            if (res.ok) {
-              const data = await res.json();
-              if (Array.isArray(data)) fetched.push(data);
-            }
-          } catch { /* ignore per-source errors */ }
-        }
-        const merged = mergeCatalogs(fetched);
-        if (!cancelled) setCatalog(merged);
-      } catch {
-        if (!cancelled) setCatalog(DEFAULT_CATALOG);
-      }
-    })();
-    return () => { cancelled = true; };
-  }, []);
-
-  // Normalize & infer style
+  // Offline fallback catalog (normalize & infer style)
   const items: Item[] = useMemo(
-    () => catalog.map(normalizeItem).map(it => ({ ...it, style: guessStyle(it.label, it.region) })),
-    [catalog]
+    () => DEFAULT_CATALOG.map(normalizeItem).map(it => ({ ...it, style: guessStyle(it.label, it.region) })),
+    []
   );
 
   const scoreRaw = (it: Item): number => {
@@ -256,7 +245,36 @@ export default function WineRecoSearchAndResults() {
     return needles.some(t => joined.includes(t) || joinedNoSpace.includes(t));
   };
 
-  const predict = (): PredictResult => {
+  const predictRemote = async (): Promise<PredictResult> => {
+    const needles = expandTerms(terms);
+    const params = new URLSearchParams({
+      styles: styles.join(","),
+      query: (needles.length ? needles : styles).join(" "),
+      k: String(TOP_K),
+      pref_styles: styles.join(","),
+      fields: DISPLAY_FIELDS,
+    });
+    if (preferCountry) params.set("pref_countries", preferCountry);
+
+    const t0 = performance.now();
+    const res = await fetch(`${API_BASE}/recommend?${params}`);
+    if (!res.ok) throw new Error(`recommend failed: ${res.status}`);
+    const data = (await res.json()) as ApiResponse;
+    const top = data.top_k.map(hitToItem);
+
+    const maxScore = Math.max(...top.map(x => x._rawScore || 0), 1e-9);
+    const want = preferCountry.toLowerCase();
+    return {
+      recommendations: top.map(it => ({ ...it, score: (it._rawScore || 0) / maxScore, why: buildWhy(it) })),
+      model_version: "wine-reco@Production#v7",
+      inference_ms: Math.round(performance.now() - t0),
+      country_hint: Boolean(want) && !top.some(it => it.country === want),
+      term_filtered: needles.length > 0,
+      term_hint: needles.length > 0 && top.length < TOP_K,
+    };
+  };
+
+  const predictLocal = (): PredictResult => {
     const needles = expandTerms(terms);
 
     // 1) style pool
@@ -319,9 +337,15 @@ export default function WineRecoSearchAndResults() {
     };
   };
 
-  const onSubmit = (e?: React.FormEvent | React.MouseEvent) => {
+  const onSubmit = async (e?: React.FormEvent | React.MouseEvent) => {
     e?.preventDefault?.();
-    setResult(predict());
+    let next: PredictResult;
+    try {
+      next = await predictRemote();
+    } catch {
+      next = predictLocal();   // API 미연결 시 샘플 카탈로그로 동작
+    }
+    setResult(next);
     setScreen("results");
   };
 
@@ -3,4 +3,10 @@ import react from '@vitejs/plugin-react-swc'
 
 export default defineConfig({
   plugins: [react()],
+  // 개발 서버: /recommend 를 로컬 API(uvicorn src.app:app)로 프록시 (VITE_API_URL 미설정 시)
+  server: {
+    proxy: {
+      '/recommend': 'http://localhost:8000',
+    },
+  },
 })